@@ -1,4 +1,10 @@
 from .automation_utils import *
 from .recon_report_load import *
 from .recon_report_update import *
-from .slack_messages import *
\ No newline at end of file
+from .slack_messages import *
+from .drop_off_indexer import *
+from .dispatcher import *
+from .trigger_coalescer import *
+from .file_stability import *
+from .report_logging import *
+from .run_metrics import *
\ No newline at end of file
@@ -1,19 +1,36 @@
 import os
 import time
+import threading
 from datetime import datetime
 import re
 import shutil
-import logging
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from .recon_report_update import update_header_and_detail_tables
-from .slack_messages import send_slack_message, delete_all_messages
+from .drop_off_indexer import start_drop_off_indexer, stop_drop_off_indexer
+from .dispatcher import ReportDispatcher
+from .trigger_coalescer import TriggerCoalescer
+from .file_stability import FileStabilityMonitor, observer_emits_close_events
+from .report_logging import get_report_logger, stop_report_logging
+from .run_metrics import (
+    start_run,
+    finish_run,
+    start_metrics_server,
+    stop_metrics_server,
+)
+from .slack_messages import (
+    send_slack_message,
+    delete_all_messages,
+    start_slack_notifier,
+    stop_slack_notifier,
+)
 from utils import clear_folder
 from dataprep import increment_charts
 from .recon_report_load import (
     load_header_and_detail_to_sql,
     reset_process_sql_tables,
     auto_load_to_sql_tables,
+    sort_by_date,
 )
 from config import (
     rrl_staging,
@@ -29,6 +46,8 @@ from config import (
     recon_load_trigger,
     recon_report_update_channel_id,
     recon_update_trigger,
+    drop_off_indexer_enabled,
+    ingest_stability_seconds,
 )
 
 
@@ -118,6 +137,9 @@ def configure_logging(file_name, timestamp, process_name):
     """
     Configures logging for a specific file and process, creating a logger and log file.
 
+    The records are queued and written by the report logging listener thread,
+    which keeps the log file open until the logger is closed.
+
     Parameters
     ----------
     file_name : str
@@ -130,7 +152,8 @@ def configure_logging(file_name, timestamp, process_name):
     Returns
     -------
     tuple
-        A tuple containing the logger object and the path to the log file.
+        A tuple containing the logger object (a ReportLogAdapter, to be closed
+        once the file is processed) and the path to the log file.
     """
     # Generate a timestamp in the format YYYYMMDD_HHMMSS_fff
     timestamp_frmt = timestamp.strftime("%Y%m%d_%H%M%S_%f")[
@@ -142,14 +165,8 @@ def configure_logging(file_name, timestamp, process_name):
     elif process_name == "recon_report_update":
         log_loc = rru_log
     log_file = os.path.join(log_loc, f"{process_name}_{timestamp_frmt}.log")
-    # Create a logger
-    logger = logging.getLogger(file_name)
-    logger.setLevel(logging.INFO)
-    # Create file handler with the log file
-    handler = logging.FileHandler(log_file)
-    handler.setLevel(logging.INFO)
-    # No formatting for plain text logs
-    logger.addHandler(handler)
+    # Create a logger routed to the log file
+    logger = get_report_logger(log_file)
     return logger, log_file
 
 
@@ -159,7 +176,7 @@ def log_output_data(logger, process, data=None, status="Success"):
 
     Parameters
     ----------
-    logger : logging.Logger
+    logger : logging.Logger or logging.LoggerAdapter
         The logger to use for logging the output data.
     process : str
         The name of the process, either 'recon_report_load' or 'recon_report_update'.
@@ -205,7 +222,9 @@ def log_output_data(logger, process, data=None, status="Success"):
 
 # Event Handler Class
 class NewFileHandler(FileSystemEventHandler):
-    def __init__(self, process_name, report_name_pattern):
+    def __init__(
+        self, process_name, report_name_pattern, dispatcher=None, coalescer=None
+    ):
         """
         Initialize a NewFileHandler object.
 
@@ -215,9 +234,46 @@ class NewFileHandler(FileSystemEventHandler):
             The name of the process, either 'recon_report_load' or 'recon_report_update'.
         report_name_pattern : str
             The regular expression pattern to match the file name of the report.
+        dispatcher : ReportDispatcher, optional
+            The dispatcher running the processing off the observer thread. If not
+            provided, files are processed on the observer thread.
+        coalescer : TriggerCoalescer, optional
+            The coalescer collapsing bursts of update triggers into single runs.
+            If provided, it takes precedence over the dispatcher.
+
+        Notes
+        -----
+        Files are only ingested once complete. With close_events set (the
+        inotify observer), a file is complete on its close-after-write event,
+        or on a rename into the folder. Otherwise, and for files moved in whole,
+        completeness is left to the stability_monitor. Without a monitor, files
+        are ingested on creation.
         """
         self.process_name = process_name
         self.report_name_pattern = report_name_pattern
+        self.dispatcher = dispatcher
+        self.coalescer = coalescer
+        self.stability_monitor = None
+        self.close_events = False
+        # Size and modification time of each file ingested and not processed yet
+        self.ingested = {}
+        self.ingested_lock = threading.Lock()
+
+    def matches(self, path):
+        """
+        Checks if a path is a file of this process in the monitoring location.
+
+        Parameters
+        ----------
+        path : str
+            The path reported by a watchdog event.
+
+        Returns
+        -------
+        bool
+            True if the file name matches the naming convention for this process.
+        """
+        return re.match(self.report_name_pattern, os.path.basename(path)) is not None
 
     def on_created(self, event):
         """
@@ -234,70 +290,340 @@ class NewFileHandler(FileSystemEventHandler):
 
         Notes
         -----
-        This function is called by the watchdog library when a new file is created
-        in the monitoring location. It checks if the file name matches the naming
-        convention for this process and logs the event. If the file name matches,
-        it calls the process_file function to process the file, and logs the
-        results. If an exception occurs during processing, it logs the error and
-        sends an error message to Slack.
+        The file may still be written to, so it is handed to the stability
+        monitor rather than ingested. With close events, the monitor only
+        completes files that were moved in whole, as files being written get a
+        modified event that cancels the watch.
         """
-        if event.is_directory:
+        if event.is_directory or not self.matches(event.src_path):
             return
-        file_name = os.path.basename(event.src_path)
+        if self.stability_monitor is None:
+            self.file_ready(event.src_path)
+        else:
+            self.stability_monitor.watch(event.src_path)
+
+    def on_modified(self, event):
+        """
+        Triggered when a file of the monitoring location is written to. With
+        close events, the file's close event is awaited instead of stability.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileModifiedEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if self.close_events and self.stability_monitor is not None:
+            self.stability_monitor.cancel(event.src_path)
+
+    def on_closed(self, event):
+        """
+        Triggered when a file of the monitoring location is closed after being
+        written to (inotify observer only). The file is complete.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileClosedEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if event.is_directory or not self.matches(event.src_path):
+            return
+        if self.stability_monitor is not None:
+            self.stability_monitor.cancel(event.src_path)
+        self.file_ready(event.src_path)
+
+    def on_moved(self, event):
+        """
+        Triggered when a file is renamed in the monitoring location. A file
+        renamed into a matching name is complete.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileMovedEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if event.is_directory or not self.matches(event.dest_path):
+            return
+        if self.stability_monitor is not None:
+            self.stability_monitor.cancel(event.src_path)
+            self.stability_monitor.cancel(event.dest_path)
+        self.file_ready(event.dest_path)
+
+    def file_ready(self, path):
+        """
+        Ingests a complete file matching the report name pattern, once. A file
+        reported complete again (e.g. by both a close event and a rename, or by
+        the stability fallback) with the same size and modification time is
+        skipped until it has been processed.
+
+        Parameters
+        ----------
+        path : str
+            The path of the complete file.
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        The file is handed to the dispatcher, in the lane of its vendor so the
+        reports of one vendor keep their order. A file the dispatcher rejects
+        is forgotten, so its next close, rename or stability event ingests it.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        file_name = os.path.basename(path)
+        with self.ingested_lock:
+            version = (stat.st_size, stat.st_mtime_ns)
+            if self.ingested.get(file_name) == version:
+                return
+            self.ingested[file_name] = version
+
+        if self.coalescer is not None:
+            self.coalescer.trigger(file_name)
+        elif self.dispatcher is None:
+            self.process_new_file(file_name)
+        elif not self.dispatcher.submit(
+            self.dispatch_lane(file_name), self.process_new_file, file_name
+        ):
+            # Left in the input folder, a later event for it is ingested again
+            self.forget(file_name)
+            self.log_rejected_file(file_name)
+
+    def log_rejected_file(self, file_name):
+        """
+        Logs a file the dispatcher rejected, because it was full (overflow
+        'reject') or shutting down. The file stays in the monitoring location.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the rejected file.
+
+        Returns
+        -------
+        None
+        """
+        logger, log_file = configure_logging(
+            file_name, datetime.now(), self.process_name
+        )
+        logger.warning(f"New file detected: {file_name}")
+        logger.warning(
+            "Rejected by the dispatcher, the file stays in the input folder "
+            f"until it is ingested again. {self.dispatcher.format_queue_depth()}"
+        )
+        logger.close()
+        print(f"Rejected {file_name}, see {log_file}")
+
+    def forget(self, file_name):
+        """
+        Forgets a processed file, so the same name can be ingested again. By
+        then the file has been archived, or left in place after an error.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the processed file.
+
+        Returns
+        -------
+        None
+        """
+        with self.ingested_lock:
+            self.ingested.pop(file_name, None)
+
+    def dispatch_lane(self, file_name):
+        """
+        Returns the dispatcher lane of a new file. Daily reports of one vendor
+        share a lane, so they are loaded one at a time and in order, while
+        different vendors load in parallel. All update triggers share the lane
+        of the process, so updates never overlap.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the new file.
+
+        Returns
+        -------
+        str
+            The lane of the file.
+        """
+        if self.process_name == "recon_report_load":
+            return file_name.split("_daily_report_")[0]
+        return self.process_name
+
+    def process_triggers(self, file_names):
+        """
+        Runs one update for a burst of trigger files collected by the coalescer.
+        The run is logged under the latest trigger.
+
+        Parameters
+        ----------
+        file_names : list
+            The names of the trigger files, oldest first.
+
+        Returns
+        -------
+        None
+        """
+        try:
+            self.process_new_file(file_names[-1], absorbed=len(file_names) - 1)
+        finally:
+            for file_name in file_names[:-1]:
+                self.forget(file_name)
+
+    def process_new_file(self, file_name, absorbed=0):
+        """
+        Processes a new file of the monitoring location.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the new file.
+        absorbed : int, optional
+            The number of earlier triggers coalesced into this run. Defaults to 0.
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        It logs the event and calls the process function for this process, and
+        logs the results. If an exception occurs during processing, it logs the
+        error and sends an error message to Slack.
+        """
         timestamp_base = datetime.now()
-        # Check if the file name matches the naming convention for this process
-        if re.match(self.report_name_pattern, file_name):
-            timestamp_frmt = timestamp_base.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            # Configure logging for the new file with dynamic process name
-            logger, log_file = configure_logging(
-                file_name, timestamp_base, self.process_name
+        timestamp_frmt = timestamp_base.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        # Configure logging for the new file with dynamic process name
+        logger, log_file = configure_logging(
+            file_name, timestamp_base, self.process_name
+        )
+        logger.info(f"New file detected: {file_name}")
+        if absorbed:
+            logger.info(f"Coalesced run, absorbed {absorbed} earlier trigger(s)")
+        run = start_run(self.process_name, file_name)
+        try:
+            # Call the process_file function and process the file
+            if self.process_name == "recon_report_load":
+                parsed_output = load_header_and_detail_to_sql(
+                    file_name, process_name=self.process_name
+                )
+            elif self.process_name == "recon_report_update":
+                print("Starting Recon Tables Update")
+                update_header_and_detail_tables()
+                parsed_output = None
+            log_output_data(
+                logger,
+                process=self.process_name,
+                data=parsed_output,
+                status="Success",
+            )
+            # Send a success message
+            send_slack_message(
+                processname=self.process_name,
+                filename=file_name,
+                timestamp=timestamp_frmt,
+                logfile_loc=log_file,
+                status="Success",
             )
-            logger.info(f"New file detected: {file_name}")
+
+        except Exception as e:
+            log_output_data(logger, process=self.process_name, status="Error")
+            logger.error(f"Error Details: {e}\n\n")
+            # Send an error message
+            send_slack_message(
+                processname=self.process_name,
+                filename=file_name,
+                timestamp=timestamp_frmt,
+                logfile_loc=log_file,
+                status="Error",
+                exception=e,
+            )
+        finally:
             try:
-                # Call the process_file function and process the file
-                if self.process_name == "recon_report_load":
-                    parsed_output = load_header_and_detail_to_sql(
-                        file_name, process_name=self.process_name
-                    )
-                elif self.process_name == "recon_report_update":
-                    print("Starting Recon Tables Update")
-                    update_header_and_detail_tables()
-                    parsed_output = None
-                log_output_data(
-                    logger,
-                    process=self.process_name,
-                    data=parsed_output,
-                    status="Success",
-                )
-                # Send a success message
-                send_slack_message(
-                    processname=self.process_name,
-                    filename=file_name,
-                    timestamp=timestamp_frmt,
-                    logfile_loc=log_file,
-                    status="Success",
-                )
+                finish_run(run)
+                logger.info(run.format_stages())
+            finally:
+                # Close the log file once the file is processed
+                logger.close()
+                self.forget(file_name)
 
-            except Exception as e:
-                log_output_data(logger, process=self.process_name, status="Error")
-                logger.error(f"Error Details: {e}\n\n")
-                # Send an error message
-                send_slack_message(
-                    processname=self.process_name,
-                    filename=file_name,
-                    timestamp=timestamp_frmt,
-                    logfile_loc=log_file,
-                    status="Error",
-                    exception=e,
-                )
+
+def catch_up_backlog(event_handler, monitoring_location):
+    """
+    Ingests the files that landed in the monitoring location while it was not
+    being monitored, through the same handler as live events.
+
+    Daily reports are handed over in date order, so the dispatcher loads each
+    vendor's backlog in order while vendors load in parallel. Update triggers
+    collapse into a single coalesced update. Files modified within the last
+    ingest_stability_seconds may still be written to and are left to the
+    stability monitor. Files already ingested and archived through a live
+    event in the meantime are skipped.
+
+    Parameters
+    ----------
+    event_handler : NewFileHandler
+        The handler of the monitoring location, with its stability monitor set.
+    monitoring_location : str
+        The path to the monitored folder.
+
+    Returns
+    -------
+    None
+    """
+    backlog = [
+        file_name
+        for file_name in os.listdir(monitoring_location)
+        if re.match(event_handler.report_name_pattern, file_name)
+    ]
+    if not backlog:
+        return
+    if event_handler.process_name == "recon_report_load":
+        backlog.sort(key=sort_by_date)
+    print(f"Catching up on {len(backlog)} file(s) in {monitoring_location}")
+
+    now = time.time()
+    for file_name in backlog:
+        path = os.path.join(monitoring_location, file_name)
+        try:
+            modified = os.path.getmtime(path)
+        except FileNotFoundError:
+            # Already picked up through a live event and archived
+            continue
+        if now - modified < ingest_stability_seconds:
+            event_handler.stability_monitor.watch(path)
+        else:
+            event_handler.file_ready(path)
 
 
 # Function to start monitoring the folder for a specific process
 def start_monitoring(monitoring_location, process_name, report_name_pattern):
     """
     Starts monitoring the specified folder for new files matching the given
-    report name pattern. Calls the process_file function when a new file is
-    detected.
+    report name pattern. Files already waiting in the folder are caught up
+    first. New files are ingested once complete, on their close event or once
+    their size is stable, and processed on a ReportDispatcher worker pool, so
+    the observer thread keeps receiving events during long loads. Update
+    triggers are coalesced first, so a burst of them runs one update. Slack
+    messages are posted by a background SlackNotifier. Stage timings of every
+    run go to its log and to the rolling run metrics.
 
     Parameters
     ----------
@@ -312,19 +638,42 @@ def start_monitoring(monitoring_location, process_name, report_name_pattern):
     -------
     None
     """
-    event_handler = NewFileHandler(process_name, report_name_pattern)
+    start_slack_notifier()
+    start_metrics_server()
+    dispatcher = ReportDispatcher()
+    coalescer = None
+    event_handler = NewFileHandler(process_name, report_name_pattern, dispatcher)
+    if process_name == "recon_report_update":
+        coalescer = TriggerCoalescer(event_handler.process_triggers)
+        event_handler.coalescer = coalescer
     observer = Observer()
+    event_handler.close_events = observer_emits_close_events(observer)
+    event_handler.stability_monitor = FileStabilityMonitor(event_handler.file_ready)
     observer.schedule(event_handler, monitoring_location, recursive=False)
     print(
         f"Monitoring started on folder: {monitoring_location} for process: {process_name}"
     )
     observer.start()
+    # Started after the observer, so no file falls between the scan and events;
+    # a file seen by both is ingested once
+    catch_up_backlog(event_handler, monitoring_location)
     try:
-        while True:
-            time.sleep(1)
+        # Events are handled on the observer thread, this only waits for Ctrl+C;
+        # a bounded join keeps it interruptible on Windows
+        while observer.is_alive():
+            observer.join(1)
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    event_handler.stability_monitor.stop()
+    if coalescer is not None:
+        coalescer.shutdown()
+    # Let the files already handed to the workers finish
+    print(f"Stopping dispatcher. {dispatcher.format_queue_depth()}")
+    dispatcher.shutdown()
+    stop_slack_notifier()
+    stop_report_logging()
+    stop_metrics_server()
 
 
 def reset_and_monitor_rrl():
@@ -335,7 +684,7 @@ def reset_and_monitor_rrl():
     automation staging area, deletes all messages from the Recon Report Load
     channel, cleans up the automation locations for the process, resets the
     Recon Report Load SQL tables and starts monitoring the folder for new
-    reports.
+    reports. Use monitor_rrl to resume monitoring without the reset.
 
     Parameters
     ----------
@@ -345,7 +694,7 @@ def reset_and_monitor_rrl():
     -------
     None
     """
-    global rrl_input, recon_report_load_channel_id, recon_load_trigger
+    global recon_report_load_channel_id
     print("Clearing Reports from Automation Staging, Copying again from Source")
     copy_reports_to_automation()
     print("Done")
@@ -358,6 +707,25 @@ def reset_and_monitor_rrl():
     print("Resetting Recon Report Load SQL Tables")
     reset_process_sql_tables()
     print("Done")
+    monitor_rrl()
+
+
+def monitor_rrl():
+    """
+    Starts monitoring the recon_report_load process without resetting it.
+
+    The reports left in the input folder while the process was down are
+    caught up before new ones, and the SQL tables, archive and logs are kept.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    global rrl_input, recon_load_trigger
     print("Starting Recon Report Load Monitoring")
     start_monitoring(
         rrl_input,
@@ -366,7 +734,7 @@ def reset_and_monitor_rrl():
     )
 
 
-def reset_and_process_rrl():
+def reset_and_process_rrl(workers=None):
     """
     Resets and processes the recon_report_load process.
 
@@ -377,7 +745,9 @@ def reset_and_process_rrl():
 
     Parameters
     ----------
-    None
+    workers : int, optional
+        The number of parser processes used for the load. Defaults to the
+        backfill_workers config value.
 
     Returns
     -------
@@ -393,8 +763,8 @@ def reset_and_process_rrl():
     print("Resetting Recon Report Load SQL Tables")
     reset_process_sql_tables()
     print("Done")
-    print("Auto Sequentially Loading Reports to SQL Tables")
-    auto_load_to_sql_tables(process_name="recon_report_load")
+    print("Auto Loading Reports to SQL Tables")
+    auto_load_to_sql_tables(process_name="recon_report_load", workers=workers)
     print("Done")
 
 
@@ -404,7 +774,9 @@ def reset_and_monitor_rru():
 
     This function deletes all messages from the Recon Report Update channel, cleans up the
     automation locations for the process and starts monitoring the specified folder for
-    new files matching the given report name pattern.
+    new files matching the given report name pattern. If drop_off_indexer_enabled is
+    set, the drop-off indexer runs alongside the monitoring. Use monitor_rru to
+    resume monitoring without the reset.
 
     Parameters
     ----------
@@ -415,16 +787,42 @@ def reset_and_monitor_rru():
     None
     """
 
-    global rru_input, recon_report_update_channel_id, recon_update_trigger
+    global recon_report_update_channel_id
     print("Deleting Messages from Recon Report Update Channel")
     delete_all_messages(recon_report_update_channel_id)
     print("Done")
     print("Cleaning up Automation Locs")
     cleanup_automation_locs(process_name="recon_report_update")
     print("Done")
+    monitor_rru()
+
+
+def monitor_rru():
+    """
+    Starts monitoring the recon_report_update process without resetting it.
+
+    Trigger files left in the input folder while the process was down are
+    caught up into one update. If drop_off_indexer_enabled is set, the
+    drop-off indexer runs alongside the monitoring.
+
+    Parameters
+    ----------
+    None
+
+    Returns
+    -------
+    None
+    """
+    global rru_input, recon_update_trigger
+    if drop_off_indexer_enabled:
+        print("Starting Drop-off Indexer")
+        start_drop_off_indexer()
     print("Starting Recon Report Update Monitoring")
-    start_monitoring(
-        rru_input,
-        process_name="recon_report_update",
-        report_name_pattern=recon_update_trigger,
-    )
+    try:
+        start_monitoring(
+            rru_input,
+            process_name="recon_report_update",
+            report_name_pattern=recon_update_trigger,
+        )
+    finally:
+        stop_drop_off_indexer()
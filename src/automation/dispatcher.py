@@ -0,0 +1,188 @@
+import threading
+import traceback
+from collections import deque
+from config import dispatcher_workers, dispatcher_max_pending, dispatcher_overflow
+
+OVERFLOW_POLICIES = ("block", "reject")
+
+
+class ReportDispatcher:
+    def __init__(self, workers=None, max_pending=None, overflow=None):
+        """
+        Initialize a ReportDispatcher object.
+
+        The dispatcher runs submitted jobs on a fixed pool of worker threads.
+        Jobs are grouped into lanes (one per vendor): jobs of the same lane run
+        one at a time in submission order, jobs of different lanes run in
+        parallel. At most max_pending jobs can be queued or running; what
+        happens past that is set by the overflow policy.
+
+        Parameters
+        ----------
+        workers : int, optional
+            The number of worker threads. Defaults to dispatcher_workers.
+        max_pending : int, optional
+            The maximum number of queued and running jobs. Defaults to
+            dispatcher_max_pending.
+        overflow : str, optional
+            'block' makes submit wait for room, 'reject' makes it return False
+            right away. Defaults to dispatcher_overflow.
+        """
+        self.workers = workers or dispatcher_workers
+        self.max_pending = max_pending or dispatcher_max_pending
+        self.overflow = overflow or dispatcher_overflow
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown dispatcher overflow policy: {self.overflow}")
+
+        self.condition = threading.Condition()
+        self.lanes = {}
+        self.ready_lanes = deque()
+        self.running_lanes = set()
+        self.pending = 0
+        # The queue depth is printed when it moved by a tenth of max_pending
+        self.reported_pending = 0
+        self.report_step = max(1, self.max_pending // 10)
+        self.stopping = False
+        self.threads = [
+            threading.Thread(
+                target=self.run_worker, name=f"dispatcher_{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, lane, function, *args):
+        """
+        Queues a job in a lane.
+
+        Parameters
+        ----------
+        lane : str
+            The lane of the job, e.g. the vendor of a report.
+        function : callable
+            The job to run.
+        *args
+            The arguments of the job.
+
+        Returns
+        -------
+        bool
+            True if the job was queued, False if it was rejected because the
+            dispatcher is full (overflow 'reject') or shutting down.
+        """
+        with self.condition:
+            while self.pending >= self.max_pending and not self.stopping:
+                if self.overflow == "reject":
+                    # The caller reports the rejected job
+                    return False
+                self.condition.wait()
+            if self.stopping:
+                return False
+
+            lane_jobs = self.lanes.setdefault(lane, deque())
+            lane_jobs.append((function, args))
+            self.pending += 1
+            # A lane is scheduled once; its worker picks up the rest in order
+            if len(lane_jobs) == 1 and lane not in self.running_lanes:
+                self.ready_lanes.append(lane)
+            self.condition.notify_all()
+            self.report_queue_depth()
+        return True
+
+    def run_worker(self):
+        """
+        Runs jobs from the ready lanes until the dispatcher is shut down and
+        every queued job is done.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            with self.condition:
+                while not self.ready_lanes and not (
+                    self.stopping and self.pending == 0
+                ):
+                    self.condition.wait()
+                if not self.ready_lanes:
+                    return
+                lane = self.ready_lanes.popleft()
+                self.running_lanes.add(lane)
+                function, args = self.lanes[lane].popleft()
+
+            try:
+                function(*args)
+            except Exception:
+                # Jobs report their own errors, this only keeps the worker alive
+                traceback.print_exc()
+
+            with self.condition:
+                self.running_lanes.discard(lane)
+                self.pending -= 1
+                if self.lanes[lane]:
+                    self.ready_lanes.append(lane)
+                else:
+                    del self.lanes[lane]
+                self.condition.notify_all()
+                self.report_queue_depth()
+
+    def queue_depth(self):
+        """
+        Returns the current queue depth of the dispatcher.
+
+        Returns
+        -------
+        dict
+            A dictionary with the number of "Pending" jobs (queued and
+            running), the number of "Running" jobs, and the number of queued
+            jobs per lane under "Lanes".
+        """
+        with self.condition:
+            return {
+                "Pending": self.pending,
+                "Running": len(self.running_lanes),
+                "Lanes": {lane: len(jobs) for lane, jobs in self.lanes.items()},
+            }
+
+    def report_queue_depth(self):
+        """
+        Prints the queue depth if it moved by at least report_step jobs since
+        it was last printed, or the queue drained. Must be called with the
+        condition held.
+
+        Returns
+        -------
+        None
+        """
+        moved = abs(self.pending - self.reported_pending)
+        if moved >= self.report_step or (moved and self.pending == 0):
+            self.reported_pending = self.pending
+            print(f"Dispatcher queue depth. {self.format_queue_depth()}")
+
+    def format_queue_depth(self):
+        """Returns the queue depth as a short printable string."""
+        return (
+            f"Pending: {self.pending}/{self.max_pending}, "
+            f"Running: {len(self.running_lanes)}/{self.workers}"
+        )
+
+    def shutdown(self, wait=True):
+        """
+        Stops accepting jobs and lets the workers finish the queued ones.
+
+        Parameters
+        ----------
+        wait : bool, optional
+            Wait for the queued jobs to finish. Defaults to True.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
@@ -0,0 +1,391 @@
+import os
+import time
+import threading
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from utils import (
+    get_directory_snapshot,
+    save_directory_snapshot,
+    settled_mtime_ns,
+    vendor_drop_off_directories,
+)
+from config import (
+    charts_drop_off_location,
+    drop_off_layout,
+    active_vendor_list,
+    drop_off_indexer_checkpoint_seconds,
+    drop_off_indexer_quiet_seconds,
+)
+
+# The indexer running in this process, if any
+_running_indexer = None
+
+
+class DropOffIndexer(FileSystemEventHandler):
+    def __init__(self, vendors=None):
+        """
+        Initialize a DropOffIndexer object.
+
+        The indexer keeps an in-memory set of the chart names present in each
+        drop-off directory of the vendors (one per vendor in the flat layout,
+        one per shard in the sharded layout), updated from watchdog create,
+        delete and move events and checkpointed to the drop-off snapshot index.
+
+        Parameters
+        ----------
+        vendors : list, optional
+            The vendors to index. Defaults to the active_vendor_list config value.
+        """
+        self.vendors = list(vendors or active_vendor_list)
+        self.lock = threading.Lock()
+        self.charts = {}
+        self.vendor_directories = {vendor: set() for vendor in self.vendors}
+        self.pending_events = []
+        self.seeded = False
+        self.last_event = {}
+        self.dirty = set()
+        self.observer = None
+        self.stop_event = threading.Event()
+        self.checkpoint_thread = None
+
+    def vendor_location(self, vendor):
+        """
+        Returns the drop-off directory of a vendor.
+
+        Parameters
+        ----------
+        vendor : str
+            The name of the vendor.
+
+        Returns
+        -------
+        str
+            The path of the vendor's drop-off directory.
+        """
+        return os.path.join(charts_drop_off_location, vendor)
+
+    def locate(self, path):
+        """
+        Finds the vendor, directory and chart name a path in the drop-off
+        location belongs to.
+
+        Parameters
+        ----------
+        path : str
+            The path reported by a watchdog event.
+
+        Returns
+        -------
+        tuple or None
+            The vendor, the directory holding the chart and the chart name, or
+            None if the path is not a chart of an indexed vendor.
+        """
+        relative = os.path.relpath(path, charts_drop_off_location)
+        parts = relative.split(os.sep)
+        expected_depth = 3 if drop_off_layout == "sharded" else 2
+        if len(parts) != expected_depth or parts[0] not in self.vendor_directories:
+            return None
+        vendor, name = parts[0], parts[-1]
+        if name == f"{vendor}_left_charts.txt":
+            return None
+        return vendor, os.path.dirname(path), name
+
+    def apply(self, action, path):
+        """
+        Applies one add or discard to the membership sets, or buffers it while
+        the sets are still being seeded. Must be called with the lock held.
+
+        Parameters
+        ----------
+        action : str
+            Either 'add' or 'discard'.
+        path : str
+            The path reported by a watchdog event.
+
+        Returns
+        -------
+        None
+        """
+        located = self.locate(path)
+        if located is None:
+            return
+        if not self.seeded:
+            self.pending_events.append((action, path))
+            return
+        vendor, directory, name = located
+        if directory not in self.charts:
+            # A shard directory created after seeding
+            self.charts[directory] = set()
+            self.vendor_directories[vendor].add(directory)
+        if action == "add":
+            self.charts[directory].add(name)
+        else:
+            self.charts[directory].discard(name)
+        self.last_event[directory] = time.monotonic()
+        self.dirty.add(directory)
+
+    def on_created(self, event):
+        """
+        Triggered when a chart file is created in a watched drop-off directory.
+        Adds the chart to its vendor's set.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if event.is_directory:
+            return
+        with self.lock:
+            self.apply("add", event.src_path)
+
+    def on_deleted(self, event):
+        """
+        Triggered when a chart file is deleted in a watched drop-off directory.
+        Removes the chart from its vendor's set.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileSystemEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if event.is_directory:
+            return
+        with self.lock:
+            self.apply("discard", event.src_path)
+
+    def on_moved(self, event):
+        """
+        Triggered when a chart file is moved or renamed in a watched drop-off
+        directory. Removes the source and adds the destination chart.
+
+        Parameters
+        ----------
+        event : watchdog.events.FileMovedEvent
+            The event object containing information about the file.
+
+        Returns
+        -------
+        None
+        """
+        if event.is_directory:
+            return
+        with self.lock:
+            self.apply("discard", event.src_path)
+            self.apply("add", event.dest_path)
+
+    def seed(self):
+        """
+        Seeds the membership sets from the drop-off snapshot index and replays
+        the events buffered since the observer started.
+
+        Returns
+        -------
+        None
+        """
+        charts = {}
+        for vendor in self.vendors:
+            left_charts_file = f"{vendor}_left_charts.txt"
+            for directory in vendor_drop_off_directories(vendor):
+                entries = get_directory_snapshot(directory)
+                charts[directory] = set(entries) - {left_charts_file}
+                self.vendor_directories[vendor].add(directory)
+        with self.lock:
+            self.charts = charts
+            self.seeded = True
+            for action, path in self.pending_events:
+                self.apply(action, path)
+            self.pending_events = []
+
+    def checkpoint(self, force=False):
+        """
+        Persists the membership set of every changed directory to the drop-off
+        snapshot index.
+
+        A directory is only checkpointed once no event has arrived for it for
+        drop_off_indexer_quiet_seconds, so the directory modification time
+        saved with the set does not run ahead of events still in flight. The
+        modification time is read before the set is collected, and a directory
+        that changed meanwhile, or within drop_off_mtime_tick_seconds of now,
+        stays dirty for the next checkpoint.
+
+        Parameters
+        ----------
+        force : bool, optional
+            Checkpoint changed directories even if they are not quiet. Defaults
+            to False.
+
+        Returns
+        -------
+        None
+        """
+        now = time.monotonic()
+        drop_off_root = os.path.normpath(charts_drop_off_location)
+        for directory in list(self.dirty):
+            with self.lock:
+                idle_seconds = now - self.last_event[directory]
+                if not force and idle_seconds < drop_off_indexer_quiet_seconds:
+                    continue
+                self.dirty.discard(directory)
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            with self.lock:
+                entries = set(self.charts[directory])
+            if os.path.dirname(directory) == drop_off_root:
+                # A flat vendor directory also holds the vendor's left charts file
+                left_charts_file = f"{os.path.basename(directory)}_left_charts.txt"
+                if os.path.exists(os.path.join(directory, left_charts_file)):
+                    entries.add(left_charts_file)
+            changed = os.stat(directory).st_mtime_ns != mtime_ns
+            if changed or (not force and settled_mtime_ns(mtime_ns) is None):
+                # Changed while collecting, or too recently for the modification
+                # time to vouch for the set; retried at the next checkpoint
+                with self.lock:
+                    self.dirty.add(directory)
+                continue
+            snapshot = {"MtimeNs": settled_mtime_ns(mtime_ns), "Entries": entries}
+            save_directory_snapshot(directory, snapshot)
+
+    def run_checkpoints(self):
+        """
+        Checkpoints every drop_off_indexer_checkpoint_seconds until stopped.
+
+        Returns
+        -------
+        None
+        """
+        while not self.stop_event.wait(drop_off_indexer_checkpoint_seconds):
+            self.checkpoint()
+
+    def start(self):
+        """
+        Starts watching the vendor drop-off directories (recursively in the
+        sharded layout), seeds the membership sets and starts the periodic
+        checkpoint thread.
+
+        The observer is started before seeding, so no change made while the
+        sets are being seeded is missed.
+
+        Returns
+        -------
+        None
+        """
+        self.observer = Observer()
+        recursive = drop_off_layout == "sharded"
+        for vendor in self.vendors:
+            location = self.vendor_location(vendor)
+            self.observer.schedule(self, location, recursive=recursive)
+        self.observer.start()
+        self.seed()
+        self.checkpoint_thread = threading.Thread(
+            target=self.run_checkpoints, name="drop_off_indexer", daemon=True
+        )
+        self.checkpoint_thread.start()
+        print(f"Drop-off indexer started for vendors: {', '.join(self.vendors)}")
+
+    def stop(self):
+        """
+        Stops watching and writes a final checkpoint.
+
+        Returns
+        -------
+        None
+        """
+        self.stop_event.set()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+        if self.checkpoint_thread is not None:
+            self.checkpoint_thread.join()
+        self.checkpoint(force=True)
+        print("Drop-off indexer stopped")
+
+    def get_charts(self, vendor):
+        """
+        Returns a copy of the live membership set of a vendor across its
+        drop-off directories, taken under the lock so it can be iterated while
+        events keep arriving.
+
+        Parameters
+        ----------
+        vendor : str
+            The name of the vendor.
+
+        Returns
+        -------
+        set or None
+            The chart names present in the vendor's drop-off directory, or None
+            if the vendor is not indexed or the sets are not seeded yet.
+        """
+        with self.lock:
+            if not self.seeded or vendor not in self.vendor_directories:
+                return None
+            charts = set()
+            for directory in self.vendor_directories[vendor]:
+                charts.update(self.charts[directory])
+            return charts
+
+
+def start_drop_off_indexer(vendors=None):
+    """
+    Starts the drop-off indexer of this process if it is not running yet.
+
+    Parameters
+    ----------
+    vendors : list, optional
+        The vendors to index. Defaults to the active_vendor_list config value.
+
+    Returns
+    -------
+    DropOffIndexer
+        The running indexer.
+    """
+    global _running_indexer
+    if _running_indexer is None:
+        _running_indexer = DropOffIndexer(vendors)
+        _running_indexer.start()
+    return _running_indexer
+
+
+def stop_drop_off_indexer():
+    """
+    Stops the drop-off indexer of this process, if one is running.
+
+    Returns
+    -------
+    None
+    """
+    global _running_indexer
+    if _running_indexer is not None:
+        _running_indexer.stop()
+        _running_indexer = None
+
+
+def get_live_drop_off_charts(vendor):
+    """
+    Returns the live membership set of a vendor from the running indexer.
+
+    Parameters
+    ----------
+    vendor : str
+        The name of the vendor.
+
+    Returns
+    -------
+    set or None
+        The chart names present in the vendor's drop-off directory, or None if
+        no indexer is running for the vendor.
+    """
+    if _running_indexer is None:
+        return None
+    return _running_indexer.get_charts(vendor)
@@ -0,0 +1,154 @@
+import os
+import time
+import threading
+import traceback
+from config import ingest_stability_seconds
+
+
+def observer_emits_close_events(observer):
+    """
+    Tells whether a watchdog observer reports close-after-write events.
+
+    Only the inotify observer (Linux) does; the Windows, FSEvents, kqueue and
+    polling observers report creations and modifications only.
+
+    Parameters
+    ----------
+    observer : watchdog.observers.api.BaseObserver
+        The observer to check.
+
+    Returns
+    -------
+    bool
+        True if the observer emits FileClosedEvent on close after write.
+    """
+    # The inotify module only imports on Linux, so compare the class name
+    return type(observer).__name__ == "InotifyObserver"
+
+
+class FileStabilityMonitor:
+    def __init__(self, on_stable, interval_seconds=None):
+        """
+        Initialize a FileStabilityMonitor object.
+
+        The monitor is the completeness check for files that get no close
+        event: a watched file is considered complete once its size and
+        modification time have not changed over one interval. The monitor
+        thread only wakes up while files are being watched.
+
+        Parameters
+        ----------
+        on_stable : callable
+            Called with the path of each file once it is stable.
+        interval_seconds : float, optional
+            The interval the size and modification time must stay unchanged
+            for. Defaults to ingest_stability_seconds.
+        """
+        self.on_stable = on_stable
+        if interval_seconds is None:
+            interval_seconds = ingest_stability_seconds
+        self.interval_seconds = interval_seconds
+        self.condition = threading.Condition()
+        self.watched = {}
+        self.stopping = False
+        self.thread = threading.Thread(
+            target=self.run, name="file_stability", daemon=True
+        )
+        self.thread.start()
+
+    def watch(self, path):
+        """
+        Starts watching a file until it is stable.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            self.watched[path] = None
+            self.condition.notify_all()
+
+    def cancel(self, path):
+        """
+        Stops watching a file, e.g. because its close event arrived.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            self.watched.pop(path, None)
+
+    def check(self):
+        """
+        Stats every watched file and returns the ones whose size and
+        modification time have not changed for at least one interval. Files
+        that disappeared are dropped. Must be called with the condition held.
+
+        Returns
+        -------
+        list
+            The paths of the stable files.
+        """
+        now = time.monotonic()
+        stable = []
+        for path, previous in list(self.watched.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self.watched[path]
+                continue
+            current = (stat.st_size, stat.st_mtime_ns)
+            if previous is None or previous[0] != current:
+                # Changed since the last check, the interval starts over
+                self.watched[path] = (current, now)
+            elif now - previous[1] >= self.interval_seconds:
+                del self.watched[path]
+                stable.append(path)
+        return stable
+
+    def run(self):
+        """
+        Checks the watched files every interval while there are any.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            with self.condition:
+                while not self.watched and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                stable = self.check()
+                if self.watched:
+                    self.condition.wait(self.interval_seconds)
+            for path in stable:
+                try:
+                    self.on_stable(path)
+                except Exception:
+                    traceback.print_exc()
+
+    def stop(self):
+        """
+        Stops the monitor thread. Files still being watched are dropped.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join()
@@ -1,10 +1,20 @@
 import os
 import shutil
-import pyodbc
 import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from datetime import datetime
-from utils import loc_variable_fetch, clear_folder
-from config import conn_str
+from utils import (
+    loc_variable_fetch,
+    clear_folder,
+    bulk_insert,
+    get_connection,
+    reset_chart_journal,
+)
+from config import backfill_workers
+from .run_metrics import measure_stage
 
 
 # Function to convert to SQL Server datetime format (UTC)
@@ -25,15 +35,61 @@ def to_sql_server_format(date_str):
     return datetime.strptime(date_str, "%Y%m%dT%H%M%SZ").strftime("%Y-%m-%d %H:%M:%S")
 
 
-def parse_reports(current_file):
+# Report line patterns, compiled once for the line-by-line parser
+file_count_pattern = re.compile(r"Charts Delivered:\s+(\d+)")
+first_delivery_pattern = re.compile(r"First Chart Delivered at:\s+(\d+T\d+Z)")
+last_delivery_pattern = re.compile(r"Last Chart Delivered at:\s+(\d+T\d+Z)")
+chart_pattern = re.compile(r"\d+T\d+Z_\w+\.json")
+
+
+def iter_report_charts(file_path, header):
     """
-    Parses a given report file to extract relevant data including report name, 
-    date, vendor, file count, first and last delivery times, and chart details.
+    Reads a report file lazily, line by line, filling in the header fields as
+    they are found and yielding every chart name (duplicates included).
 
     Parameters
     ----------
-    current_file : str
-        The name of the report file to be parsed.
+    file_path : str
+        The full path of the report file.
+    header : dict
+        A dictionary that receives the raw "FileCount", "FirstDelivery" and
+        "LastDelivery" values once the matching lines have been read.
+
+    Yields
+    ------
+    str
+        The chart names in the order they appear in the report.
+    """
+    header_patterns = {
+        "FileCount": file_count_pattern,
+        "FirstDelivery": first_delivery_pattern,
+        "LastDelivery": last_delivery_pattern,
+    }
+    with open(file_path, "r") as file:
+        for line in file:
+            # Header lines come first, stop looking once all of them are found
+            if header_patterns:
+                for field, pattern in list(header_patterns.items()):
+                    match = pattern.search(line)
+                    if match:
+                        header[field] = match.group(1)
+                        del header_patterns[field]
+            yield from chart_pattern.findall(line)
+
+
+def parse_report_file(file_path):
+    """
+    Parses a report file in a single streaming pass to extract the report
+    name, date, vendor, file count, first and last delivery times, and the
+    unique chart names.
+
+    Only the set of unique chart names is held in memory, so peak memory
+    depends on the number of distinct charts rather than on the file size.
+
+    Parameters
+    ----------
+    file_path : str
+        The full path of the report file to be parsed.
 
     Returns
     -------
@@ -45,17 +101,12 @@ def parse_reports(current_file):
         - "FileCount": int, the total number of charts delivered as mentioned in the report.
         - "FirstDelivery": str, the first chart delivery timestamp in SQL Server format.
         - "LastDelivery": str, the last chart delivery timestamp in SQL Server format.
-        - "ChartListWithDupes": list, list of chart names with potential duplicates.
+        - "ChartCountWithDupes": int, the number of chart names listed, duplicates included.
         - "ChartList": list, list of unique chart names.
         - "UniqueCount": int, the count of unique charts delivered.
     """
-    input_loc = loc_variable_fetch("recon_report_load")[1]
-    file_path = os.path.join(input_loc, current_file)
-    # Read the file content
-    with open(file_path, "r") as file:
-        data = file.read()
     # Extract ReportName
-    report_name = current_file
+    report_name = os.path.basename(file_path)
     # Extract ReportFileDate
     report_file_date = re.search(r"_([^_]+)\.txt$", report_name).group(1)
     report_file_date_sql_format = datetime.strptime(
@@ -63,57 +114,77 @@ def parse_reports(current_file):
     ).strftime("%Y-%m-%d")
     # Extract Vendor
     vendor = report_name.split("_")[0]
-    # Extract FileCount
-    file_count = int(re.search(r"Charts Delivered:\s+(\d+)", data).group(1))
-    # Extract FirstDelivery
-    first_delivery = re.search(r"First Chart Delivered at:\s+(\d+T\d+Z)", data).group(1)
-    first_delivery_sql_format = to_sql_server_format(first_delivery)
-    # Extract LastDelivery
-    last_delivery = re.search(r"Last Chart Delivered at:\s+(\d+T\d+Z)", data).group(1)
-    last_delivery_sql_format = to_sql_server_format(last_delivery)
-    # Extract chartlist
-    chartlist_with_dupes = re.findall(r"\d+T\d+Z_\w+\.json", data)
-    chartlist = list(set(chartlist_with_dupes))
-    # Get UniqueCount
-    unique_count = len(chartlist)
+    # Extract header fields and chartlist in one pass
+    header = {}
+    unique_charts = set()
+    chart_count_with_dupes = 0
+    for chart in iter_report_charts(file_path, header):
+        unique_charts.add(chart)
+        chart_count_with_dupes += 1
+    for field in ("FileCount", "FirstDelivery", "LastDelivery"):
+        if field not in header:
+            raise ValueError(f"{field} not found in report {report_name}")
+    chartlist = list(unique_charts)
 
     # Output
     output = {
         "ReportFileDate": report_file_date_sql_format,
         "ReportName": report_name,
         "Vendor": vendor,
-        "FileCount": file_count,
-        "FirstDelivery": first_delivery_sql_format,
-        "LastDelivery": last_delivery_sql_format,
-        "ChartListWithDupes": chartlist_with_dupes,
+        "FileCount": int(header["FileCount"]),
+        "FirstDelivery": to_sql_server_format(header["FirstDelivery"]),
+        "LastDelivery": to_sql_server_format(header["LastDelivery"]),
+        "ChartCountWithDupes": chart_count_with_dupes,
         "ChartList": chartlist,
-        "UniqueCount": unique_count,
+        "UniqueCount": len(chartlist),
     }
 
     return output
 
 
-def header_sql_push(output):
+def parse_reports(current_file):
     """
-    Inserts the report header data into the SQL Server `report_recon_header` table.
+    Parses a given report file from the process input location.
 
     Parameters
     ----------
-    output : dict
-        A dictionary containing the report header data.
+    current_file : str
+        The name of the report file to be parsed.
+
+    Returns
+    -------
+    dict
+        The parsed report data, see parse_report_file.
     """
+    input_loc = loc_variable_fetch("recon_report_load")[1]
+    file_path = os.path.join(input_loc, current_file)
+    return parse_report_file(file_path)
 
-    global conn_str
-    # Connect to SQL Server
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
 
+def insert_header(cursor, output):
+    """
+    Inserts the report header row and returns its identity, read back from the
+    OUTPUT clause of the same INSERT statement.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    output : dict
+        A dictionary containing the report header data.
+
+    Returns
+    -------
+    int
+        The id of the inserted `report_recon_header` row.
+    """
     # Define the SQL INSERT query
     insert_query = """
         INSERT INTO common.report_recon_header (
             report_push_date, report_file_date, report_name, vendor, file_count, 
             unique_count, first_delivery, last_delivery
         )
+        OUTPUT INSERTED.id
         VALUES (CONVERT(date, GETUTCDATE()), ?, ?, ?, ?, ?, ?, ?)
     """
 
@@ -130,14 +201,66 @@ def header_sql_push(output):
 
     # Execute the insert query
     cursor.execute(insert_query, data_to_insert)
-    # Commit the transaction
-    conn.commit()
-    # Close the connection
-    cursor.close()
-    conn.close()
+    return cursor.fetchone()[0]
 
 
-def detail_sql_push(output):
+def insert_detail(cursor, output, header_id):
+    """
+    Bulk inserts the unique charts of a report into the `report_recon_detail` table.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    output : dict
+        A dictionary containing the report detail data.
+    header_id : int
+        The id of the parent `report_recon_header` row.
+
+    Returns
+    -------
+    dict
+        The bulk insert stats: strategy used, row count, seconds and rows/sec.
+    """
+    rows = [(header_id, chart, output["ReportName"]) for chart in output["ChartList"]]
+    return bulk_insert(
+        cursor,
+        "common.report_recon_detail",
+        ["header_id", "chart_name", "report_name"],
+        rows,
+        sql_defaults={
+            "insert_datetime": "GETUTCDATE()",
+            "update_datetime": "GETUTCDATE()",
+        },
+    )
+
+
+def header_sql_push(output):
+    """
+    Inserts the report header data into the SQL Server `report_recon_header` table.
+
+    Parameters
+    ----------
+    output : dict
+        A dictionary containing the report header data.
+
+    Returns
+    -------
+    int
+        The id of the inserted header row.
+    """
+
+    # Check out a pooled connection to SQL Server
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        header_id = insert_header(cursor, output)
+        # Commit the transaction
+        conn.commit()
+        cursor.close()
+    return header_id
+
+
+def detail_sql_push(output, header_id=None):
     """
     Inserts the report detail data into the SQL Server `report_recon_detail` table.
 
@@ -145,42 +268,73 @@ def detail_sql_push(output):
     ----------
     output : dict
         A dictionary containing the report detail data.
+    header_id : int, optional
+        The id of the parent header row. If not provided, the last inserted
+        header row is used.
+
+    Returns
+    -------
+    dict
+        The bulk insert stats: strategy used, row count, seconds and rows/sec.
     """
     
-    global conn_str
+    # Check out a pooled connection to SQL Server
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    # Connect to SQL Server
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
+        if header_id is None:
+            # Retrieve the last inserted header ID from the `report_recon_header` table
+            cursor.execute(
+                "SELECT TOP 1 id FROM common.report_recon_header ORDER BY id DESC"
+            )
+            header_id = cursor.fetchone()[0]
 
-    # Step 1: Retrieve the last inserted header ID from the `report_recon_header` table
-    cursor.execute("SELECT TOP 1 id FROM common.report_recon_header ORDER BY id DESC")
-    header_id = cursor.fetchone()[0]  # Get the last inserted header ID
+        load_stats = insert_detail(cursor, output, header_id)
 
-    # Step 2: Insert each chart from the chartlist into the `report_recon_detail` table
-    insert_query = """
-        INSERT INTO common.report_recon_detail (
-            header_id, chart_name, insert_datetime, update_datetime, report_name
-        )
-        VALUES (?, ?, GETUTCDATE(), GETUTCDATE(), ?)
-    """
+        # Commit the transaction
+        conn.commit()
+        cursor.close()
+    return load_stats
 
-    # Step 3: Loop through the chartlist and insert each chart
-    for chart in output["ChartList"]:
-        data_to_insert = (
-            header_id,  # header_id (from the header table)
-            chart,  # chart_name (from the chartlist)
-            output["ReportName"],  # report_name (same as in the header)
-        )
 
-        cursor.execute(insert_query, data_to_insert)
+def header_and_detail_sql_push(output):
+    """
+    Inserts the report header and all of its detail rows in a single
+    transaction, so a report is either fully loaded or not at all and
+    several reports can be loaded at the same time.
 
-    # Commit the transaction
-    conn.commit()
+    Parameters
+    ----------
+    output : dict
+        A dictionary containing the parsed report data.
 
-    # Close the connection
-    cursor.close()
-    conn.close()
+    Returns
+    -------
+    dict
+        A dictionary with the new "HeaderId", the "HeaderSeconds" and
+        "CommitSeconds" spent, and the "DetailStats" of the bulk insert.
+    """
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        with measure_stage("header_sql_push") as header_stage:
+            header_id = insert_header(cursor, output)
+            header_stage["Rows"] = 1
+
+        with measure_stage("detail_sql_push") as stage:
+            detail_stats = insert_detail(cursor, output, header_id)
+            stage["Rows"] = detail_stats["Rows"]
+
+        with measure_stage("commit") as commit_stage:
+            conn.commit()
+        cursor.close()
+
+    return {
+        "HeaderId": header_id,
+        "HeaderSeconds": header_stage["Seconds"],
+        "CommitSeconds": commit_stage["Seconds"],
+        "DetailStats": detail_stats,
+    }
 
 
 def sort_by_date(filename):
@@ -201,24 +355,150 @@ def load_header_and_detail_to_sql(file, process_name):
         The name of the process, either 'recon_report_load' or 'recon_report_update'.
     """
     
-    parsed_output = parse_reports(file)
-    header_sql_push(parsed_output)
-    detail_sql_push(parsed_output)
+    with measure_stage("parse_reports") as stage:
+        parsed_output = parse_reports(file)
+        stage["Rows"] = parsed_output["ChartCountWithDupes"]
+    header_and_detail_sql_push(parsed_output)
     # Moving File from Input to Input archive
     input_loc = loc_variable_fetch(process_name)[1]
     input_archive_loc = loc_variable_fetch(process_name)[2]
-    shutil.move(os.path.join(input_loc, file), input_archive_loc)
+    with measure_stage("archive_move"):
+        shutil.move(os.path.join(input_loc, file), input_archive_loc)
     return parsed_output
 
 
-def auto_load_to_sql_tables(process_name):
+def timed_parse_report_file(file_path):
+    """
+    Parses a report file and measures how long the parse took. Used as the
+    process pool task of the backfill mode.
+
+    Parameters
+    ----------
+    file_path : str
+        The full path of the report file to be parsed.
+
+    Returns
+    -------
+    tuple
+        The parsed report data and the parse duration in seconds.
+    """
+    start = time.perf_counter()
+    parsed_output = parse_report_file(file_path)
+    return parsed_output, time.perf_counter() - start
+
+
+def print_backfill_stats(stats):
+    """
+    Prints the per-stage throughput of a backfill run.
+
+    Parameters
+    ----------
+    stats : dict
+        The stats dictionary returned by backfill_load_to_sql_tables.
+
+    Returns
+    -------
+    None
+    """
+    for stage in ("Parse", "Header", "Detail"):
+        stage_stats = stats[stage]
+        rate = (
+            stage_stats["Rows"] / stage_stats["Seconds"]
+            if stage_stats["Seconds"]
+            else 0
+        )
+        print(
+            f"{stage}: {stage_stats['Rows']} rows in {stage_stats['Seconds']:.2f}s "
+            f"({rate:.0f} rows/sec)"
+        )
+    print(
+        f"Loaded {stats['Files']} reports in {stats['WallSeconds']:.2f}s "
+        f"with {stats['Workers']} workers"
+    )
+
+
+def backfill_load_to_sql_tables(staging_loc, sorted_files, workers):
+    """
+    Loads many staged reports at once by parsing them concurrently in a process
+    pool while pushing them to SQL Server strictly in the given order, so the
+    header IDs stay chronological.
+
+    Only a bounded window of parsed reports is kept in flight, so memory does
+    not grow with the number of staged reports.
+
+    Parameters
+    ----------
+    staging_loc : str
+        The location holding the staged report files.
+    sorted_files : list
+        The report file names, in the order they must be committed.
+    workers : int
+        The number of parser processes.
+
+    Returns
+    -------
+    dict
+        The per-stage stats: for "Parse", "Header" and "Detail" the number of
+        rows handled and the seconds spent (parse seconds are summed over the
+        workers), plus the "Files" count, "Workers" and total "WallSeconds".
+    """
+    stats = {
+        "Parse": {"Rows": 0, "Seconds": 0.0},
+        "Header": {"Rows": 0, "Seconds": 0.0},
+        "Detail": {"Rows": 0, "Seconds": 0.0},
+        "Files": len(sorted_files),
+        "Workers": workers,
+    }
+    wall_start = time.perf_counter()
+    file_iter = iter(sorted_files)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a few parses per worker queued up ahead of the SQL pushes
+        pending = deque(
+            executor.submit(timed_parse_report_file, os.path.join(staging_loc, file))
+            for file in islice(file_iter, workers * 2)
+        )
+        while pending:
+            parsed_output, parse_seconds = pending.popleft().result()
+            next_file = next(file_iter, None)
+            if next_file is not None:
+                pending.append(
+                    executor.submit(
+                        timed_parse_report_file, os.path.join(staging_loc, next_file)
+                    )
+                )
+            stats["Parse"]["Rows"] += parsed_output["ChartCountWithDupes"]
+            stats["Parse"]["Seconds"] += parse_seconds
+
+            push_stats = header_and_detail_sql_push(parsed_output)
+            stats["Header"]["Rows"] += 1
+            stats["Header"]["Seconds"] += push_stats["HeaderSeconds"]
+            stats["Detail"]["Rows"] += push_stats["DetailStats"]["Rows"]
+            stats["Detail"]["Seconds"] += (
+                push_stats["DetailStats"]["Seconds"] + push_stats["CommitSeconds"]
+            )
+
+    stats["WallSeconds"] = time.perf_counter() - wall_start
+    print_backfill_stats(stats)
+    return stats
+
+
+def auto_load_to_sql_tables(process_name, workers=None):
     """
     Automatically loads all report files from the staging area to the SQL Server database.
 
+    With more than one worker, the reports are parsed concurrently straight
+    from the staging area by backfill_load_to_sql_tables, while the SQL pushes
+    still happen one report at a time in date order.
+
     Parameters
     ----------
     process_name : str
         The name of the process, either 'recon_report_load' or 'recon_report_update'.
+    workers : int, optional
+        The number of parser processes. Defaults to the backfill_workers config
+        value. A value of 1 loads the reports sequentially through the input
+        location, exactly like a dropped report.
     """
     
     staging_loc = loc_variable_fetch(process_name)[0]
@@ -227,10 +507,15 @@ def auto_load_to_sql_tables(process_name):
     all_files = os.listdir(staging_loc)
     # Sort the list using the custom sorting function
     sorted_all_files = sorted(all_files, key=sort_by_date)
-    for file in sorted_all_files:
-        # Copying file from staging to input
-        shutil.copy(os.path.join(staging_loc, file), input_loc)
-        load_header_and_detail_to_sql(file, process_name)
+    if workers is None:
+        workers = backfill_workers
+    if workers > 1:
+        backfill_load_to_sql_tables(staging_loc, sorted_all_files, workers)
+    else:
+        for file in sorted_all_files:
+            # Copying file from staging to input
+            shutil.copy(os.path.join(staging_loc, file), input_loc)
+            load_header_and_detail_to_sql(file, process_name)
     clear_folder(input_archive_loc)
 
 
@@ -250,9 +535,6 @@ def reset_process_sql_tables():
     None
     """
 
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
-
     # Define the SQL INSERT query
     delete_reseed_query = """
         DELETE FROM common.report_recon_header;
@@ -261,10 +543,12 @@ def reset_process_sql_tables():
     DBCC CHECKIDENT ('common.report_recon_detail', RESEED, 0);
     """
 
-    # Execute the insert query
-    cursor.execute(delete_reseed_query)
-    # Commit the transaction
-    conn.commit()
-    # Close the connection
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        # Execute the insert query
+        cursor.execute(delete_reseed_query)
+        # Commit the transaction
+        conn.commit()
+        cursor.close()
+    # The next recon update has to rescan everything for the reloaded reports
+    reset_chart_journal()
@@ -1,12 +1,25 @@
 import os
-import pyodbc
-from utils import clear_folder, execute_stored_procedure
+import time
+import hashlib
+from utils import (
+    clear_folder,
+    bulk_insert,
+    get_connection,
+    chart_journal_size,
+    read_chart_journal,
+    load_chart_journal_state,
+    save_chart_journal_state,
+    compact_chart_journal,
+    list_vendor_drop_off_charts,
+)
+from .drop_off_indexer import get_live_drop_off_charts
+from .run_metrics import measure_stage
 from config import (
-    charts_drop_off_location as windows_location,
     payment_reconciliation_location as csv_location,
     active_vendor_list,
-    conn_str,
     rru_input,
+    recon_update_mode,
+    recon_update_engine,
 )
 
 
@@ -25,25 +38,104 @@ def get_charts_windows_and_csv(active_vendor):
         A tuple of two lists. The first contains charts from windows location, the
         second contains charts from csv location.
     """
-    vendor_windows_location = os.path.join(windows_location, active_vendor)
-    windows_location_charts = os.listdir(vendor_windows_location)
-    windows_location_charts.remove(f"{active_vendor}_left_charts.txt")
+    # Prefer the live set of a running drop-off indexer over the snapshot index
+    windows_location_charts = get_live_drop_off_charts(active_vendor)
+    if windows_location_charts is None:
+        windows_location_charts = list_vendor_drop_off_charts(active_vendor)
+    windows_location_charts = list(windows_location_charts)
 
-    vendor_csv_location = os.path.join(csv_location, active_vendor)
     csv_location_charts = (
-        open(
-            os.path.join(
-                vendor_csv_location, f"{active_vendor}_charts_reconciliation.csv"
-            ),
-            "r",
-        )
-        .read()
-        .splitlines()[1:]
+        open(csv_charts_file_path(active_vendor), "r").read().splitlines()[1:]
     )
 
     return windows_location_charts, csv_location_charts
 
 
+def csv_charts_file_path(active_vendor):
+    """
+    Returns the path of the reconciliation CSV of a vendor.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the vendor.
+
+    Returns
+    -------
+    str
+        The path of the vendor's charts_reconciliation.csv file.
+    """
+    vendor_csv_location = os.path.join(csv_location, active_vendor)
+    return os.path.join(
+        vendor_csv_location, f"{active_vendor}_charts_reconciliation.csv"
+    )
+
+
+def fingerprint_csv_data(data):
+    """Returns the size and SHA-256 of the contents of a reconciliation CSV."""
+    return {"Size": len(data), "Sha256": hashlib.sha256(data).hexdigest()}
+
+
+def fingerprint_csv_files():
+    """
+    Fingerprints the reconciliation CSV of every active vendor.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each vendor to the size and SHA-256 of its CSV.
+    """
+    csv_files = {}
+    for vendor in active_vendor_list:
+        with open(csv_charts_file_path(vendor), "rb") as f:
+            csv_files[vendor] = fingerprint_csv_data(f.read())
+    return csv_files
+
+
+def read_csv_chart_changes(csv_files):
+    """
+    Reads the charts appended to each vendor's reconciliation CSV since the
+    last recon update run.
+
+    The increments only ever append to the CSVs. A CSV whose contents up to
+    the size saved by the last run no longer match its saved hash was edited
+    or re-exported, which needs a full rescan.
+
+    Parameters
+    ----------
+    csv_files : dict or None
+        The fingerprints saved by the last run, None for states saved before
+        the CSVs were fingerprinted.
+
+    Returns
+    -------
+    tuple or None
+        The appended chart names and the fingerprints of the CSVs as read, or
+        None if a full rescan is needed.
+    """
+    if csv_files is None:
+        print("No saved reconciliation CSVs, running a full rescan")
+        return None
+    charts = []
+    new_csv_files = {}
+    for vendor in active_vendor_list:
+        saved = csv_files.get(vendor)
+        with open(csv_charts_file_path(vendor), "rb") as f:
+            data = f.read()
+        if saved is None or saved["Size"] == 0:
+            print(f"No saved {vendor} reconciliation CSV, running a full rescan")
+            return None
+        applied, appended = data[: saved["Size"]], data[saved["Size"] :]
+        # Appended charts start on a new line, anything else edited the last one
+        extended = appended[:1] not in (b"", b"\n") and applied[-1:] != b"\n"
+        if fingerprint_csv_data(applied) != saved or extended:
+            print(f"{vendor} reconciliation CSV was rewritten, running a full rescan")
+            return None
+        charts.extend(chart for chart in appended.decode().splitlines() if chart)
+        new_csv_files[vendor] = fingerprint_csv_data(data)
+    return charts, new_csv_files
+
+
 def get_location_charts():
     """
     Aggregates charts from both Windows and CSV locations for all active vendors.
@@ -153,48 +245,411 @@ def update_windows_and_csv_indicators(windows_charts, csv_charts):
     -------
     None
     """
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Insert Windows charts into a temp table and update
+        create_temp_table_and_insert_charts(cursor, windows_charts)
+        update_using_temp_table(cursor, "drop_off_ind")
+
+        # Insert CSV charts into a temp table and update
+        create_temp_table_and_insert_charts(cursor, csv_charts)
+        update_using_temp_table(cursor, "payment_recon_ind")
+
+        # Commit the transaction
+        conn.commit()
+        cursor.close()
+
+
+def fetch_detail_watermark(cursor):
+    """
+    Fetches the row count and max id of the `report_recon_detail` table, used to
+    detect reports loaded since the last recon update run.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+
+    Returns
+    -------
+    list
+        The row count and the max id (0 when the table is empty).
+    """
+    cursor.execute(
+        "SELECT COUNT(*), ISNULL(MAX(id), 0) FROM common.report_recon_detail"
+    )
+    row_count, max_id = cursor.fetchone()
+    return [row_count, max_id]
+
+
+def fetch_journal_changes(cursor):
+    """
+    Fetches the chart moves journaled since the last recon update run, and
+    the charts appended to the reconciliation CSVs since then.
+
+    Indicators are only ever set, never cleared, so applying just the newly
+    moved charts is equivalent to a full rescan as long as no report was
+    loaded in between.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+
+    Returns
+    -------
+    tuple or None
+        A dictionary mapping 'windows', 'csv' and 'sql' to the moved chart
+        names, the journal offset they run up to and the fingerprints of the
+        CSVs as read. None if a full rescan is needed instead: no saved state,
+        a reset journal, a requested rescan, a CSV changed other than by an
+        increment, or new rows in `report_recon_detail` since the last run.
+    """
+    state = load_chart_journal_state()
+    if state is None:
+        print("No recon update state found, running a full rescan")
+        return None
+    journal = read_chart_journal(state["Offset"])
+    if journal is None:
+        print("Chart journal was reset, running a full rescan")
+        return None
+    changes, rescan, offset = journal
+    if rescan:
+        print("Chart journal requested a rescan, running a full rescan")
+        return None
+    csv_changes = read_csv_chart_changes(state.get("CsvFiles"))
+    if csv_changes is None:
+        return None
+    changes["csv"], csv_files = csv_changes
+    if fetch_detail_watermark(cursor) != state["DetailWatermark"]:
+        print("New reports loaded since the last update, running a full rescan")
+        return None
+
+    print(
+        f"Applying new charts: {len(changes['windows'])} Windows, "
+        f"{len(changes['csv'])} CSV, {len(changes['sql'])} SQL"
+    )
+    return changes, offset, csv_files
+
+
+# The vendors whose chart lookup tables are applied on a full rescan, as
+# selected by common.sp_update_chart_lookup_indicator
+active_vendors_query = (
+    "SELECT vendor FROM Common.vendor_active_status WHERE active_flag = 1"
+)
+
+
+def five_pass_update(cursor, windows_charts, csv_charts, lookup_charts=None):
+    """
+    Updates the recon tables with the original five-pass sequence: two
+    temp-table UPDATEs for the Windows and CSV charts, then the chart lookup,
+    exclusion and tally count stored procedures, each scanning the detail
+    table again. Nothing is committed here.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    windows_charts : list
+        A list of chart names for Windows charts.
+    csv_charts : list
+        A list of chart names for CSV charts.
+    lookup_charts : list, optional
+        A list of chart names for SQL chart lookup charts. If not provided, the
+        chart lookup tables of the vendors active in common.vendor_active_status
+        are used.
 
-    # Insert Windows charts into a temp table and update
+    Returns
+    -------
+    None
+    """
     create_temp_table_and_insert_charts(cursor, windows_charts)
     update_using_temp_table(cursor, "drop_off_ind")
-
-    # Insert CSV charts into a temp table and update
     create_temp_table_and_insert_charts(cursor, csv_charts)
     update_using_temp_table(cursor, "payment_recon_ind")
+    if lookup_charts is None:
+        cursor.execute("EXEC common.sp_update_chart_lookup_indicator")
+    else:
+        create_temp_table_and_insert_charts(cursor, lookup_charts)
+        update_using_temp_table(cursor, "chart_lookup_ind")
+    cursor.execute("EXEC common.sp_update_exclusion_indicator")
+    cursor.execute("EXEC common.sp_update_header_tally_counts")
 
-    # Commit the transaction
-    conn.commit()
 
-    # Close the connection
-    cursor.close()
-    conn.close()
+def stage_location_charts(cursor, windows_charts, csv_charts, lookup_charts=None):
+    """
+    Stages the charts of all three locations in one temporary table,
+    #LocationFlags, holding one row per chart with a flag per location.
 
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    windows_charts : list
+        A list of chart names for Windows charts.
+    csv_charts : list
+        A list of chart names for CSV charts.
+    lookup_charts : list, optional
+        A list of chart names for SQL chart lookup charts. If not provided, the
+        chart lookup tables of the vendors active in common.vendor_active_status
+        are copied server-side, as common.sp_update_chart_lookup_indicator does.
 
-def update_header_and_detail_tables():
+    Returns
+    -------
+    None
     """
-    Updates the header and detail tables in the SQL Server database.
+    cursor.execute(
+        "IF OBJECT_ID('tempdb..#LocationCharts') IS NOT NULL DROP TABLE #LocationCharts"
+    )
+    cursor.execute(
+        "IF OBJECT_ID('tempdb..#LocationFlags') IS NOT NULL DROP TABLE #LocationFlags"
+    )
+    cursor.execute(
+        """
+        CREATE TABLE #LocationCharts (
+            chart_name VARCHAR(60), drop_off_ind INT, payment_recon_ind INT,
+            chart_lookup_ind INT
+        )
+    """
+    )
+
+    rows = [(chart, 1, 0, 0) for chart in windows_charts]
+    rows.extend((chart, 0, 1, 0) for chart in csv_charts)
+    if lookup_charts is not None:
+        rows.extend((chart, 0, 0, 1) for chart in lookup_charts)
+    bulk_insert(
+        cursor,
+        "#LocationCharts",
+        ["chart_name", "drop_off_ind", "payment_recon_ind", "chart_lookup_ind"],
+        rows,
+    )
+    if lookup_charts is None:
+        # The same vendors and union as common.sp_update_chart_lookup_indicator
+        cursor.execute(
+            f"""
+            DECLARE @sqlQuery NVARCHAR(MAX) = '';
+
+            SELECT @sqlQuery = @sqlQuery + 'SELECT chartname FROM [' + vendor + '].chartlookup UNION '
+            FROM ({active_vendors_query}) v;
+
+            IF LEN(@sqlQuery) > 0
+            BEGIN
+                SET @sqlQuery = LEFT(@sqlQuery, LEN(@sqlQuery) - 6);
+                SET @sqlQuery = '
+                    INSERT INTO #LocationCharts (chart_name, drop_off_ind, payment_recon_ind, chart_lookup_ind)
+                    SELECT chartname, 0, 0, 1 FROM (' + @sqlQuery + ') t
+                ';
+                EXEC sp_executesql @sqlQuery;
+            END
+        """
+        )
+
+    # Collapse to one row per chart so the detail table is joined only once
+    cursor.execute(
+        """
+        SELECT chart_name,
+            MAX(drop_off_ind) AS drop_off_ind,
+            MAX(payment_recon_ind) AS payment_recon_ind,
+            MAX(chart_lookup_ind) AS chart_lookup_ind
+        INTO #LocationFlags
+        FROM #LocationCharts
+        GROUP BY chart_name;
+
+        CREATE CLUSTERED INDEX ix_location_flags ON #LocationFlags (chart_name);
+
+        DROP TABLE #LocationCharts;
+    """
+    )
+
+
+def single_pass_update(cursor, windows_charts, csv_charts, lookup_charts=None):
+    """
+    Updates the recon tables in a single joined pass over the detail table.
 
-    This function first clears the input folder, then retrieves lists of charts
-    from the Windows and CSV locations. It then updates the drop_off_ind and
-    payment_recon_ind indicators in the common.report_recon_detail table using
-    the lists of charts. Finally, it calls three stored procedures to update
-    the common.chart_lookup table, the exclusion indicator in the
-    common.report_recon_detail table, and the tally counts in the
-    common.report_recon_header table.
+    All three location sets are staged at once, then one UPDATE sets
+    drop_off_ind, payment_recon_ind, chart_lookup_ind and exclusion_ind and
+    records the touched header ids, and only those headers get their tally
+    counts recomputed. The result matches five_pass_update. Nothing is
+    committed here.
 
     Parameters
     ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    windows_charts : list
+        A list of chart names for Windows charts.
+    csv_charts : list
+        A list of chart names for CSV charts.
+    lookup_charts : list, optional
+        A list of chart names for SQL chart lookup charts. If not provided, the
+        chart lookup tables of the vendors active in common.vendor_active_status
+        are used.
+
+    Returns
+    -------
     None
+    """
+    stage_location_charts(cursor, windows_charts, csv_charts, lookup_charts)
+    cursor.execute(
+        "IF OBJECT_ID('tempdb..#TouchedHeaders') IS NOT NULL DROP TABLE #TouchedHeaders"
+    )
+    cursor.execute("CREATE TABLE #TouchedHeaders (header_id INT)")
+
+    # Only rows gaining at least one indicator are updated, like the
+    # separate passes which each skip rows already flagged or excluded
+    cursor.execute(
+        """
+        UPDATE r
+        SET drop_off_ind = CASE WHEN f.drop_off_ind = 1 THEN 1 ELSE r.drop_off_ind END,
+            payment_recon_ind = CASE WHEN f.payment_recon_ind = 1 THEN 1 ELSE r.payment_recon_ind END,
+            chart_lookup_ind = CASE WHEN f.chart_lookup_ind = 1 THEN 1 ELSE r.chart_lookup_ind END,
+            exclusion_ind = CASE
+                WHEN (f.drop_off_ind = 1 OR r.drop_off_ind = 1)
+                    AND (f.payment_recon_ind = 1 OR r.payment_recon_ind = 1)
+                    AND (f.chart_lookup_ind = 1 OR r.chart_lookup_ind = 1)
+                THEN 1 ELSE r.exclusion_ind END,
+            update_datetime = GETUTCDATE()
+        OUTPUT inserted.header_id INTO #TouchedHeaders (header_id)
+        FROM common.report_recon_detail r
+        INNER JOIN #LocationFlags f ON r.chart_name = f.chart_name
+        WHERE (r.exclusion_ind = 0 OR r.exclusion_ind IS NULL)
+            AND (
+                (f.drop_off_ind = 1 AND (r.drop_off_ind = 0 OR r.drop_off_ind IS NULL))
+                OR (f.payment_recon_ind = 1 AND (r.payment_recon_ind = 0 OR r.payment_recon_ind IS NULL))
+                OR (f.chart_lookup_ind = 1 AND (r.chart_lookup_ind = 0 OR r.chart_lookup_ind IS NULL))
+            )
+    """
+    )
+
+    # Recompute the tally counts of the touched headers only
+    cursor.execute(
+        """
+        UPDATE h
+        SET h.drop_off_tally_count = t.drop_off_tally_count,
+            h.payment_recon_tally_count = t.payment_recon_tally_count,
+            h.chart_lookup_tally_count = t.chart_lookup_tally_count
+        FROM common.report_recon_header h
+        INNER JOIN (
+            SELECT header_id,
+                report_name,
+                SUM(CAST(drop_off_ind AS INT)) AS drop_off_tally_count,
+                SUM(CAST(payment_recon_ind AS INT)) AS payment_recon_tally_count,
+                SUM(CAST(chart_lookup_ind AS INT)) AS chart_lookup_tally_count
+            FROM common.report_recon_detail
+            WHERE header_id IN (SELECT header_id FROM #TouchedHeaders)
+            GROUP BY header_id, report_name
+        ) t ON h.id = t.header_id AND h.report_name = t.report_name;
+
+        DROP TABLE #TouchedHeaders;
+        DROP TABLE #LocationFlags;
+    """
+    )
+
+
+# Engines that can apply the location charts to the recon tables
+recon_update_engines = {
+    "five_pass": five_pass_update,
+    "single_pass": single_pass_update,
+}
+
+
+def update_header_and_detail_tables(mode=None, engine=None):
+    """
+    Updates the header and detail tables in the SQL Server database.
+
+    This function first clears the input folder. In delta mode it takes only
+    the charts moved by the increments since the last run, falling back to
+    a full rescan of the Windows and CSV locations and the SQL chart lookup
+    tables when that is not possible. The charts are then applied by the
+    selected engine, which sets the drop_off_ind, payment_recon_ind,
+    chart_lookup_ind and exclusion_ind indicators in the
+    common.report_recon_detail table and the tally counts in the
+    common.report_recon_header table, all in one transaction.
+
+    Parameters
+    ----------
+    mode : str, optional
+        Either 'delta' or 'full'. Defaults to the recon_update_mode config value.
+    engine : str, optional
+        Either 'single_pass' or 'five_pass'. Defaults to the recon_update_engine
+        config value.
 
     Returns
     -------
     None
     """
-    clear_folder(rru_input)
+    with measure_stage("clear_input"):
+        clear_folder(rru_input)
+    if mode is None:
+        mode = recon_update_mode
+    if engine is None:
+        engine = recon_update_engine
+    update_engine = recon_update_engines[engine]
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        with measure_stage("collect_charts") as stage:
+            journal = fetch_journal_changes(cursor) if mode == "delta" else None
+            if journal is not None:
+                changes, journal_offset, csv_files = journal
+                windows_charts, csv_charts = changes["windows"], changes["csv"]
+                lookup_charts = changes["sql"]
+            else:
+                # Charts journaled or appended from here on are re-applied by the
+                # next delta run
+                journal_offset = chart_journal_size()
+                csv_files = fingerprint_csv_files()
+                windows_charts, csv_charts = get_location_charts()
+                lookup_charts = None
+            chart_count = len(windows_charts) + len(csv_charts)
+            stage["Rows"] = chart_count + len(lookup_charts or [])
+
+        with measure_stage(f"{engine}_update") as stage:
+            update_engine(cursor, windows_charts, csv_charts, lookup_charts)
+            stage["Rows"] = chart_count
+        # Commit the transaction
+        with measure_stage("commit"):
+            conn.commit()
+        with measure_stage("detail_watermark"):
+            detail_watermark = fetch_detail_watermark(cursor)
+        cursor.close()
+    save_chart_journal_state(journal_offset, detail_watermark, csv_files)
+    compact_chart_journal()
+
+
+def benchmark_recon_update_engines(repeat=3):
+    """
+    Compares the single-pass engine with the original five-pass sequence on the
+    current location charts and recon tables.
+
+    Every run happens inside a transaction that is rolled back afterwards, so
+    the tables are left unchanged and each run starts from the same state.
+
+    Parameters
+    ----------
+    repeat : int, optional
+        The number of timed runs per engine. Defaults to 3.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each engine name to its best run time in seconds.
+    """
     windows_charts, csv_charts = get_location_charts()
-    update_windows_and_csv_indicators(windows_charts, csv_charts)
-    execute_stored_procedure(procedure_name="common.sp_update_chart_lookup_indicator")
-    execute_stored_procedure(procedure_name="common.sp_update_exclusion_indicator")
-    execute_stored_procedure(procedure_name="common.sp_update_header_tally_counts")
+    timings = {engine: [] for engine in recon_update_engines}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for _ in range(repeat):
+            # Alternate the engines so caching favours neither of them
+            for engine, update_engine in recon_update_engines.items():
+                start = time.perf_counter()
+                update_engine(cursor, windows_charts, csv_charts)
+                timings[engine].append(time.perf_counter() - start)
+                conn.rollback()
+        cursor.close()
+
+    best_timings = {engine: min(runs) for engine, runs in timings.items()}
+    for engine, seconds in best_timings.items():
+        print(f"{engine}: {seconds:.2f}s (best of {repeat})")
+    return best_timings
@@ -0,0 +1,158 @@
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# The name of the logger all report logs go through
+REPORT_LOGGER_NAME = "recon_reports"
+
+# The listener writing the report logs in this process, if any
+_running_listener = None
+
+
+class ReportFileRouter(logging.Handler):
+    def __init__(self):
+        """
+        Initialize a ReportFileRouter object.
+
+        The router runs on the queue listener thread and writes each record to
+        the log file named by its log_file attribute, keeping one FileHandler
+        open per log file until a close marker record for that file arrives.
+        """
+        super().__init__()
+        self.file_handlers = {}
+
+    def handle(self, record):
+        """
+        Writes a record to its log file, or closes the log file if the record
+        is a close marker.
+
+        Parameters
+        ----------
+        record : logging.LogRecord
+            The record to write, with a log_file attribute.
+
+        Returns
+        -------
+        bool
+            True, the record is always consumed. A record that cannot be
+            written is reported through handleError.
+        """
+        log_file = getattr(record, "log_file", None)
+        if log_file is None:
+            return True
+        if getattr(record, "close_log_file", False):
+            handler = self.file_handlers.pop(log_file, None)
+            if handler is not None:
+                handler.close()
+            return True
+
+        try:
+            handler = self.file_handlers.get(log_file)
+            if handler is None:
+                handler = logging.FileHandler(log_file, delay=True)
+                handler.setLevel(logging.INFO)
+                # No formatting for plain text logs
+                self.file_handlers[log_file] = handler
+            handler.handle(record)
+        except Exception:
+            # Keep the listener thread alive for the other reports
+            self.handleError(record)
+        return True
+
+    def close(self):
+        """
+        Closes every log file still open.
+
+        Returns
+        -------
+        None
+        """
+        for handler in self.file_handlers.values():
+            handler.close()
+        self.file_handlers = {}
+        super().close()
+
+
+class ReportLogAdapter(logging.LoggerAdapter):
+    """
+    Logger of one processed report, tagging its records with the report's
+    log file. Call close() once the report is done.
+    """
+
+    def process(self, msg, kwargs):
+        """Adds the log file to the extra attributes of a record."""
+        kwargs["extra"] = {**kwargs.get("extra", {}), **self.extra}
+        return msg, kwargs
+
+    def close(self):
+        """
+        Queues the close marker of the log file, after the report's records.
+
+        Returns
+        -------
+        None
+        """
+        self.logger.info("", extra={**self.extra, "close_log_file": True})
+
+
+def start_report_logging():
+    """
+    Starts the report logging listener of this process if it is not running
+    yet, and returns the report logger.
+
+    Processing threads only put records on an in-memory queue through a
+    QueueHandler; the listener thread does all the file I/O.
+
+    Returns
+    -------
+    logging.Logger
+        The logger of the report logs.
+    """
+    global _running_listener
+    logger = logging.getLogger(REPORT_LOGGER_NAME)
+    if _running_listener is None:
+        log_queue = queue.SimpleQueue()
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(QueueHandler(log_queue))
+        _running_listener = QueueListener(log_queue, ReportFileRouter())
+        _running_listener.start()
+        atexit.register(stop_report_logging)
+    return logger
+
+
+def stop_report_logging():
+    """
+    Stops the report logging listener of this process, if one is running,
+    after writing the queued records, and closes the open log files.
+
+    Returns
+    -------
+    None
+    """
+    global _running_listener
+    if _running_listener is not None:
+        _running_listener.stop()
+        for handler in _running_listener.handlers:
+            handler.close()
+        _running_listener = None
+
+
+def get_report_logger(log_file):
+    """
+    Returns the logger of one processed report.
+
+    Parameters
+    ----------
+    log_file : str
+        The path of the report's log file.
+
+    Returns
+    -------
+    ReportLogAdapter
+        The logger writing to the log file.
+    """
+    return ReportLogAdapter(start_report_logging(), {"log_file": log_file})
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from config import rrl_loc, rru_loc, run_metrics_window, run_metrics_port
+
+# The run being measured on each thread, if any
+_current_run = threading.local()
+
+# Rolling stage samples, keyed by process name then stage name
+_stage_samples = {}
+_samples_lock = threading.Lock()
+
+# The metrics HTTP server running in this process, if any
+_running_server = None
+
+
+class RunMetrics:
+    def __init__(self, process_name, file_name):
+        """
+        Initialize a RunMetrics object.
+
+        The run collects the duration, row count and rows/sec of each stage of
+        processing one file, in the order the stages ran.
+
+        Parameters
+        ----------
+        process_name : str
+            The name of the process, either 'recon_report_load' or
+            'recon_report_update'.
+        file_name : str
+            The name of the file being processed.
+        """
+        self.process_name = process_name
+        self.file_name = file_name
+        self.stages = []
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Times a stage of the run.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage.
+
+        Yields
+        ------
+        dict
+            The stage record; set its "Rows" to the number of rows the stage
+            handled to get a rows/sec figure.
+        """
+        with time_stage(name) as record:
+            try:
+                yield record
+            finally:
+                self.stages.append(record)
+
+    def format_stages(self):
+        """
+        Formats the stages of the run for its log file.
+
+        Returns
+        -------
+        str
+            One line per stage with its duration, rows and rows/sec, and the
+            total duration.
+        """
+        lines = ["Stage Timings:"]
+        for record in self.stages:
+            line = f"  {record['Stage']}: {record['Seconds']:.3f}s"
+            if record["Rows"] is not None:
+                line += f", {record['Rows']} rows"
+            if record["RowsPerSec"] is not None:
+                line += f", {record['RowsPerSec']:.0f} rows/sec"
+            lines.append(line)
+        if self.seconds is not None:
+            lines.append(f"  Total: {self.seconds:.3f}s")
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def time_stage(name):
+    """
+    Times a stage, whether or not it is part of a run.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+
+    Yields
+    ------
+    dict
+        The stage record; its "Seconds" and "RowsPerSec" are set when the
+        stage ends.
+    """
+    record = {"Stage": name, "Rows": None}
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["Seconds"] = time.perf_counter() - start
+        if record["Rows"] is not None and record["Seconds"] > 0:
+            record["RowsPerSec"] = record["Rows"] / record["Seconds"]
+        else:
+            record["RowsPerSec"] = None
+
+
+def start_run(process_name, file_name):
+    """
+    Starts measuring the processing of a file on the calling thread, so the
+    stages timed with measure_stage on this thread are recorded in the run.
+
+    Parameters
+    ----------
+    process_name : str
+        The name of the process, either 'recon_report_load' or
+        'recon_report_update'.
+    file_name : str
+        The name of the file being processed.
+
+    Returns
+    -------
+    RunMetrics
+        The run, to be passed to finish_run.
+    """
+    run = RunMetrics(process_name, file_name)
+    _current_run.run = run
+    return run
+
+
+def finish_run(run):
+    """
+    Ends a run, adds its stages to the rolling aggregates and rewrites the
+    metrics file of the process.
+
+    Parameters
+    ----------
+    run : RunMetrics
+        The run started by start_run.
+
+    Returns
+    -------
+    None
+    """
+    _current_run.run = None
+    run.seconds = time.perf_counter() - run.start
+    samples = run.stages + [{"Stage": "total", "Seconds": run.seconds, "Rows": None}]
+    with _samples_lock:
+        process_samples = _stage_samples.setdefault(run.process_name, {})
+        for record in samples:
+            stage_samples = process_samples.setdefault(
+                record["Stage"], deque(maxlen=run_metrics_window)
+            )
+            stage_samples.append((record["Seconds"], record["Rows"]))
+    try:
+        save_run_metrics(run.process_name)
+    except OSError:
+        # The rolling metrics are still served, the file catches up next run
+        traceback.print_exc()
+
+
+@contextmanager
+def measure_stage(name):
+    """
+    Times a stage of the run of the calling thread. Outside of a run, the
+    stage is timed but not recorded.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+
+    Yields
+    ------
+    dict
+        The stage record; set its "Rows" to the number of rows the stage
+        handled.
+    """
+    run = getattr(_current_run, "run", None)
+    stage = time_stage(name) if run is None else run.stage(name)
+    with stage as record:
+        yield record
+
+
+def percentile(values, fraction):
+    """
+    Returns a percentile of a list of values, by the nearest-rank method.
+
+    Parameters
+    ----------
+    values : list
+        The values, not necessarily sorted.
+    fraction : float
+        The percentile as a fraction, e.g. 0.95.
+
+    Returns
+    -------
+    float
+        The percentile.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def get_run_metrics():
+    """
+    Summarizes the rolling stage samples of every process.
+
+    Returns
+    -------
+    dict
+        For each process and stage: the sample "Count", the p50 and p95 of
+        the seconds and, for stages with row counts, of the rows/sec, and the
+        last sample.
+    """
+    with _samples_lock:
+        snapshot = {
+            process_name: {stage: list(samples) for stage, samples in stages.items()}
+            for process_name, stages in _stage_samples.items()
+        }
+
+    metrics = {}
+    for process_name, stages in snapshot.items():
+        metrics[process_name] = {}
+        for stage, samples in stages.items():
+            seconds = [sample[0] for sample in samples]
+            rates = [rows / secs for secs, rows in samples if rows and secs > 0]
+            summary = {
+                "Count": len(samples),
+                "P50Seconds": percentile(seconds, 0.5),
+                "P95Seconds": percentile(seconds, 0.95),
+                "LastSeconds": seconds[-1],
+                "LastRows": samples[-1][1],
+            }
+            if rates:
+                summary["P50RowsPerSec"] = percentile(rates, 0.5)
+                summary["P95RowsPerSec"] = percentile(rates, 0.95)
+            metrics[process_name][stage] = summary
+    return metrics
+
+
+def save_run_metrics(process_name):
+    """
+    Writes the rolling metrics of a process to run_metrics.json in the
+    process automation location, replacing the previous file atomically.
+
+    Parameters
+    ----------
+    process_name : str
+        The name of the process, either 'recon_report_load' or
+        'recon_report_update'.
+
+    Returns
+    -------
+    None
+    """
+    if process_name == "recon_report_load":
+        process_loc = rrl_loc
+    elif process_name == "recon_report_update":
+        process_loc = rru_loc
+    metrics = {
+        "UpdatedAt": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Window": run_metrics_window,
+        "Stages": get_run_metrics().get(process_name, {}),
+    }
+    metrics_file = os.path.join(process_loc, "run_metrics.json")
+    # Runs of several dispatcher workers can finish at the same time
+    temp_file = f"{metrics_file}.{threading.get_ident()}.tmp"
+    with open(temp_file, "w") as f:
+        json.dump(metrics, f, indent=2)
+    os.replace(temp_file, metrics_file)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the rolling run metrics of every process as JSON on /metrics."""
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = json.dumps(get_run_metrics()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the console
+        pass
+
+
+def start_metrics_server(port=None):
+    """
+    Starts the local metrics HTTP endpoint of this process, if a port is
+    configured and it is not running yet.
+
+    Parameters
+    ----------
+    port : int, optional
+        The port to listen on, on localhost. Defaults to run_metrics_port; the
+        endpoint is disabled if it is None.
+
+    Returns
+    -------
+    ThreadingHTTPServer or None
+        The running server, None if disabled.
+    """
+    global _running_server
+    port = port or run_metrics_port
+    if _running_server is None and port:
+        address = ("127.0.0.1", port)
+        _running_server = ThreadingHTTPServer(address, MetricsRequestHandler)
+        threading.Thread(
+            target=_running_server.serve_forever, name="run_metrics", daemon=True
+        ).start()
+        print(f"Run metrics served on http://127.0.0.1:{port}/metrics")
+    return _running_server
+
+
+def stop_metrics_server():
+    """
+    Stops the metrics HTTP endpoint of this process, if one is running.
+
+    Returns
+    -------
+    None
+    """
+    global _running_server
+    if _running_server is not None:
+        _running_server.shutdown()
+        _running_server.server_close()
+        _running_server = None
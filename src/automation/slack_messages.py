@@ -1,13 +1,235 @@
 import requests
-import json
 import time
-from datetime import datetime
+import queue
+import threading
+import traceback
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from .run_metrics import measure_stage
 from config import (
     user_auth_token,
     recon_report_load_webhook,
     recon_report_update_webhook,
+    slack_timeout_seconds,
+    slack_max_retries,
+    slack_backoff_seconds,
+    slack_queue_size,
+    slack_digest_seconds,
+    slack_api_base,
+    slack_history_page_size,
+    slack_delete_workers,
+    slack_shutdown_seconds,
 )
 
+# One pooled HTTP session per thread, requests sessions are not thread safe
+_slack_sessions = threading.local()
+
+# The notifier running in this process, if any
+_running_notifier = None
+
+
+def get_slack_session():
+    """
+    Returns the pooled HTTP session of the calling thread, so connections to
+    Slack are reused across calls.
+
+    Returns
+    -------
+    requests.Session
+        The session of the calling thread.
+    """
+    if not hasattr(_slack_sessions, "session"):
+        _slack_sessions.session = requests.Session()
+    return _slack_sessions.session
+
+
+def retry_delay(response, attempt):
+    """
+    Returns how long to wait before retrying a Slack request: the Retry-After
+    header of a rate-limited response if there is one, an exponential backoff
+    otherwise.
+
+    Parameters
+    ----------
+    response : requests.Response or None
+        The failed response, None if the request raised.
+    attempt : int
+        The number of the failed attempt, starting at 0.
+
+    Returns
+    -------
+    float
+        The delay in seconds.
+    """
+    retry_after = None if response is None else response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        # Retry-After may also be an HTTP date
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            pass
+    return slack_backoff_seconds * 2**attempt
+
+
+def is_retryable(response):
+    """Tells whether a Slack response is worth retrying (rate limit or 5xx)."""
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class RateLimitPause:
+    def __init__(self):
+        """
+        Initialize a RateLimitPause object.
+
+        The pause is shared by the threads calling one Slack API method: when
+        any of them is rate limited, all of them hold off until the delay
+        Slack asked for has passed.
+        """
+        self.lock = threading.Lock()
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        """
+        Holds off every caller for the given number of seconds.
+
+        Parameters
+        ----------
+        seconds : float
+            The delay Slack asked for.
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def wait(self):
+        """
+        Waits until the current pause, if any, has passed.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            with self.lock:
+                delay = self.resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+
+def slack_api_call(http_method, api_method, token, rate_limit=None, **kwargs):
+    """
+    Calls a Slack Web API method, waiting out rate limits.
+
+    Rate-limited calls (HTTP 429, or a 'ratelimited' error) pause every
+    caller sharing rate_limit for the Retry-After delay and are retried, up to
+    slack_max_retries times. Calls that raise (timeouts, dropped connections)
+    are retried after an exponential backoff, within the same retry budget.
+
+    Parameters
+    ----------
+    http_method : str
+        Either 'GET' or 'POST'.
+    api_method : str
+        The Web API method, e.g. 'conversations.history'.
+    token : str
+        The Slack authentication token.
+    rate_limit : RateLimitPause, optional
+        The pause shared with the other callers of the method.
+    **kwargs
+        The params or json of the request.
+
+    Returns
+    -------
+    tuple
+        The response and its JSON body, None if the body is not JSON. Both are
+        None if the last attempt raised.
+    """
+    if rate_limit is None:
+        rate_limit = RateLimitPause()
+    url = f"{slack_api_base}/{api_method}"
+    headers = {"Authorization": f"Bearer {token}"}
+    session = get_slack_session()
+
+    for attempt in range(slack_max_retries + 1):
+        rate_limit.wait()
+        try:
+            response = session.request(
+                http_method,
+                url,
+                headers=headers,
+                timeout=slack_timeout_seconds,
+                **kwargs,
+            )
+        except requests.RequestException as e:
+            if attempt == slack_max_retries:
+                print(f"Slack call {api_method} failed: {e}")
+                return None, None
+            delay = retry_delay(None, attempt)
+            print(f"Slack call {api_method} failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+            continue
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        rate_limited = response.status_code == 429 or (
+            body is not None and body.get("error") == "ratelimited"
+        )
+        if not rate_limited or attempt == slack_max_retries:
+            break
+        rate_limit.pause(retry_delay(response, attempt))
+    return response, body
+
+
+def get_slack_message_page(token, channel_id, limit=200, cursor=None, rate_limit=None):
+    """
+    Retrieves one page of messages from a Slack channel.
+
+    Parameters
+    ----------
+    token : str
+        The Slack user authentication token.
+    channel_id : str
+        The ID of the Slack channel from which to retrieve messages.
+    limit : int, optional
+        The maximum number of messages in the page. Defaults to 200.
+    cursor : str, optional
+        The cursor of the page, None for the first page.
+    rate_limit : RateLimitPause, optional
+        The pause shared with the other callers of the method.
+
+    Returns
+    -------
+    tuple
+        The list of message objects of the page, None if the page could not
+        be fetched, and the cursor of the next page, None after the last page.
+    """
+    params = {"channel": channel_id, "limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+    response, body = slack_api_call(
+        "GET", "conversations.history", token, rate_limit, params=params
+    )
+
+    if response is None:
+        return None, None
+    if response.status_code == 200 and body and body.get("ok"):
+        next_cursor = body.get("response_metadata", {}).get("next_cursor")
+        return body.get("messages", []), next_cursor or None
+    else:
+        print(f"Failed to fetch messages: {response.status_code}, {response.text}")
+        return None, None
+
 
 def get_slack_messages(token, channel_id, limit=100):
     """
@@ -27,22 +249,47 @@ def get_slack_messages(token, channel_id, limit=100):
     list
         A list of message objects retrieved from the Slack channel.
     """
-    url = "https://slack.com/api/conversations.history"
+    return get_slack_message_page(token, channel_id, limit)[0] or []
 
-    headers = {"Authorization": f"Bearer {token}"}
-
-    params = {"channel": channel_id, "limit": limit}
 
-    response = requests.get(url, headers=headers, params=params)
-
-    if response.status_code == 200 and response.json().get("ok"):
-        return response.json().get("messages", [])
-    else:
-        print(f"Failed to fetch messages: {response.status_code}, {response.text}")
-        return []
+def get_all_slack_messages(token, channel_id):
+    """
+    Retrieves every message of a Slack channel, following the conversation
+    cursor through all pages.
 
+    Parameters
+    ----------
+    token : str
+        The Slack user authentication token.
+    channel_id : str
+        The ID of the Slack channel from which to retrieve messages.
 
-def delete_slack_message(token, channel_id, ts):
+    Returns
+    -------
+    list
+        A list of all message objects of the Slack channel, or of the pages
+        fetched before a page failed.
+    """
+    rate_limit = RateLimitPause()
+    messages = []
+    cursor = None
+    while True:
+        page, cursor = get_slack_message_page(
+            token, channel_id, slack_history_page_size, cursor, rate_limit
+        )
+        if page is None:
+            print(
+                f"Stopped paging after {len(messages)} messages, the channel may "
+                "hold more"
+            )
+            break
+        messages.extend(page)
+        if not cursor:
+            break
+    return messages
+
+
+def delete_slack_message(token, channel_id, ts, rate_limit=None):
     """
     Deletes a specific message from a Slack channel based on its timestamp.
 
@@ -54,57 +301,77 @@ def delete_slack_message(token, channel_id, ts):
         The ID of the Slack channel from which to delete the message.
     ts : str
         The timestamp of the message to be deleted.
+    rate_limit : RateLimitPause, optional
+        The pause shared with the other deleting threads.
 
     Returns
     -------
-    None
+    bool
+        True if the message was deleted.
     """
-    url = "https://slack.com/api/chat.delete"
-
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-
     payload = {"channel": channel_id, "ts": ts}
 
-    response = requests.post(url, headers=headers, data=json.dumps(payload))
+    response, body = slack_api_call(
+        "POST", "chat.delete", token, rate_limit, json=payload
+    )
 
-    if response.status_code == 200 and response.json().get("ok"):
-        print(f"Message {ts} deleted successfully")
+    if response is None:
+        print(f"Failed to delete message {ts}")
+        return False
+    if response.status_code == 200 and body and body.get("ok"):
+        return True
     else:
         print(f"Failed to delete message {ts}: {response.status_code}, {response.text}")
+        return False
 
 
-def delete_all_messages(channel_id):
+def delete_all_messages(channel_id, workers=None):
     """
     Deletes all messages from a specified Slack channel.
 
-    This function retrieves all messages from the given Slack channel and
-    deletes each message one by one using its timestamp. A delay is added
-    between deletions to avoid rate limiting.
+    This function retrieves every message of the given Slack channel, page by
+    page, and deletes them on a pool of threads. The threads share one
+    rate-limit pause, so when Slack rate limits one of them, all of them wait
+    for the Retry-After delay.
 
     Parameters
     ----------
     channel_id : str
         The ID of the Slack channel from which to delete all messages.
+    workers : int, optional
+        The number of deleting threads. Defaults to slack_delete_workers.
 
     Returns
     -------
     None
     """
     global user_auth_token
-    messages = get_slack_messages(user_auth_token, channel_id)
+    start_time = time.perf_counter()
+    messages = get_all_slack_messages(user_auth_token, channel_id)
+    rate_limit = RateLimitPause()
+
+    with ThreadPoolExecutor(max_workers=workers or slack_delete_workers) as executor:
+        deleted = sum(
+            executor.map(
+                lambda message: delete_slack_message(
+                    user_auth_token, channel_id, message["ts"], rate_limit
+                ),
+                messages,
+            )
+        )
 
-    for message in messages:
-        ts = message["ts"]
-        delete_slack_message(user_auth_token, channel_id, ts)
-        time.sleep(0.1)  # To avoid rate limiting
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"Deleted {deleted}/{len(messages)} messages in {elapsed:.2f}s "
+        f"({deleted / max(elapsed, 1e-9):.1f} msgs/sec)"
+    )
 
 
-def send_slack_message(
+def build_slack_payload(
     processname, filename, timestamp, status, logfile_loc, exception=None
 ):
     """
-    Sends a Slack message to a specified webhook with information about a
-    processed report.
+    Builds the Slack message about a processed report.
 
     Parameters
     ----------
@@ -126,7 +393,8 @@ def send_slack_message(
 
     Returns
     -------
-    None
+    tuple
+        The webhook URL of the process and the message payload.
     """
     if processname == "recon_report_load":
         webhook_url = recon_report_load_webhook
@@ -188,11 +456,372 @@ def send_slack_message(
     # Add another divider at the end
     payload["attachments"][0]["blocks"].append({"type": "divider"})
 
-    headers = {"Content-Type": "application/json"}
+    return webhook_url, payload
 
-    response = requests.post(webhook_url, headers=headers, json=payload)
 
-    if response.status_code == 200:
-        pass
-    else:
+def build_slack_digest_payload(processname, messages):
+    """
+    Builds one Slack message folding several successful report messages.
+
+    Parameters
+    ----------
+    processname : str
+        The name of the process that processed the reports.
+    messages : list
+        The keyword arguments of the folded send_slack_message calls.
+
+    Returns
+    -------
+    tuple
+        The webhook URL of the process and the message payload.
+    """
+    if len(messages) == 1:
+        return build_slack_payload(**messages[0])
+    webhook_url, _ = build_slack_payload(processname, "", "", "Success", "")
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    files = "\n".join(
+        f"`{message['filename']}`  Log: `{message['logfile_loc']}`"
+        for message in messages
+    )
+    payload = {
+        "attachments": [
+            {
+                "color": "#36a64f",
+                "blocks": [
+                    {"type": "divider"},
+                    {
+                        "type": "section",
+                        "text": {
+                            "type": "mrkdwn",
+                            "text": f"New Files Processed: *`{len(messages)}`*",
+                        },
+                    },
+                    {
+                        "type": "section",
+                        "text": {"type": "mrkdwn", "text": "Status: *`Success`*"},
+                    },
+                    {
+                        "type": "section",
+                        "text": {
+                            "type": "mrkdwn",
+                            "text": f"TimeStamp: *`{timestamp}`*",
+                        },
+                    },
+                    {"type": "section", "text": {"type": "mrkdwn", "text": files}},
+                    {"type": "divider"},
+                ],
+            }
+        ]
+    }
+    return webhook_url, payload
+
+
+def post_slack_payload(webhook_url, payload, max_retries=None):
+    """
+    Posts a message payload to a Slack webhook on the pooled session, with a
+    timeout, retrying rate-limited, failed (5xx) and timed out posts.
+
+    Parameters
+    ----------
+    webhook_url : str
+        The URL of the webhook.
+    payload : dict
+        The message payload.
+    max_retries : int, optional
+        The number of retries after the first attempt. Defaults to
+        slack_max_retries.
+
+    Returns
+    -------
+    bool
+        True if the message was posted.
+    """
+    if max_retries is None:
+        max_retries = slack_max_retries
+    session = get_slack_session()
+    headers = {"Content-Type": "application/json"}
+
+    for attempt in range(max_retries + 1):
+        response = None
+        try:
+            response = session.post(
+                webhook_url,
+                headers=headers,
+                json=payload,
+                timeout=slack_timeout_seconds,
+            )
+            if response.status_code == 200:
+                return True
+            if not is_retryable(response):
+                break
+            failure = f"{response.status_code}, {response.text}"
+        except requests.RequestException as e:
+            failure = e
+        if attempt < max_retries:
+            delay = retry_delay(response, attempt)
+            print(f"Failed to send message ({failure}), retrying in {delay}s")
+            time.sleep(delay)
+
+    if response is not None:
         print(f"Failed to send message: {response.status_code}, {response.text}")
+    else:
+        print(f"Failed to send message: {failure}")
+    return False
+
+
+class SlackNotifier:
+    def __init__(self, queue_size=None, digest_seconds=None):
+        """
+        Initialize a SlackNotifier object.
+
+        The notifier posts Slack messages from a background thread, so report
+        processing never waits on Slack. Messages wait in a bounded queue; when
+        it is full (e.g. during a Slack outage) new messages are dropped with a
+        printed warning rather than blocking the caller. In digest mode, success
+        messages are held for digest_seconds and folded into one post per
+        process, while error messages are still posted right away. A message
+        that fails to post is reported and skipped, it never stops the thread.
+
+        Parameters
+        ----------
+        queue_size : int, optional
+            The maximum number of waiting messages. Defaults to slack_queue_size.
+        digest_seconds : float, optional
+            The digest interval, 0 posts every message on its own. Defaults to
+            slack_digest_seconds.
+        """
+        self.queue = queue.Queue(maxsize=queue_size or slack_queue_size)
+        if digest_seconds is None:
+            digest_seconds = slack_digest_seconds
+        self.digest_seconds = digest_seconds
+        self.digest = {}
+        self.digest_deadline = None
+        self.stop_deadline = None
+        self.thread = threading.Thread(
+            target=self.run, name="slack_notifier", daemon=True
+        )
+        self.thread.start()
+
+    def notify(self, message):
+        """
+        Queues a message.
+
+        Parameters
+        ----------
+        message : dict
+            The keyword arguments of build_slack_payload.
+
+        Returns
+        -------
+        bool
+            True if the message was queued, False if the queue was full.
+        """
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            print(f"Slack queue full, dropped message for {message['filename']}")
+            return False
+
+    def post(self, webhook_url, payload):
+        """
+        Posts a message payload, without retries once the notifier is stopping.
+
+        Parameters
+        ----------
+        webhook_url : str
+            The URL of the webhook.
+        payload : dict
+            The message payload.
+
+        Returns
+        -------
+        None
+        """
+        max_retries = 0 if self.stop_deadline is not None else None
+        post_slack_payload(webhook_url, payload, max_retries)
+
+    def flush_digest(self):
+        """
+        Posts the held success messages, one post per process.
+
+        Returns
+        -------
+        None
+        """
+        for processname, messages in self.digest.items():
+            try:
+                self.post(*build_slack_digest_payload(processname, messages))
+            except Exception:
+                traceback.print_exc()
+        self.digest = {}
+        self.digest_deadline = None
+
+    def drop_pending(self):
+        """
+        Drops the messages still waiting once the shutdown deadline has passed.
+
+        Returns
+        -------
+        None
+        """
+        dropped = sum(len(messages) for messages in self.digest.values())
+        while True:
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if message is not None:
+                dropped += 1
+        self.digest = {}
+        if dropped:
+            print(f"Slack shutdown deadline passed, dropped {dropped} message(s)")
+
+    def run(self):
+        """
+        Posts queued messages until a None sentinel is received.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            timeout = None
+            if self.digest_deadline is not None:
+                timeout = max(self.digest_deadline - time.monotonic(), 0)
+            if self.stop_deadline is not None:
+                remaining = self.stop_deadline - time.monotonic()
+                if remaining <= 0:
+                    self.drop_pending()
+                    return
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            try:
+                message = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                if self.digest_deadline is not None:
+                    if time.monotonic() >= self.digest_deadline:
+                        self.flush_digest()
+                continue
+            if message is None:
+                self.flush_digest()
+                return
+
+            try:
+                if self.digest_seconds and message["status"] == "Success":
+                    self.digest.setdefault(message["processname"], []).append(message)
+                    if self.digest_deadline is None:
+                        self.digest_deadline = time.monotonic() + self.digest_seconds
+                else:
+                    self.post(*build_slack_payload(**message))
+            except Exception:
+                traceback.print_exc()
+
+    def stop(self, timeout=None):
+        """
+        Posts the messages still waiting, then stops the notifier thread.
+
+        The messages are posted once each, without retries, and the ones still
+        waiting when the timeout runs out are dropped, so a Slack outage does
+        not hold up the shutdown.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The time allowed to post the waiting messages. Defaults to
+            slack_shutdown_seconds.
+
+        Returns
+        -------
+        None
+        """
+        if timeout is None:
+            timeout = slack_shutdown_seconds
+        self.stop_deadline = time.monotonic() + timeout
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            # The thread drops what is left once the deadline passes
+            pass
+        # Leave time for the post in progress to time out
+        remaining = max(self.stop_deadline - time.monotonic(), 0)
+        self.thread.join(remaining + slack_timeout_seconds)
+        if self.thread.is_alive():
+            print("Slack notifier did not stop in time, abandoning it")
+
+
+def start_slack_notifier():
+    """
+    Starts the Slack notifier of this process if it is not running yet. While
+    it runs, send_slack_message queues messages instead of posting them.
+
+    Returns
+    -------
+    SlackNotifier
+        The running notifier.
+    """
+    global _running_notifier
+    if _running_notifier is None:
+        _running_notifier = SlackNotifier()
+    return _running_notifier
+
+
+def stop_slack_notifier():
+    """
+    Stops the Slack notifier of this process, if one is running, after posting
+    the messages still waiting.
+
+    Returns
+    -------
+    None
+    """
+    global _running_notifier
+    if _running_notifier is not None:
+        _running_notifier.stop()
+        _running_notifier = None
+
+
+def send_slack_message(
+    processname, filename, timestamp, status, logfile_loc, exception=None
+):
+    """
+    Sends a Slack message to a specified webhook with information about a
+    processed report.
+
+    The message is queued on the running SlackNotifier if there is one, and
+    posted right away otherwise.
+
+    Parameters
+    ----------
+    processname : str
+        The name of the process that processed the report, either
+        'recon_report_load' or 'recon_report_update'.
+    filename : str
+        The name of the report file that was processed.
+    timestamp : str
+        The timestamp of the report file, if not provided, the current
+        timestamp will be used.
+    status : str
+        The status of the report file, either 'Success' or 'Error'.
+    logfile_loc : str
+        The location of the log file for the report.
+    exception : str, optional
+        The exception message if the report failed, if not provided, no
+        exception section will be added.
+
+    Returns
+    -------
+    None
+    """
+    message = {
+        "processname": processname,
+        "filename": filename,
+        "timestamp": timestamp,
+        "status": status,
+        "logfile_loc": logfile_loc,
+        "exception": exception,
+    }
+    with measure_stage("send_slack_message"):
+        if _running_notifier is not None:
+            _running_notifier.notify(message)
+        else:
+            post_slack_payload(*build_slack_payload(**message))
@@ -0,0 +1,122 @@
+import threading
+import traceback
+from config import rru_trigger_debounce_seconds
+
+
+class TriggerCoalescer:
+    def __init__(self, run, debounce_seconds=None):
+        """
+        Initialize a TriggerCoalescer object.
+
+        The coalescer collapses bursts of trigger files into single runs. A run
+        starts once no trigger has arrived for debounce_seconds, and receives
+        all the triggers collected so far. Triggers arriving while a run is in
+        progress are held back and collapse into at most one follow-up run,
+        started after the current one finishes. Runs never overlap.
+
+        Parameters
+        ----------
+        run : callable
+            The function running the update, called with the list of trigger
+            file names it covers, oldest first.
+        debounce_seconds : float, optional
+            The quiet period to wait for before starting a run. Defaults to
+            rru_trigger_debounce_seconds.
+        """
+        self.run = run
+        if debounce_seconds is None:
+            debounce_seconds = rru_trigger_debounce_seconds
+        self.debounce_seconds = debounce_seconds
+        self.condition = threading.Condition()
+        self.triggers = []
+        self.timer = None
+        self.running = False
+
+    def start_timer(self):
+        """
+        (Re)starts the debounce timer. Must be called with the condition held.
+
+        Returns
+        -------
+        None
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.debounce_seconds, self.fire)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def trigger(self, file_name):
+        """
+        Registers a trigger file.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the trigger file.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            self.triggers.append(file_name)
+            if self.running:
+                print(
+                    f"Update running, {len(self.triggers)} trigger(s) held for "
+                    "the follow-up run"
+                )
+                return
+            self.start_timer()
+
+    def fire(self):
+        """
+        Runs the update for every trigger collected, then starts the debounce
+        timer again if more triggers arrived meanwhile.
+
+        Returns
+        -------
+        None
+        """
+        with self.condition:
+            if self.running or not self.triggers:
+                return
+            self.timer = None
+            triggers, self.triggers = self.triggers, []
+            self.running = True
+
+        print(f"Starting coalesced update for {len(triggers)} trigger(s)")
+        try:
+            self.run(triggers)
+        except Exception:
+            # The run reports its own errors, this only keeps the coalescer going
+            traceback.print_exc()
+        finally:
+            with self.condition:
+                self.running = False
+                if self.triggers:
+                    self.start_timer()
+                self.condition.notify_all()
+
+    def shutdown(self):
+        """
+        Runs the held triggers right away instead of waiting for the debounce
+        timer, and returns once no update is running and no trigger is held.
+
+        A timer that went off just before may start a run on its own thread,
+        so the wait is repeated until the coalescer is idle.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            with self.condition:
+                while self.running:
+                    self.condition.wait()
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                if not self.triggers:
+                    return
+            self.fire()
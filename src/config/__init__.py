@@ -1,3 +1,4 @@
+from .defaults import *
 from .config import *
 from .paths import *
 from .sql_connect import *
\ No newline at end of file
@@ -56,3 +56,8 @@ min_chart = 5
 max_chart = 1000
 mem_id_start = 100
 mem_id_end = 1100
+
+# Tuning Variables
+# Slack delivery, SQL pool and bulk load, workers, dispatcher, metrics and the
+# other tuning variables default in defaults.py. Set any of them here to
+# override its default, e.g. report_workers = 8
@@ -0,0 +1,69 @@
+# Defaults of the tuning variables, the only place they are defined. config.py
+# only sets the ones it changes; any value set in config.py takes precedence.
+
+# Slack Connection Variables
+slack_timeout_seconds = 10
+slack_max_retries = 3
+slack_backoff_seconds = 1  # doubled on each retry, unless Slack sends Retry-After
+slack_queue_size = 1000  # messages waiting to be posted, new ones dropped past it
+slack_digest_seconds = 0  # fold success messages into one post per interval, 0 off
+slack_shutdown_seconds = 30  # time allowed to post waiting messages on shutdown
+slack_api_base = "https://slack.com/api"
+slack_history_page_size = 200  # messages per conversations.history page
+slack_delete_workers = 4  # threads deleting messages on channel cleanup
+
+# SQL Connection Variables
+sql_pool_size = 8  # maximum connections checked out at the same time
+sql_pool_checkout_timeout = 30  # seconds to wait for a free connection
+sql_pool_health_check_seconds = 60  # idle time after which a connection is pinged
+sql_slow_query_seconds = 1.0  # statements slower than this go to the slow-query log
+
+# Report Size Variables
+report_generator_engine = "vectorized"  # vectorized (NumPy) or the original python
+report_workers = 4  # processes generating (vendor, day) reports
+report_seed = None  # master seed for reproducible reports, None draws a new one
+chartlist_shuffle_memory_lines = 1000000  # charts held in memory per shuffle bucket
+report_generation_incremental = False  # only generate reports missing from the range
+
+# SQL Bulk Load Variables
+bulk_insert_strategy = "auto"  # auto, executemany, multirow or staged_file (opt-in)
+bulk_multirow_max_rows = 2000
+bulk_batch_size = 10000
+
+# Backfill Variables
+backfill_workers = 4  # parser processes used by auto_load_to_sql_tables
+
+# Recon Update Variables
+recon_update_mode = "delta"  # delta applies only journaled increments, full rescans
+recon_update_engine = "single_pass"  # single_pass or the original five_pass
+
+# Chart Increment Variables
+left_charts_compaction_ratio = 0.5  # compact a left charts queue past this consumed share
+chart_materialize_workers = 8  # threads creating empty chart files
+chart_materialize_chunk_size = 1000
+chart_materialize_fsync = False  # one fsync per chunk directory (per file on Windows)
+
+# Drop-off Layout Variables
+drop_off_layout = "flat"  # flat, or sharded into YYYYMMDD delivery date folders
+drop_off_mtime_tick_seconds = 2  # coarsest directory mtime resolution (FAT, SMB)
+
+# Drop-off Indexer Variables
+drop_off_indexer_enabled = False  # keep live drop-off sets while monitoring rru
+drop_off_indexer_checkpoint_seconds = 60
+drop_off_indexer_quiet_seconds = 1  # wait for events to settle before a checkpoint
+
+# Dispatcher Variables
+dispatcher_workers = 4  # threads processing new report files
+dispatcher_max_pending = 100  # queued and running files before overflow applies
+# A rejected file is logged and stays in input until its next event or a restart
+dispatcher_overflow = "block"  # block the observer, or reject
+
+# Trigger Coalescing Variables
+rru_trigger_debounce_seconds = 2  # quiet period before a coalesced update starts
+
+# Ingestion Variables
+ingest_stability_seconds = 1  # unchanged size needed to ingest without close events
+
+# Run Metrics Variables
+run_metrics_window = 200  # latest runs the p50/p95 stage timings are taken over
+run_metrics_port = None  # serve the metrics on localhost:<port>/metrics, None off
@@ -35,6 +35,24 @@ resource_loc = os.path.join(charts_base, "resources")
 charts_drop_off_location = os.path.join(charts_base, "charts_drop_off")
 payment_reconciliation_location = os.path.join(charts_base, "payment_reconciliation")
 
+# Chart Increment Journal
+chart_journal_file = os.path.join(resource_loc, "chart_increment_journal.txt")
+chart_journal_state_file = os.path.join(
+    resource_loc, "chart_increment_journal_state.json"
+)
+
+# Master seed of the generated reports, reused by incremental generation
+report_seed_file = os.path.join(resource_loc, "report_seed.json")
+
+# Drop-off Directory Snapshot Index
+drop_off_index_loc = os.path.join(resource_loc, "drop_off_index")
+
+# SQL Slow Query Log
+sql_slow_query_log = os.path.join(automation_base_loc, "sql_slow_queries.log")
+
+# SQL Bulk Load Staging Location
+sql_bulk_staging = os.path.join(data_base_location, "sql_bulk_staging")
+
 # Excel Setup
 excel_setup_location = os.path.join(project_location, "excel_setup")
 excel_filepath = os.path.join(excel_setup_location, excel_filename)
@@ -1,3 +1,4 @@
 from .charts_incrementor import *
 from .charts_setup import *
-from .charts_utils import *
\ No newline at end of file
+from .charts_utils import *
+from .charts_queue import *
\ No newline at end of file
@@ -1,10 +1,17 @@
 import os
-import pyodbc
 import json
-from utils import execute_stored_procedure
-from .charts_utils import get_print_vendor_lists_stats
+from utils import (
+    execute_stored_procedure,
+    append_chart_journal,
+    RESCAN_MARKER,
+    record_directory_additions,
+    ensure_directories_exist,
+    group_drop_off_charts,
+    drop_off_chart_path,
+)
+from .charts_utils import get_print_vendor_lists_stats, materialize_chart_files
+from .charts_queue import pop_left_charts, append_charts
 from config import (
-    conn_str,
     charts_drop_off_location as windows_location,
     payment_reconciliation_location as csv_location,
     resource_loc,
@@ -49,7 +56,10 @@ def increment_sql_charts(vndr_batch_sizes):
 
     Calls the stored procedure common.sp_increment_chartlookup for each vendor
     in the vndr_batch_sizes dictionary with the vendor name and batch size as
-    parameters.
+    parameters, and journals the moved charts for the delta recon update.
+    Vendors with a batch size of 0 are skipped, and an empty result set means
+    nothing was moved, which is an empty delta. A procedure returning no
+    result set at all predates the journal, so a rescan is journaled instead.
 
     Parameters
     ----------
@@ -62,21 +72,25 @@ def increment_sql_charts(vndr_batch_sizes):
     None
     """
 
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
     for vendor in vndr_batch_sizes.keys():
-        execute_stored_procedure(
+        if vndr_batch_sizes[vendor] == 0:
+            continue
+        moved_charts = execute_stored_procedure(
             "common.sp_increment_chartlookup", vendor, vndr_batch_sizes[vendor]
         )
-    conn.commit()
-    cursor.close()
-    conn.close()
+        if moved_charts is None:
+            # An older deployment of the procedure returns no result set, so
+            # the next delta update has to rescan everything
+            append_chart_journal(RESCAN_MARKER, vendor, [""])
+        elif moved_charts:
+            append_chart_journal("sql", vendor, [row[0] for row in moved_charts])
 
 
 def move_windows_charts(active_vendor, batch_size):
     """
     Moves the specified number of charts from the left_charts.txt file to the
-    main directory of charts for the given vendor.
+    main directory of charts for the given vendor. The left charts file is
+    consumed through its persisted cursor instead of being rewritten.
 
     Parameters
     ----------
@@ -94,42 +108,25 @@ def move_windows_charts(active_vendor, batch_size):
     # Construct vendor's folder path
     vendor_location = os.path.join(windows_location, active_vendor)
 
-    # Get all charts except left_charts.txt
-    selected_charts = os.listdir(vendor_location)
-    selected_charts.remove(f"{active_vendor}_left_charts.txt")
-
-    # Read the left charts list
+    # Take the next charts from the left charts queue
     left_charts_file_path = os.path.join(
         vendor_location, f"{active_vendor}_left_charts.txt"
     )
-    with open(left_charts_file_path, "r") as f:
-        left_charts = f.read().splitlines()
-
-    # Determine how many charts to move, ensure it's not more than available charts
-    move_count = min(batch_size, len(left_charts))
-
-    # Move the charts
-    charts_to_move = left_charts[:move_count]
-
-    # Update the remaining left charts
-    remaining_left_charts = left_charts[move_count:]
-
-    # Add moved charts to selected_charts
-    selected_charts.extend(charts_to_move)
-
-    # Create empty JSON files
-    for filename in charts_to_move:
-        file_path = os.path.join(vendor_location, filename)
-        # Create empty JSON files
-        with open(file_path, "w") as f:
-            pass  # This will create an empty file
-
-    with open(left_charts_file_path, "w") as f:
-        for i, chart in enumerate(remaining_left_charts):
-            if i < len(left_charts) - 1:
-                f.write(f"{chart}\n")
-            else:
-                f.write(f"{chart}")
+    charts_to_move = pop_left_charts(left_charts_file_path, batch_size)
+    move_count = len(charts_to_move)
+
+    # Create empty JSON files and add them to the drop-off snapshot index
+    chart_groups = group_drop_off_charts(active_vendor, charts_to_move)
+    ensure_directories_exist(*chart_groups)
+    previous_mtimes = {
+        directory: os.stat(directory).st_mtime_ns for directory in chart_groups
+    }
+    materialize_chart_files(
+        vendor_location, [drop_off_chart_path(chart) for chart in charts_to_move]
+    )
+    for directory, charts in chart_groups.items():
+        record_directory_additions(directory, charts, previous_mtimes[directory])
+    append_chart_journal("windows", active_vendor, charts_to_move)
 
     print(f"Moved {move_count} charts for vendor: {active_vendor}")
 
@@ -160,6 +157,10 @@ def move_csv_charts(active_vendor, batch_size):
     """
     Moves the given number of charts from the leftcharts.csv file to the charts_reconciliation.csv file for the given vendor.
 
+    The leftcharts.csv file is consumed through its persisted cursor and the
+    moved charts are appended to charts_reconciliation.csv, so neither file is
+    rewritten on every increment.
+
     Parameters
     ----------
     active_vendor : str
@@ -178,40 +179,15 @@ def move_csv_charts(active_vendor, batch_size):
     selected_charts_file_path = os.path.join(
         vendor_location, f"{active_vendor}_charts_reconciliation.csv"
     )
-    selected_charts = open(selected_charts_file_path, "r").read().splitlines()[1:]
-
     left_charts_file_path = os.path.join(
         vendor_location, f"{active_vendor}_leftcharts.csv"
     )
-    left_charts = open(left_charts_file_path, "r").read().splitlines()[1:]
-
-    # Determine how many charts to move, ensure it's not more than available charts
-    move_count = min(batch_size, len(left_charts))
-
-    # Move the charts
-    charts_to_move = left_charts[:move_count]
-
-    # Update the remaining left charts
-    remaining_left_charts = left_charts[move_count:]
-
-    # Add moved charts to selected_charts
-    selected_charts.extend(charts_to_move)
-
-    with open(left_charts_file_path, "w") as f:
-        f.write("chartname\n")
-        for i, chart in enumerate(remaining_left_charts):
-            if i < len(left_charts) - 1:
-                f.write(f"{chart}\n")
-            else:
-                f.write(f"{chart}")
-
-    with open(selected_charts_file_path, "w") as f:
-        f.write("chartname\n")
-        for i, chart in enumerate(selected_charts):
-            if i < len(selected_charts) - 1:
-                f.write(f"{chart}\n")
-            else:
-                f.write(f"{chart}")
+
+    # Take the next charts from the left charts queue and append them
+    charts_to_move = pop_left_charts(left_charts_file_path, batch_size, has_header=True)
+    move_count = len(charts_to_move)
+    # The delta recon update reads the appended charts from the CSV itself
+    append_charts(selected_charts_file_path, charts_to_move)
 
     print(f"Moved {move_count} charts for vendor: {active_vendor}")
 
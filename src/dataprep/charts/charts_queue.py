@@ -0,0 +1,250 @@
+import os
+import json
+from config import resource_loc, left_charts_compaction_ratio
+
+
+def queue_cursor_path(queue_path):
+    """
+    Returns the path of the cursor file kept for a left-charts queue file.
+
+    The cursor lives in the resource location rather than next to the queue,
+    so it never shows up in the vendor's chart listings.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+
+    Returns
+    -------
+    str
+        The path of the cursor JSON file.
+    """
+    return os.path.join(resource_loc, f"{os.path.basename(queue_path)}.cursor.json")
+
+
+def header_length(queue_path, has_header):
+    """
+    Returns the length in bytes of the header line of a queue file.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    has_header : bool
+        Whether the first line of the file is a header.
+
+    Returns
+    -------
+    int
+        The byte length of the header line, 0 if there is none.
+    """
+    if not has_header:
+        return 0
+    with open(queue_path, "rb") as f:
+        return len(f.readline())
+
+
+def load_queue_cursor(queue_path, has_header=False):
+    """
+    Loads the byte offset of the first unconsumed chart in a queue file.
+
+    The cursor stores the size and modification time of the file it was saved
+    for. If the file was rewritten since (a new chart setup or a fresh Excel
+    export), the cursor is stale and reading starts again after the header.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    has_header : bool, optional
+        Whether the first line of the file is a header. Defaults to False.
+
+    Returns
+    -------
+    int
+        The byte offset to resume reading from.
+    """
+    cursor_path = queue_cursor_path(queue_path)
+    if os.path.exists(cursor_path):
+        with open(cursor_path, "r") as f:
+            cursor = json.load(f)
+        stat = os.stat(queue_path)
+        if cursor["Size"] == stat.st_size and cursor["MtimeNs"] == stat.st_mtime_ns:
+            return cursor["Offset"]
+    return header_length(queue_path, has_header)
+
+
+def save_queue_cursor(queue_path, offset):
+    """
+    Saves the byte offset of the first unconsumed chart in a queue file.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    offset : int
+        The byte offset to resume reading from.
+
+    Returns
+    -------
+    None
+    """
+    stat = os.stat(queue_path)
+    cursor = {"Offset": offset, "Size": stat.st_size, "MtimeNs": stat.st_mtime_ns}
+    with open(queue_cursor_path(queue_path), "w") as f:
+        json.dump(cursor, f)
+
+
+def reset_queue_cursor(queue_path):
+    """
+    Removes the cursor of a queue file, so it is read from the start again.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+
+    Returns
+    -------
+    None
+    """
+    cursor_path = queue_cursor_path(queue_path)
+    if os.path.exists(cursor_path):
+        os.remove(cursor_path)
+
+
+def compact_queue(queue_path, offset, has_header=False):
+    """
+    Replaces a queue file with a copy without its consumed prefix and resets
+    its cursor.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    offset : int
+        The byte offset of the first unconsumed chart.
+    has_header : bool, optional
+        Whether the first line of the file is a header, kept on rewrite.
+        Defaults to False.
+
+    Returns
+    -------
+    None
+    """
+    with open(queue_path, "rb") as f:
+        header = f.readline() if has_header else b""
+        f.seek(offset)
+        remaining = f.read()
+    # Replace the file whole, so a crash never truncates the charts left. A
+    # crash before the cursor is saved leaves it stale, which also reads the
+    # compacted file from after its header
+    temp_file = f"{queue_path}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(header + remaining)
+    os.replace(temp_file, queue_path)
+    save_queue_cursor(queue_path, len(header))
+
+
+def pop_left_charts(queue_path, count, has_header=False):
+    """
+    Takes up to count charts from the front of a queue file.
+
+    The charts are consumed by advancing the persisted cursor instead of
+    rewriting the file. The file is compacted only once the consumed prefix
+    passes left_charts_compaction_ratio of its size.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    count : int
+        The maximum number of charts to take.
+    has_header : bool, optional
+        Whether the first line of the file is a header. Defaults to False.
+
+    Returns
+    -------
+    list
+        The charts taken from the queue, in file order.
+
+    Notes
+    -----
+    Until the file is compacted, it still holds the charts already taken.
+    The cursor file in the resource location is the source of truth for what
+    is left; read the queue through count_left_charts or pop_left_charts, not
+    the file alone. Set left_charts_compaction_ratio to 0 to compact on every
+    pop, so the file itself only holds the charts left, e.g. for the Excel
+    setup.
+    """
+    offset = load_queue_cursor(queue_path, has_header)
+    charts = []
+    with open(queue_path, "rb") as f:
+        f.seek(offset)
+        while len(charts) < count:
+            line = f.readline()
+            if not line:
+                break
+            offset += len(line)
+            chart = line.decode().rstrip("\r\n")
+            if chart:
+                charts.append(chart)
+
+    if offset > left_charts_compaction_ratio * os.path.getsize(queue_path):
+        compact_queue(queue_path, offset, has_header)
+    else:
+        save_queue_cursor(queue_path, offset)
+    return charts
+
+
+def count_left_charts(queue_path, has_header=False):
+    """
+    Counts the charts still waiting in a queue file.
+
+    Parameters
+    ----------
+    queue_path : str
+        The path of the left-charts queue file.
+    has_header : bool, optional
+        Whether the first line of the file is a header. Defaults to False.
+
+    Returns
+    -------
+    int
+        The number of unconsumed charts.
+    """
+    offset = load_queue_cursor(queue_path, has_header)
+    with open(queue_path, "rb") as f:
+        f.seek(offset)
+        return sum(1 for line in f if line.strip())
+
+
+def append_charts(file_path, charts):
+    """
+    Appends charts to a chart list file without rewriting it, keeping the
+    file free of a trailing newline.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the chart list file.
+    charts : list
+        The chart names to append.
+
+    Returns
+    -------
+    None
+    """
+    if not charts:
+        return
+    with open(file_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        ends_with_newline = f.tell() == 0
+        if not ends_with_newline:
+            f.seek(-1, os.SEEK_END)
+            ends_with_newline = f.read(1) == b"\n"
+    with open(file_path, "a") as f:
+        if not ends_with_newline:
+            f.write("\n")
+        f.write("\n".join(charts))
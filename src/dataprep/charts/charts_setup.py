@@ -1,11 +1,20 @@
 import os
-import pyodbc
 import random
-from utils import clear_folder
+from utils import (
+    clear_folder,
+    get_connection,
+    append_chart_journal,
+    RESCAN_MARKER,
+    reset_chart_journal,
+    ensure_directories_exist,
+    group_drop_off_charts,
+    drop_off_chart_path,
+)
+from .charts_queue import reset_queue_cursor
+from .charts_utils import materialize_chart_files
 from config import (
     report_base,
     charts_drop_off_location,
-    conn_str,
     active_vendor_list,
 )
 
@@ -120,20 +129,20 @@ def get_and_push_charts_tosql(active_vendor):
     limited_list = retain_random_charts(data_into_list)
     left_list = set(full_list) - set(limited_list)
 
-    # Connect to SQL Server
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
+    # Check out a pooled connection to SQL Server
+    with get_connection() as conn:
+        cursor = conn.cursor()
 
-    # Perform the delete and insert operations for both tables
-    clear_sql_table_and_insert(cursor, active_vendor, "chartlookup", limited_list)
-    clear_sql_table_and_insert(cursor, active_vendor, "leftcharts", left_list)
+        # Perform the delete and insert operations for both tables
+        clear_sql_table_and_insert(cursor, active_vendor, "chartlookup", limited_list)
+        clear_sql_table_and_insert(cursor, active_vendor, "leftcharts", left_list)
 
-    # Commit the transaction
-    conn.commit()
+        # Commit the transaction
+        conn.commit()
+        cursor.close()
+    # The chart lookup was rebuilt, so the journaled increments no longer apply
+    append_chart_journal(RESCAN_MARKER, active_vendor, [""])
 
-    # Close the connection
-    cursor.close()
-    conn.close()
     lists_dict = {
         "All Charts": full_list,
         "Limited Charts": limited_list,
@@ -172,8 +181,9 @@ def get_and_create_windows_charts(active_vendor):
     """
     Retrieves a list of chart names from a file in the specified vendor's directory,
     randomly selects a subset of charts (60% of total), creates empty JSON files
-    for the selected charts in the vendor's drop-off location, and saves the
-    remaining charts to a separate file.
+    for the selected charts in the vendor's drop-off location (bucketed into
+    delivery date folders in the sharded layout), and saves the remaining charts
+    to a separate file.
 
     Parameters
     ----------
@@ -207,12 +217,12 @@ def get_and_create_windows_charts(active_vendor):
     if not os.path.exists(vendor_charts_drop_off_location):
         os.makedirs(vendor_charts_drop_off_location)
 
-    # Create empty JSON files
-    for filename in limited_list:
-        file_path = os.path.join(vendor_charts_drop_off_location, filename)
-        # Create empty JSON files
-        with open(file_path, "w") as f:
-            pass  # This will create an empty file
+    # Create empty JSON files, in their shard directories for a sharded layout
+    ensure_directories_exist(*group_drop_off_charts(active_vendor, limited_list))
+    materialize_chart_files(
+        vendor_charts_drop_off_location,
+        [drop_off_chart_path(chart) for chart in limited_list],
+    )
 
     # Saving all left charts in a combined file
     leftcharts_name = f"{active_vendor}_left_charts.txt"
@@ -224,6 +234,7 @@ def get_and_create_windows_charts(active_vendor):
                 f.write(f"{chart}\n")
             else:
                 f.write(f"{chart}")
+    reset_queue_cursor(leftcharts_location)
     lists_dict = {
         "All Charts": full_list,
         "Limited Charts": limited_list,
@@ -247,6 +258,8 @@ def create_all_windows_charts():
     """
     global active_vendor_list
     clear_folder(charts_drop_off_location)
+    # A fresh chart setup invalidates the journaled increments
+    reset_chart_journal()
     all_charts = {}
 
     for vendor in active_vendor_list:
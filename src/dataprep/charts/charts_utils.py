@@ -1,18 +1,215 @@
 import os
-import pyodbc
 import json
+import time
+import tempfile
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pprint import pprint
-from utils import fetch_query
+from utils import (
+    fetch_query,
+    get_connection,
+    list_vendor_drop_off_charts,
+    ensure_directories_exist,
+    chart_shard,
+)
+from .charts_queue import count_left_charts
 from config import (
-    conn_str,
     report_base,
     charts_drop_off_location as windows_location,
     payment_reconciliation_location as csv_location,
     active_vendor_list,
     resource_loc,
+    chart_materialize_workers,
+    chart_materialize_chunk_size,
+    chart_materialize_fsync,
 )
 
 
+def create_chart_files_chunk(directory, filenames, fsync):
+    """
+    Creates one chunk of empty chart files in a directory.
+
+    With fsync, the new directory entries are flushed in one batch, a single
+    fsync of each directory the chunk touched, on POSIX systems. Directories
+    cannot be opened on Windows, so there each file is fsynced on its own and
+    nothing is batched.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the chart files are created in.
+    filenames : list
+        The chart file names of this chunk, optionally prefixed with an
+        existing subdirectory (the shard in the sharded drop-off layout).
+    fsync : bool
+        Whether to fsync the chunk's directories (each file on Windows) before
+        returning.
+
+    Returns
+    -------
+    int
+        The number of files created.
+    """
+    fsync_files = fsync and os.name == "nt"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    for filename in filenames:
+        fd = os.open(os.path.join(directory, filename), flags)
+        try:
+            if fsync_files:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    if fsync and not fsync_files:
+        for parent in {os.path.dirname(filename) for filename in filenames}:
+            dir_fd = os.open(os.path.join(directory, parent), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    return len(filenames)
+
+
+def materialize_chart_files(directory, filenames, workers=None, fsync=None):
+    """
+    Creates empty chart files in a directory using a bounded thread pool.
+
+    File creation is bound by filesystem metadata latency rather than CPU, so
+    the files are split into chunks of chart_materialize_chunk_size and the
+    chunks are created concurrently.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the chart files are created in.
+    filenames : list
+        The chart file names to create, optionally prefixed with an existing
+        subdirectory.
+    workers : int, optional
+        The number of threads to use. Defaults to chart_materialize_workers.
+    fsync : bool, optional
+        Whether to fsync each chunk once it is created, see
+        create_chart_files_chunk. Defaults to chart_materialize_fsync.
+
+    Returns
+    -------
+    dict
+        A dictionary with the number of "Files" created, the elapsed "Seconds"
+        and the resulting "FilesPerSec".
+    """
+    workers = workers or chart_materialize_workers
+    fsync = chart_materialize_fsync if fsync is None else fsync
+    filenames = list(filenames)
+    chunks = [
+        filenames[i : i + chart_materialize_chunk_size]
+        for i in range(0, len(filenames), chart_materialize_chunk_size)
+    ]
+
+    start = time.perf_counter()
+    created = 0
+    if len(chunks) == 1 or workers == 1:
+        for chunk in chunks:
+            created += create_chart_files_chunk(directory, chunk, fsync)
+    elif chunks:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            futures = [
+                executor.submit(create_chart_files_chunk, directory, chunk, fsync)
+                for chunk in chunks
+            ]
+            created = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "Files": created,
+        "Seconds": round(elapsed, 3),
+        "FilesPerSec": round(created / elapsed) if elapsed > 0 else 0,
+    }
+    print(
+        f"Created {stats['Files']} chart files in {directory} "
+        f"({stats['FilesPerSec']} files/sec)"
+    )
+    return stats
+
+
+def benchmark_drop_off_layouts(file_count=1000000, days=365, workers=None):
+    """
+    Compares the flat and sharded drop-off layouts on synthetic charts in a
+    temporary directory.
+
+    For each layout, the charts are created with materialize_chart_files,
+    listed with os.scandir, and deleted again, and each step is timed.
+
+    Parameters
+    ----------
+    file_count : int, optional
+        The number of chart files to create per layout. Defaults to 1,000,000.
+    days : int, optional
+        The number of delivery dates the charts are spread over, i.e. the
+        number of shards. Defaults to 365.
+    workers : int, optional
+        The number of threads creating the files. Defaults to
+        chart_materialize_workers.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each layout to its "Create", "List" and "Delete"
+        times in seconds.
+    """
+    first_day = date(2024, 1, 1)
+    charts = [
+        f"{(first_day + timedelta(days=i % days)).strftime('%Y%m%d')}T000000Z_"
+        f"{i}_Benchmark.json"
+        for i in range(file_count)
+    ]
+    layouts = {
+        "flat": charts,
+        "sharded": [os.path.join(chart_shard(chart), chart) for chart in charts],
+    }
+
+    results = {}
+    for layout, paths in layouts.items():
+        with tempfile.TemporaryDirectory() as directory:
+            if layout == "sharded":
+                shards = {os.path.dirname(path) for path in paths}
+                ensure_directories_exist(
+                    *[os.path.join(directory, shard) for shard in shards]
+                )
+
+            start = time.perf_counter()
+            materialize_chart_files(directory, paths, workers=workers, fsync=False)
+            create_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            listed = 0
+            pending = [directory]
+            while pending:
+                with os.scandir(pending.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            pending.append(entry.path)
+                        else:
+                            listed += 1
+            list_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for path in paths:
+                os.remove(os.path.join(directory, path))
+            delete_seconds = time.perf_counter() - start
+
+        results[layout] = {
+            "Create": round(create_seconds, 2),
+            "List": round(list_seconds, 2),
+            "Delete": round(delete_seconds, 2),
+        }
+        print(
+            f"{layout}: created {file_count} in {results[layout]['Create']}s, "
+            f"listed {listed} in {results[layout]['List']}s, "
+            f"deleted in {results[layout]['Delete']}s"
+        )
+    return results
+
+
 def get_vendor_lists_stats(cursor, active_vendor):
     """
     Retrieves and returns the number of charts in each location for the given vendor.
@@ -40,15 +237,9 @@ def get_vendor_lists_stats(cursor, active_vendor):
     )
 
     vendor_windows_location = os.path.join(windows_location, active_vendor)
-    windows_location_charts = os.listdir(vendor_windows_location)
-    windows_location_charts.remove(f"{active_vendor}_left_charts.txt")
-    windows_location_left_charts = (
-        open(
-            os.path.join(vendor_windows_location, f"{active_vendor}_left_charts.txt"),
-            "r",
-        )
-        .read()
-        .splitlines()
+    windows_location_charts = list_vendor_drop_off_charts(active_vendor)
+    windows_location_left_charts = count_left_charts(
+        os.path.join(vendor_windows_location, f"{active_vendor}_left_charts.txt")
     )
 
     vendor_csv_location = os.path.join(csv_location, active_vendor)
@@ -62,10 +253,9 @@ def get_vendor_lists_stats(cursor, active_vendor):
         .read()
         .splitlines()[1:]
     )
-    csv_location_left_charts = (
-        open(os.path.join(vendor_csv_location, f"{active_vendor}_leftcharts.csv"), "r")
-        .read()
-        .splitlines()[1:]
+    csv_location_left_charts = count_left_charts(
+        os.path.join(vendor_csv_location, f"{active_vendor}_leftcharts.csv"),
+        has_header=True,
     )
 
     sql_location_charts = fetch_query(cursor, active_vendor, "chartlookup")
@@ -76,8 +266,8 @@ def get_vendor_lists_stats(cursor, active_vendor):
         "Windows": len(windows_location_charts),
         "CSV": len(csv_location_charts),
         "SQL": len(sql_location_charts),
-        "Windows Left": len(windows_location_left_charts),
-        "CSV Left": len(csv_location_left_charts),
+        "Windows Left": windows_location_left_charts,
+        "CSV Left": csv_location_left_charts,
         "SQL Left": len(sql_location_left_charts),
     }
     return lists_dict
@@ -100,15 +290,13 @@ def get_print_vendor_lists_stats():
     -------
     None
     """
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
-    for vendor in active_vendor_list:
-        print(vendor)
-        pprint(get_vendor_lists_stats(cursor, vendor), sort_dicts=False)
-        print()
-    # Close the connection
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for vendor in active_vendor_list:
+            print(vendor)
+            pprint(get_vendor_lists_stats(cursor, vendor), sort_dicts=False)
+            print()
+        cursor.close()
 
 
 def get_and_save_batch_size():
@@ -134,11 +322,11 @@ def get_and_save_batch_size():
         # Construct the path to the vendor's CSV file
         vendor_csv_location = os.path.join(csv_location, active_vendor)
 
-        # Read the leftcharts file and count the charts, skipping the header
-        with open(
-            os.path.join(vendor_csv_location, f"{active_vendor}_leftcharts.csv"), "r"
-        ) as f:
-            left_charts_count = len(f.read().splitlines()[1:])
+        # Count the charts not yet consumed from the leftcharts file
+        left_charts_count = count_left_charts(
+            os.path.join(vendor_csv_location, f"{active_vendor}_leftcharts.csv"),
+            has_header=True,
+        )
 
         # Calculate the sample size (10% of the total charts)
         sample_size = left_charts_count // 10
@@ -1,9 +1,18 @@
 import datetime
 import random
 import os
-from utils import clear_folder
+import json
+import time
+import zlib
+import tempfile
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils import clear_folder, ensure_directories_exist
 from config import (
     report_base,
+    report_seed_file,
     datetime_format,
     date_format,
     time_format,
@@ -17,8 +26,18 @@ from config import (
     mem_id_start,
     mem_id_end,
     active_vendor_list,
+    report_generator_engine,
+    report_workers,
+    report_seed,
+    chartlist_shuffle_memory_lines,
+    report_generation_incremental,
 )
 
+# Generator used by the vectorized engine when no generator is passed in
+default_rng = np.random.default_rng()
+# '_<member>_<health_system>.json' chart name suffixes per vendor
+chart_suffix_cache = {}
+
 
 def generate_member_list(memid_start, memid_end):
     """
@@ -38,13 +57,16 @@ def generate_member_list(memid_start, memid_end):
     """
 
     global member_list
+    chart_suffix_cache.clear()
     member_list = []
     for i in range(memid_start, memid_end + 1):
         member_id = f"MBR{i:05d}"
         member_list.append(member_id)
 
 
-def create_chartlist(start_dttm, end_dttm, total_report_chart, active_vendor):
+def create_chartlist(
+    start_dttm, end_dttm, total_report_chart, active_vendor, rng=None
+):
     """
     Generates a list of chart names and their corresponding timestamps.
 
@@ -65,6 +87,8 @@ def create_chartlist(start_dttm, end_dttm, total_report_chart, active_vendor):
         The total number of charts to generate.
     active_vendor : str
         The name of the active vendor for which the charts are being generated.
+    rng : random.Random, optional
+        The random generator to draw from. Defaults to the random module.
 
     Returns
     -------
@@ -74,6 +98,7 @@ def create_chartlist(start_dttm, end_dttm, total_report_chart, active_vendor):
         - List of corresponding chart timestamps as datetime objects.
     """
     global member_list, health_systems_list, datetime_format
+    rng = random if rng is None else rng
     time_difference = (end_dttm - start_dttm).total_seconds()
     created_chartlist = []
     all_timestamps = []
@@ -81,11 +106,11 @@ def create_chartlist(start_dttm, end_dttm, total_report_chart, active_vendor):
     select_health_systems = health_systems_list[active_vendor]
 
     for i in range(total_report_chart):
-        random_seconds = random.uniform(0, time_difference)
+        random_seconds = rng.uniform(0, time_difference)
         chart_datetime = start_dttm + datetime.timedelta(seconds=random_seconds)
         chart_timestamp = chart_datetime.strftime(datetime_format)
-        chart_member = random.choice(member_list)
-        chart_health_system = random.choice(select_health_systems)
+        chart_member = rng.choice(member_list)
+        chart_health_system = rng.choice(select_health_systems)
         chart_name = (
             chart_timestamp + "_" + chart_member + "_" + chart_health_system + ".json"
         )
@@ -94,6 +119,153 @@ def create_chartlist(start_dttm, end_dttm, total_report_chart, active_vendor):
     return created_chartlist, all_timestamps
 
 
+def build_time_table(prefix, suffix=b""):
+    """
+    Builds a lookup table of the numbers 00 to 59 as 8-byte words, with the two
+    digits placed after prefix and followed by suffix, zero bytes elsewhere.
+
+    Words for different positions can be added together to assemble the time
+    part of a timestamp, whatever the byte order of the machine.
+
+    Parameters
+    ----------
+    prefix : bytes
+        The bytes before the two digits.
+    suffix : bytes, optional
+        The bytes after the two digits.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array of 60 uint64 words.
+    """
+    words = [prefix + f"{i:02d}".encode() + suffix for i in range(60)]
+    return np.array(words, dtype="S8").view(np.uint64)
+
+
+# 'T<hh>', '<mm>' and '<ss>Z' at their offsets in the 'THHMMSSZ' half of a timestamp
+hour_table = build_time_table(b"T")
+minute_table = build_time_table(b"\0" * 3)
+second_table = build_time_table(b"\0" * 5, b"Z")
+
+
+def format_chart_timestamps(timestamps):
+    """
+    Formats an array of timestamps in datetime_format ('%Y%m%dT%H%M%SZ') in bulk.
+
+    Instead of calling strftime per timestamp, each timestamp is assembled as
+    two 8-byte words: the date part, looked up from the few distinct days in
+    the array, and the time part, added up from the hour, minute and second
+    lookup tables.
+
+    Parameters
+    ----------
+    timestamps : numpy.ndarray
+        An array of datetime64 values, truncated to whole seconds.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array of 16-byte strings, e.g. b'20240327T101500Z'.
+    """
+    if datetime_format != "%Y%m%dT%H%M%SZ":
+        raise ValueError(
+            f"Unsupported datetime_format for the vectorized engine: {datetime_format}"
+        )
+    seconds = timestamps.astype("datetime64[s]").astype(np.int64)
+    days, day_seconds = np.divmod(seconds, 86400)
+    first_day = days.min()
+    day_range = np.arange(first_day, days.max() + 1).astype("datetime64[D]")
+    date_table = np.array(
+        [day.replace("-", "").encode() for day in np.datetime_as_string(day_range)],
+        dtype="S8",
+    ).view(np.uint64)
+    hours, hour_seconds = np.divmod(day_seconds, 3600)
+    minutes, secs = np.divmod(hour_seconds, 60)
+
+    formatted = np.empty((len(timestamps), 2), dtype=np.uint64)
+    formatted[:, 0] = date_table[days - first_day]
+    formatted[:, 1] = hour_table[hours] + minute_table[minutes] + second_table[secs]
+    return formatted.view("S16").ravel()
+
+
+def get_chart_suffixes(active_vendor):
+    """
+    Returns every '_<member>_<health_system>.json' chart name suffix of a vendor,
+    indexed by member index * number of health systems + health system index.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the active vendor.
+
+    Returns
+    -------
+    numpy.ndarray
+        An array of byte strings.
+    """
+    if active_vendor not in chart_suffix_cache:
+        chart_suffix_cache[active_vendor] = np.array(
+            [
+                f"_{member}_{health_system}.json".encode()
+                for member in member_list
+                for health_system in health_systems_list[active_vendor]
+            ]
+        )
+    return chart_suffix_cache[active_vendor]
+
+
+def create_chartlist_vectorized(
+    start_dttm, end_dttm, total_report_chart, active_vendor, rng=None
+):
+    """
+    Generates a list of chart names and their timestamps with NumPy.
+
+    Produces the same format and distribution as create_chartlist: uniform
+    timestamps within the range, uniformly chosen members and health systems.
+    The timestamps, member indices and health system indices are drawn as
+    arrays and the chart names are formatted in bulk.
+
+    Parameters
+    ----------
+    start_dttm : datetime
+        The starting datetime for the chart timestamps.
+    end_dttm : datetime
+        The ending datetime for the chart timestamps.
+    total_report_chart : int
+        The total number of charts to generate.
+    active_vendor : str
+        The name of the active vendor for which the charts are being generated.
+    rng : numpy.random.Generator, optional
+        The random generator to draw from. Defaults to a module-level generator.
+
+    Returns
+    -------
+    tuple
+        A tuple containing the list of generated chart names and an array of the
+        corresponding chart timestamps as datetime64 values.
+    """
+    rng = default_rng if rng is None else rng
+    if total_report_chart == 0:
+        return [], np.array([], dtype="datetime64[us]")
+    time_difference = (end_dttm - start_dttm).total_seconds()
+    health_system_count = len(health_systems_list[active_vendor])
+
+    offsets = rng.uniform(0, time_difference, total_report_chart) * 1e6
+    timestamps = np.datetime64(start_dttm, "us") + offsets.astype("timedelta64[us]")
+    member_idx = rng.integers(0, len(member_list), total_report_chart)
+    health_system_idx = rng.integers(0, health_system_count, total_report_chart)
+
+    suffixes = get_chart_suffixes(active_vendor)
+    chart_names = np.char.add(
+        format_chart_timestamps(timestamps),
+        suffixes[member_idx * health_system_count + health_system_idx],
+    )
+    # Decoding one joined buffer is cheaper than decoding each name
+    chart_names = b"\n".join(chart_names.tolist()).decode().split("\n")
+    return chart_names, timestamps
+
+
 def create_content_base(
     report_dt_range, chart_no, dt_actual_start, dt_actual_end, chartlist
 ):
@@ -132,7 +304,7 @@ Last Chart Delivered at: {dt_actual_end}
     return content_base
 
 
-def create_duplicate_charts(charts, chartno):
+def create_duplicate_charts(charts, chartno, rng=None):
     """
     Creates a list of charts with duplicates.
 
@@ -147,22 +319,65 @@ def create_duplicate_charts(charts, chartno):
         The list of chart names.
     chartno : int
         The total number of charts.
+    rng : random.Random, optional
+        The random generator to draw from. Defaults to the random module.
 
     Returns
     -------
     list
         The list of chart names with duplicates.
     """
+    rng = random if rng is None else rng
     maxdups = int(chartno * 0.15)
-    rand_no = random.uniform(0, 1)
+    rand_no = rng.uniform(0, 1)
     skewed_value = rand_no**2.5
     actual_dups = int(skewed_value * maxdups)
     for dup in range(actual_dups):
-        charts.append(random.choice(charts))
+        charts.append(rng.choice(charts))
+    return charts
+
+
+def create_duplicate_charts_vectorized(charts, chartno, rng=None):
+    """
+    Creates a list of charts with duplicates, drawing all duplicates at once.
+
+    Follows the same distribution as create_duplicate_charts, where each
+    duplicate is drawn from the list including the duplicates appended before
+    it: a draw past the original charts is resolved to the earlier duplicate
+    it points at.
+
+    Parameters
+    ----------
+    charts : list
+        The list of chart names.
+    chartno : int
+        The total number of charts.
+    rng : numpy.random.Generator, optional
+        The random generator to draw from. Defaults to a module-level generator.
+
+    Returns
+    -------
+    list
+        The list of chart names with duplicates.
+    """
+    rng = default_rng if rng is None else rng
+    maxdups = int(chartno * 0.15)
+    skewed_value = rng.uniform(0, 1) ** 2.5
+    actual_dups = int(skewed_value * maxdups)
+    original_count = len(charts)
+
+    picks = rng.random(actual_dups) * (original_count + np.arange(actual_dups))
+    picks = picks.astype(np.int64)
+    while True:
+        later = picks >= original_count
+        if not later.any():
+            break
+        picks[later] = picks[picks[later] - original_count]
+    charts.extend([charts[i] for i in picks.tolist()])
     return charts
 
 
-def create_report_content(report_date, active_vendor):
+def create_report_content(report_date, active_vendor, rng=None):
     """
     Generates a report content given the report date and active vendor.
 
@@ -171,7 +386,8 @@ def create_report_content(report_date, active_vendor):
     between the minimum and maximum limits. The start and end times of the report
     are also randomly chosen between the minimum and maximum limits. The resulting
     chart names and timestamps are then used to create a report content string
-    and a list of chart names.
+    and a list of chart names. The charts are drawn by the engine selected with
+    report_generator_engine.
 
     Parameters
     ----------
@@ -179,6 +395,9 @@ def create_report_content(report_date, active_vendor):
         The date of the report.
     active_vendor : str
         The name of the active vendor.
+    rng : random.Random or numpy.random.Generator, optional
+        The random generator to draw from, a numpy Generator for the vectorized
+        engine. Defaults to the random module or the module-level generator.
 
     Returns
     -------
@@ -190,21 +409,49 @@ def create_report_content(report_date, active_vendor):
     report_stop_time = datetime.datetime.strptime(time_stop, time_format).time()
     report_day_start = report_date - datetime.timedelta(days=1)
     report_day_end = report_date
-    report_chart_no = random.randint(min_chart, max_chart)
+    if report_generator_engine == "vectorized":
+        rng = default_rng if rng is None else rng
+        report_chart_no = int(rng.integers(min_chart, max_chart + 1))
+    else:
+        rng = random if rng is None else rng
+        report_chart_no = rng.randint(min_chart, max_chart)
     report_valid_dt_start = datetime.datetime.combine(
         report_day_start, report_start_time
     )
     report_valid_dt_end = datetime.datetime.combine(report_day_end, report_stop_time)
-    report_chartlist, report_chart_timestamps = create_chartlist(
-        report_valid_dt_start, report_valid_dt_end, report_chart_no, active_vendor
-    )
-    for_dup_report_chartlist = report_chartlist.copy()
-    final_report_chartlist = create_duplicate_charts(
-        for_dup_report_chartlist, report_chart_no
-    )
+    if report_generator_engine == "vectorized":
+        report_chartlist, report_chart_timestamps = create_chartlist_vectorized(
+            report_valid_dt_start,
+            report_valid_dt_end,
+            report_chart_no,
+            active_vendor,
+            rng,
+        )
+        final_report_chartlist = create_duplicate_charts_vectorized(
+            report_chartlist.copy(), report_chart_no, rng
+        )
+        first_chart_dt, last_chart_dt = (
+            format_chart_timestamps(
+                np.array([report_chart_timestamps.min(), report_chart_timestamps.max()])
+            )
+            .astype(str)
+            .tolist()
+        )
+    else:
+        report_chartlist, report_chart_timestamps = create_chartlist(
+            report_valid_dt_start,
+            report_valid_dt_end,
+            report_chart_no,
+            active_vendor,
+            rng,
+        )
+        for_dup_report_chartlist = report_chartlist.copy()
+        final_report_chartlist = create_duplicate_charts(
+            for_dup_report_chartlist, report_chart_no, rng
+        )
+        first_chart_dt = min(report_chart_timestamps).strftime(datetime_format)
+        last_chart_dt = max(report_chart_timestamps).strftime(datetime_format)
     final_report_chart_no = len(final_report_chartlist)
-    first_chart_dt = min(report_chart_timestamps).strftime(datetime_format)
-    last_chart_dt = max(report_chart_timestamps).strftime(datetime_format)
     report_date_range = f"{report_day_start.strftime(date_format)}{time_start} to {report_day_end.strftime(date_format)}{time_stop}"
     report_content = create_content_base(
         report_date_range,
@@ -216,14 +463,298 @@ def create_report_content(report_date, active_vendor):
     return report_content, report_chartlist
 
 
-def generate_files(active_vendor):
+def vendor_seed_key(active_vendor):
+    """
+    Returns a stable integer key for a vendor, used in the seed of its tasks.
+
+    Python's hash() is salted per process, so a CRC32 of the name is used to
+    get the same key in every worker and every run.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the vendor.
+
+    Returns
+    -------
+    int
+        The vendor's seed key.
+    """
+    return zlib.crc32(active_vendor.encode())
+
+
+def create_task_rng(master_seed, *keys):
+    """
+    Creates the random generator of one generation task.
+
+    The generator is seeded from a SeedSequence of the master seed and the task
+    keys, so every task gets an independent stream that does not depend on
+    which worker runs it or in which order.
+
+    Parameters
+    ----------
+    master_seed : int
+        The master seed of the generation run.
+    *keys : int
+        The integer keys of the task, e.g. the vendor key and the day ordinal.
+
+    Returns
+    -------
+    random.Random or numpy.random.Generator
+        A numpy Generator for the vectorized engine, a random.Random otherwise.
+    """
+    seed_sequence = np.random.SeedSequence([master_seed, *keys])
+    if report_generator_engine == "vectorized":
+        return np.random.default_rng(seed_sequence)
+    return random.Random(int(seed_sequence.generate_state(2, np.uint64)[0]))
+
+
+def generate_report_file(active_vendor, report_date, master_seed):
+    """
+    Generates and saves the daily report of one vendor and day.
+
+    This is the unit of work of the generation pool: its randomness comes
+    only from the (vendor, day) seed stream of the master seed.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the active vendor.
+    report_date : date
+        The date of the report.
+    master_seed : int
+        The master seed of the generation run.
+
+    Returns
+    -------
+    list
+        The unique chart names of the report.
+    """
+    rng = create_task_rng(
+        master_seed, vendor_seed_key(active_vendor), report_date.toordinal()
+    )
+    report_content, report_charts = create_report_content(
+        report_date, active_vendor, rng
+    )
+    report_name = f"{active_vendor}_daily_report_{report_date.strftime(date_format)}"
+    report_location = os.path.join(report_base, active_vendor, f"{report_name}.txt")
+    with open(report_location, "w") as f:
+        f.write(report_content)
+    return report_charts
+
+
+def write_shuffled_chartlist(
+    charts, chartlist_location, rng, expected_count, append=False
+):
+    """
+    Writes charts to a chartlist file in a random order, using a disk-backed
+    external shuffle that keeps at most about chartlist_shuffle_memory_lines
+    charts in memory.
+
+    Each chart is scattered to a randomly chosen bucket file in a temporary
+    directory, then every bucket is shuffled in memory and appended to the
+    chartlist. A uniform random bucket per chart followed by a uniform shuffle
+    of every bucket gives a uniform shuffle of the whole list. The chartlist
+    has one chart per line and no trailing newline.
+
+    Parameters
+    ----------
+    charts : iterable
+        The charts to write, consumed once as a stream.
+    chartlist_location : str
+        The path of the chartlist file.
+    rng : random.Random
+        The random generator used for the scatter and the shuffles.
+    expected_count : int
+        The expected number of charts, used to size the buckets.
+    append : bool, optional
+        Append the shuffled charts to an existing chartlist as one block
+        instead of overwriting it. Defaults to False.
+
+    Returns
+    -------
+    int
+        The number of charts written.
+    """
+    bucket_count = max(1, -(-expected_count // chartlist_shuffle_memory_lines))
+    written = 0
+    with tempfile.TemporaryDirectory() as bucket_dir:
+        bucket_paths = [
+            os.path.join(bucket_dir, f"bucket_{i}.txt") for i in range(bucket_count)
+        ]
+        buckets = [open(path, "w") for path in bucket_paths]
+        try:
+            for chart in charts:
+                buckets[rng.randrange(bucket_count)].write(f"{chart}\n")
+        finally:
+            for bucket in buckets:
+                bucket.close()
+
+        # An existing chartlist has no trailing newline, so separate the block
+        needs_separator = (
+            append
+            and os.path.exists(chartlist_location)
+            and os.path.getsize(chartlist_location) > 0
+        )
+        with open(chartlist_location, "a" if append else "w") as f:
+            for path in bucket_paths:
+                with open(path, "r") as bucket:
+                    bucket_charts = bucket.read().splitlines()
+                rng.shuffle(bucket_charts)
+                if bucket_charts:
+                    if written or needs_separator:
+                        f.write("\n")
+                    f.write("\n".join(bucket_charts))
+                    written += len(bucket_charts)
+    return written
+
+
+def get_existing_report_dates(active_vendor):
+    """
+    Returns the dates of the daily reports already generated for a vendor.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the active vendor.
+
+    Returns
+    -------
+    set
+        The dates of the existing '<vendor>_daily_report_<date>.txt' files.
+    """
+    output_location = os.path.join(report_base, active_vendor)
+    if not os.path.exists(output_location):
+        return set()
+    report_prefix = f"{active_vendor}_daily_report_"
+    existing_dates = set()
+    for file_name in os.listdir(output_location):
+        if file_name.startswith(report_prefix) and file_name.endswith(".txt"):
+            report_date = file_name[len(report_prefix) : -len(".txt")]
+            try:
+                report_date = datetime.datetime.strptime(report_date, date_format)
+            except ValueError:
+                # Not a generated report, e.g. a renamed copy
+                continue
+            existing_dates.add(report_date.date())
+    return existing_dates
+
+
+def load_report_seed():
+    """
+    Loads the master seed the existing reports were generated with.
+
+    Returns
+    -------
+    int or None
+        The saved master seed, None if none has been saved.
+    """
+    if not os.path.exists(report_seed_file):
+        return None
+    with open(report_seed_file, "r") as f:
+        return json.load(f)["Seed"]
+
+
+def save_report_seed(seed):
+    """
+    Saves the master seed of a report generation run, for the incremental
+    runs extending its reports.
+
+    Parameters
+    ----------
+    seed : int
+        The master seed.
+
+    Returns
+    -------
+    None
+    """
+    ensure_directories_exist(os.path.dirname(report_seed_file))
+    with open(report_seed_file, "w") as f:
+        json.dump({"Seed": seed}, f)
+
+
+def iter_report_days(active_vendor, report_dates, master_seed, executor=None, window=2):
+    """
+    Generates the daily reports of a vendor and yields their chart lists in
+    date order.
+
+    On a process pool, only a window of days is submitted ahead of the one
+    being consumed, so the finished chart lists waiting in this process stay
+    bounded however slowly they are consumed.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the active vendor.
+    report_dates : list
+        The dates of the reports, in order.
+    master_seed : int
+        The master seed of the generation run.
+    executor : concurrent.futures.ProcessPoolExecutor, optional
+        The pool generating the days. If not provided, the days are generated
+        in this process.
+    window : int, optional
+        The maximum number of days submitted and not consumed yet. Defaults
+        to 2.
+
+    Yields
+    ------
+    list
+        The chart names of each report, in date order.
+    """
+    if executor is None:
+        for report_date in report_dates:
+            yield generate_report_file(active_vendor, report_date, master_seed)
+        return
+    date_iter = iter(report_dates)
+    pending = deque(
+        executor.submit(generate_report_file, active_vendor, report_date, master_seed)
+        for report_date in islice(date_iter, window)
+    )
+    while pending:
+        yield pending.popleft().result()
+        # Refill once the day is consumed, so window bounds the days held here
+        next_date = next(date_iter, None)
+        if next_date is not None:
+            pending.append(
+                executor.submit(
+                    generate_report_file, active_vendor, next_date, master_seed
+                )
+            )
+
+
+def generate_files(
+    active_vendor, master_seed, executor=None, incremental=False, window=2
+):
     """
     Generates daily reports and saves them to the specified report base location.
 
+    Each day is generated from its own (vendor, day) seed stream, on the given
+    process pool if any, so the output only depends on the master seed and not
+    on the number of workers. The charts of each report are streamed into
+    write_shuffled_chartlist as the reports come in, with at most a window of
+    days generated ahead, so memory use does not grow with the date range.
+
+    In incremental mode only the dates without an existing report are
+    generated, and their charts are appended to the existing chartlist as one
+    shuffled block, leaving the charts already in it untouched.
+
     Parameters
     ----------
     active_vendor : str
         The name of the active vendor.
+    master_seed : int
+        The master seed of the generation run.
+    executor : concurrent.futures.ProcessPoolExecutor, optional
+        The pool generating the days. If not provided, the days are generated
+        in this process.
+    incremental : bool, optional
+        Generate only the missing dates and append to the chartlist. Defaults
+        to False.
+    window : int, optional
+        The maximum number of days generated ahead of the chartlist writer on
+        the pool. Defaults to 2.
 
     Returns
     -------
@@ -231,53 +762,146 @@ def generate_files(active_vendor):
     """
     global date_range_start, date_range_end, date_format, report_base
     output_location = os.path.join(report_base, active_vendor)
-    all_charts = []
-    current_date = date_range_start
-    while current_date <= date_range_end:
-        report_date = current_date.strftime(date_format)
-        report_name = f"{active_vendor}_daily_report_{report_date}.txt"
-        report_content, report_charts = create_report_content(
-            current_date, active_vendor
-        )
-        all_charts.extend(report_charts)
-        if not os.path.exists(output_location):
-            os.makedirs(output_location)
-        report_location = os.path.join(output_location, report_name)
-        with open(report_location, "w") as f:
-            f.write(report_content)
-
-        current_date += datetime.timedelta(days=1)
+    if not os.path.exists(output_location):
+        os.makedirs(output_location)
+
+    day_count = (date_range_end - date_range_start).days + 1
+    report_dates = [
+        date_range_start + datetime.timedelta(days=i) for i in range(day_count)
+    ]
+    shuffle_keys = [master_seed, vendor_seed_key(active_vendor)]
+    if incremental:
+        existing_dates = get_existing_report_dates(active_vendor)
+        report_dates = [date for date in report_dates if date not in existing_dates]
+        if not report_dates:
+            print(f"No missing reports for vendor: {active_vendor}")
+            return
+        print(f"Generating {len(report_dates)} missing reports for: {active_vendor}")
+        day_count = len(report_dates)
+        # Each appended block gets its own shuffle stream
+        shuffle_keys.append(report_dates[0].toordinal())
+    day_charts = iter_report_days(
+        active_vendor, report_dates, master_seed, executor, window
+    )
+    # Results come back in date order whatever the worker count
+    all_charts = (chart for charts in day_charts for chart in charts)
 
     # Saving all charts from all reports in a combined file
     chartlist_name = f"{active_vendor}_chartlist.txt"
     chartlist_location = os.path.join(output_location, chartlist_name)
     # random shuffling chart list for help in random selecting in excel
-    random.shuffle(all_charts)
-    with open(chartlist_location, "w") as f:
-        for i, chart in enumerate(all_charts):
-            if i < len(all_charts) - 1:
-                f.write(f"{chart}\n")
-            else:
-                f.write(f"{chart}")
+    shuffle_seed = np.random.SeedSequence(shuffle_keys)
+    shuffle_rng = random.Random(int(shuffle_seed.generate_state(1)[0]))
+    expected_count = day_count * (min_chart + max_chart) // 2
+    write_shuffled_chartlist(
+        all_charts, chartlist_location, shuffle_rng, expected_count, incremental
+    )
 
 
-def generate_all_vendor_reports():
+def generate_all_vendor_reports(workers=None, seed=None, incremental=None):
     """
     Generates all reports for all active vendors.
 
     This function will clear the report base location, generate the member list
     file, and then generate reports for each active vendor using the
-    generate_files function.
+    generate_files function. The (vendor, day) reports are generated on a pool
+    of worker processes, and the same seed gives identical output for any
+    number of workers.
+
+    In incremental mode the report base location is kept and only the reports
+    missing for the configured date range and vendors are generated, so
+    extending date_range_end costs time in proportion to the added days.
 
     Parameters
     ----------
-    None
+    workers : int, optional
+        The number of worker processes. Defaults to the report_workers config
+        value; 1 generates everything in this process.
+    seed : int, optional
+        The master seed. Defaults to the report_seed config value. If that is
+        None too, an incremental run reuses the seed saved with the existing
+        reports, and a full run draws a fresh seed (printed so the run can be
+        reproduced). The seed used is saved for later incremental runs.
+    incremental : bool, optional
+        Generate only the missing reports. Defaults to the
+        report_generation_incremental config value.
 
     Returns
     -------
     None
     """
-    clear_folder(report_base)
+    workers = workers or report_workers
+    if incremental is None:
+        incremental = report_generation_incremental
+    if seed is None:
+        seed = report_seed
+    saved_seed = load_report_seed() if incremental else None
+    if seed is None:
+        seed = saved_seed
+    elif saved_seed is not None and seed != saved_seed:
+        print(
+            f"Warning: seed {seed} differs from the seed {saved_seed} of the "
+            "existing reports, the added reports will not match a full run"
+        )
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+    print(f"Generating reports with seed {seed} on {workers} worker(s)")
+
+    if not incremental:
+        clear_folder(report_base)
+    if not incremental or saved_seed is None:
+        save_report_seed(seed)
+    generate_member_list(mem_id_start, mem_id_end)
+    if workers == 1:
+        for vendor in active_vendor_list:
+            generate_files(vendor, seed, incremental=incremental)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=generate_member_list,
+        initargs=(mem_id_start, mem_id_end),
+    ) as executor:
+        # Keep a few days per worker queued up ahead of the chartlist writer
+        for vendor in active_vendor_list:
+            generate_files(vendor, seed, executor, incremental, workers * 2)
+
+
+def benchmark_report_generators(total_charts=10000000):
+    """
+    Compares the vectorized chart generation with the original Python loop.
+
+    Both engines generate total_charts charts, with their duplicates, in
+    report-sized batches of max_chart charts for the first active vendor.
+
+    Parameters
+    ----------
+    total_charts : int, optional
+        The number of charts generated per engine. Defaults to 10,000,000.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each engine to its run time in seconds.
+    """
     generate_member_list(mem_id_start, mem_id_end)
-    for vendor in active_vendor_list:
-        generate_files(active_vendor=vendor)
+    vendor = active_vendor_list[0]
+    start_dttm = datetime.datetime.combine(date_range_start, datetime.time())
+    end_dttm = start_dttm + datetime.timedelta(days=1)
+    engines = {
+        "python": (create_chartlist, create_duplicate_charts),
+        "vectorized": (create_chartlist_vectorized, create_duplicate_charts_vectorized),
+    }
+
+    timings = {}
+    for engine, (chartlist_function, duplicates_function) in engines.items():
+        start = time.perf_counter()
+        remaining = total_charts
+        while remaining > 0:
+            batch = min(max_chart, remaining)
+            charts, _ = chartlist_function(start_dttm, end_dttm, batch, vendor)
+            duplicates_function(charts, batch)
+            remaining -= batch
+        timings[engine] = time.perf_counter() - start
+        print(f"{engine}: {total_charts} charts in {timings[engine]:.2f}s")
+    print(f"Speedup: {timings['python'] / timings['vectorized']:.1f}x")
+    return timings
@@ -1,2 +1,5 @@
 from .basic_utils import *
-from .sql_connect import *
\ No newline at end of file
+from .sql_connect import *
+from .sql_bulk import *
+from .chart_journal import *
+from .drop_off_index import *
\ No newline at end of file
@@ -19,6 +19,8 @@ from config import (
     resource_loc,
     charts_drop_off_location,
     payment_reconciliation_location,
+    drop_off_index_loc,
+    sql_bulk_staging,
     excel_setup_location,
     excel_filepath,
 )
@@ -144,6 +146,8 @@ def ensuring_project_directories_all_exist():
         resource_loc,
         charts_drop_off_location,
         payment_reconciliation_location,
+        drop_off_index_loc,
+        sql_bulk_staging,
         excel_setup_location,
     )
 
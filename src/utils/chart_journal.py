@@ -0,0 +1,185 @@
+import os
+import json
+from config import chart_journal_file, chart_journal_state_file
+
+# Locations a chart can be moved into by an increment; CSV moves are no longer
+# journaled, but older journals may still hold them
+JOURNAL_LOCATIONS = ("windows", "csv", "sql")
+# Journal entry asking the next delta update to fall back to a full rescan
+RESCAN_MARKER = "rescan"
+
+
+def append_chart_journal(location, vendor, charts):
+    """
+    Appends the charts moved by an increment to the chart change journal.
+
+    Each entry is one tab-separated line: location, vendor and chart name.
+
+    Parameters
+    ----------
+    location : str
+        The location the charts were moved into: 'windows' or 'sql', or
+        'rescan' to request a full rescan on the next delta update.
+    vendor : str
+        The name of the vendor.
+    charts : list
+        The chart names that were moved.
+
+    Returns
+    -------
+    None
+    """
+    with open(chart_journal_file, "a") as f:
+        f.writelines(f"{location}\t{vendor}\t{chart}\n" for chart in charts)
+
+
+def chart_journal_size():
+    """
+    Returns the current size of the chart change journal in bytes.
+
+    Returns
+    -------
+    int
+        The journal size, 0 if the journal does not exist yet.
+    """
+    if not os.path.exists(chart_journal_file):
+        return 0
+    return os.path.getsize(chart_journal_file)
+
+
+def read_chart_journal(offset):
+    """
+    Reads the journal entries written after the given byte offset.
+
+    Only complete lines are consumed, so an increment still writing to the
+    journal is picked up by the next read.
+
+    Parameters
+    ----------
+    offset : int
+        The byte offset up to which the journal has already been applied.
+
+    Returns
+    -------
+    tuple or None
+        A dictionary mapping each location ('windows', 'csv', 'sql') to the
+        list of journaled chart names, a flag telling whether a full rescan
+        was requested, and the new byte offset. None if the journal is shorter
+        than the offset, i.e. it was reset since the offset was saved.
+    """
+    changes = {location: [] for location in JOURNAL_LOCATIONS}
+    if chart_journal_size() < offset:
+        return None
+    if not os.path.exists(chart_journal_file):
+        return changes, False, offset
+
+    rescan = False
+    with open(chart_journal_file, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            location, _, chart = line.decode().rstrip("\r\n").split("\t", 2)
+            if location == RESCAN_MARKER:
+                rescan = True
+            else:
+                changes[location].append(chart)
+    return changes, rescan, offset
+
+
+def load_chart_journal_state():
+    """
+    Loads the state saved by the last recon update run.
+
+    Returns
+    -------
+    dict or None
+        A dictionary with the applied journal "Offset", the "DetailWatermark"
+        of the detail table at that time and the "CsvFiles" fingerprints of the
+        reconciliation CSVs, or None if no state has been saved yet.
+    """
+    if not os.path.exists(chart_journal_state_file):
+        return None
+    with open(chart_journal_state_file, "r") as f:
+        return json.load(f)
+
+
+def save_chart_journal_state(offset, detail_watermark, csv_files):
+    """
+    Saves the journal offset, detail table watermark and CSV fingerprints of a
+    recon update run.
+
+    Parameters
+    ----------
+    offset : int
+        The byte offset up to which the journal has been applied.
+    detail_watermark : list
+        The row count and max id of `report_recon_detail` at the time of the run.
+    csv_files : dict
+        The size and SHA-256 of each vendor's reconciliation CSV, as applied by
+        the run.
+
+    Returns
+    -------
+    None
+    """
+    state = {
+        "Offset": offset,
+        "DetailWatermark": detail_watermark,
+        "CsvFiles": csv_files,
+    }
+    with open(chart_journal_state_file, "w") as f:
+        json.dump(state, f)
+
+
+def compact_chart_journal():
+    """
+    Drops the journal entries already applied by the last recon update run.
+
+    The remaining entries are written to a new file, the saved offset is moved
+    to 0, and the new file then replaces the journal. Applying an entry twice
+    is harmless, as indicators are only ever set, so a crash in between at
+    worst re-applies entries and never skips one. The compaction is left for
+    the next run if an increment appends to the journal meanwhile.
+
+    Returns
+    -------
+    None
+    """
+    state = load_chart_journal_state()
+    if state is None or state["Offset"] == 0 or chart_journal_size() == 0:
+        return
+    temp_file = f"{chart_journal_file}.tmp"
+    with open(chart_journal_file, "rb") as f:
+        f.seek(state["Offset"])
+        remaining = f.read()
+    with open(temp_file, "wb") as f:
+        f.write(remaining)
+    if chart_journal_size() != state["Offset"] + len(remaining):
+        os.remove(temp_file)
+        return
+
+    with open(chart_journal_state_file, "w") as f:
+        json.dump({**state, "Offset": 0}, f)
+    try:
+        os.replace(temp_file, chart_journal_file)
+    except OSError:
+        # The journal is open for appending, keep it whole
+        with open(chart_journal_state_file, "w") as f:
+            json.dump(state, f)
+        os.remove(temp_file)
+
+
+def reset_chart_journal():
+    """
+    Removes the chart change journal and its saved state, so the next delta
+    recon update falls back to a full rescan.
+
+    Returns
+    -------
+    None
+    """
+    for path in (chart_journal_file, chart_journal_state_file):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,326 @@
+import os
+import json
+import time
+from config import (
+    drop_off_index_loc,
+    charts_drop_off_location,
+    drop_off_layout,
+    drop_off_mtime_tick_seconds,
+)
+
+# Snapshots already loaded by this process, keyed by directory
+directory_snapshots = {}
+
+
+def index_file_paths(directory):
+    """
+    Returns the paths of the files persisting the snapshot of a directory.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the snapshot is kept for.
+
+    Returns
+    -------
+    tuple
+        The paths of the entries file (one name per line, written on a full
+        scan), the additions file (names recorded since that scan) and the
+        state JSON file.
+    """
+    # Shard directories share names across vendors, so key on the relative path
+    relative = os.path.relpath(directory, charts_drop_off_location)
+    base = os.path.join(drop_off_index_loc, relative.replace(os.sep, "__"))
+    return f"{base}_entries.txt", f"{base}_additions.txt", f"{base}_state.json"
+
+
+def settled_mtime_ns(mtime_ns):
+    """
+    Returns a directory modification time if it can vouch for a snapshot.
+
+    A change made within the same timestamp tick as the last one leaves the
+    modification time unchanged, so a time within drop_off_mtime_tick_seconds
+    of now cannot prove that nothing changed after the snapshot was taken.
+
+    Parameters
+    ----------
+    mtime_ns : int
+        The directory's modification time in nanoseconds.
+
+    Returns
+    -------
+    int or None
+        The modification time, or None if it is within one tick of now, so
+        the next listing rescans the directory.
+    """
+    if time.time_ns() - mtime_ns < drop_off_mtime_tick_seconds * 10**9:
+        return None
+    return mtime_ns
+
+
+def scan_directory(directory):
+    """
+    Lists the file names of a directory with os.scandir.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to scan.
+
+    Returns
+    -------
+    tuple
+        The directory's modification time in nanoseconds, taken before the
+        scan so a change made during the scan triggers a rescan next time, and
+        the set of file names. The time is None if the directory changed
+        within one tick of the scan, which also triggers a rescan next time.
+    """
+    mtime_ns = os.stat(directory).st_mtime_ns
+    with os.scandir(directory) as entries:
+        names = {entry.name for entry in entries if entry.is_file()}
+    return settled_mtime_ns(mtime_ns), names
+
+
+def save_directory_snapshot(directory, snapshot):
+    """
+    Persists a complete snapshot of a directory, replacing the cached one, and
+    clears its recorded additions.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the snapshot was taken of.
+    snapshot : dict
+        A dictionary with the directory "MtimeNs", None to have the next
+        listing rescan, and the set of "Entries".
+
+    Returns
+    -------
+    None
+    """
+    directory_snapshots[directory] = snapshot
+    entries_file, additions_file, state_file = index_file_paths(directory)
+    with open(entries_file, "w") as f:
+        f.write("\n".join(sorted(snapshot["Entries"])))
+    open(additions_file, "w").close()
+    with open(state_file, "w") as f:
+        json.dump({"Directory": directory, "MtimeNs": snapshot["MtimeNs"]}, f)
+
+
+def load_directory_snapshot(directory):
+    """
+    Loads the snapshot of a directory from memory, or from its persisted files.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the snapshot was taken of.
+
+    Returns
+    -------
+    dict or None
+        A dictionary with the directory "MtimeNs" and the set of "Entries", or
+        None if no snapshot has been persisted for the directory yet.
+    """
+    if directory in directory_snapshots:
+        return directory_snapshots[directory]
+
+    entries_file, additions_file, state_file = index_file_paths(directory)
+    if not os.path.exists(state_file):
+        return None
+    with open(state_file, "r") as f:
+        state = json.load(f)
+    if state["Directory"] != directory:
+        return None
+
+    entries = set()
+    for path in (entries_file, additions_file):
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                entries.update(name for name in f.read().splitlines() if name)
+    snapshot = {"MtimeNs": state["MtimeNs"], "Entries": entries}
+    directory_snapshots[directory] = snapshot
+    return snapshot
+
+
+def get_directory_snapshot(directory):
+    """
+    Returns the file names of a directory, rescanning it only when needed.
+
+    If the directory's modification time still matches the snapshot, the
+    snapshot is returned at the cost of a single stat call. Otherwise the
+    directory is rescanned with os.scandir, the new entries diff is printed and
+    the snapshot is persisted again.
+
+    Parameters
+    ----------
+    directory : str
+        The directory to list.
+
+    Returns
+    -------
+    set
+        The file names in the directory.
+    """
+    snapshot = load_directory_snapshot(directory)
+    if snapshot is not None and snapshot["MtimeNs"] == os.stat(directory).st_mtime_ns:
+        return snapshot["Entries"]
+
+    mtime_ns, entries = scan_directory(directory)
+    if snapshot is not None:
+        added = len(entries - snapshot["Entries"])
+        removed = len(snapshot["Entries"] - entries)
+        print(f"Rescanned {directory}: {added} new, {removed} removed entries")
+    snapshot = {"MtimeNs": mtime_ns, "Entries": entries}
+    save_directory_snapshot(directory, snapshot)
+    return entries
+
+
+def record_directory_additions(directory, filenames, previous_mtime_ns):
+    """
+    Adds files just created in a directory to its snapshot without a rescan.
+
+    The additions are only applied if the snapshot was current right before
+    the files were created, i.e. its modification time equals the one the
+    caller took beforehand. In that case the new names are appended to the
+    additions file and the snapshot takes the directory's new modification
+    time. Otherwise the snapshot is left stale and the next listing rescans.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the files were created in.
+    filenames : list
+        The names of the created files.
+    previous_mtime_ns : int
+        The directory's modification time in nanoseconds before the files were
+        created.
+
+    Returns
+    -------
+    None
+    """
+    snapshot = load_directory_snapshot(directory)
+    if snapshot is None or snapshot["MtimeNs"] != previous_mtime_ns:
+        return
+
+    _, additions_file, state_file = index_file_paths(directory)
+    new_names = [name for name in filenames if name not in snapshot["Entries"]]
+    if new_names:
+        with open(additions_file, "a") as f:
+            f.writelines(f"{name}\n" for name in new_names)
+        snapshot["Entries"].update(new_names)
+    snapshot["MtimeNs"] = settled_mtime_ns(os.stat(directory).st_mtime_ns)
+    with open(state_file, "w") as f:
+        json.dump({"Directory": directory, "MtimeNs": snapshot["MtimeNs"]}, f)
+
+
+def chart_shard(chart_name):
+    """
+    Returns the shard a chart belongs to in the sharded drop-off layout: the
+    delivery date (YYYYMMDD) at the start of the chart name's timestamp.
+
+    Parameters
+    ----------
+    chart_name : str
+        The chart file name, e.g. '20240327T101500Z_123_Health.json'.
+
+    Returns
+    -------
+    str
+        The shard directory name, e.g. '20240327'.
+    """
+    return chart_name[:8]
+
+
+def drop_off_chart_path(chart_name):
+    """
+    Returns the path of a chart relative to its vendor's drop-off directory,
+    following the configured drop_off_layout.
+
+    Parameters
+    ----------
+    chart_name : str
+        The chart file name.
+
+    Returns
+    -------
+    str
+        The chart name itself in the flat layout, or '<shard>/<chart name>' in
+        the sharded layout.
+    """
+    if drop_off_layout == "sharded":
+        return os.path.join(chart_shard(chart_name), chart_name)
+    return chart_name
+
+
+def vendor_drop_off_directories(active_vendor):
+    """
+    Returns the directories holding a vendor's drop-off charts.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the vendor.
+
+    Returns
+    -------
+    list
+        The vendor's drop-off directory in the flat layout, or its shard
+        directories in the sharded layout.
+    """
+    vendor_location = os.path.join(charts_drop_off_location, active_vendor)
+    if drop_off_layout != "sharded":
+        return [vendor_location]
+    with os.scandir(vendor_location) as entries:
+        return [entry.path for entry in entries if entry.is_dir()]
+
+
+def group_drop_off_charts(active_vendor, charts):
+    """
+    Groups a vendor's charts by the drop-off directory they belong in.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the vendor.
+    charts : list
+        The chart file names.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each directory to the list of its chart names.
+    """
+    vendor_location = os.path.join(charts_drop_off_location, active_vendor)
+    if drop_off_layout != "sharded":
+        return {vendor_location: list(charts)}
+    groups = {}
+    for chart in charts:
+        directory = os.path.join(vendor_location, chart_shard(chart))
+        groups.setdefault(directory, []).append(chart)
+    return groups
+
+
+def list_vendor_drop_off_charts(active_vendor):
+    """
+    Lists the charts in a vendor's drop-off directory, or in all its shard
+    directories, from the snapshot index, excluding the vendor's left charts
+    file.
+
+    Parameters
+    ----------
+    active_vendor : str
+        The name of the vendor.
+
+    Returns
+    -------
+    list
+        The chart file names in the vendor's drop-off directory.
+    """
+    left_charts_file = f"{active_vendor}_left_charts.txt"
+    charts = []
+    for directory in vendor_drop_off_directories(active_vendor):
+        entries = get_directory_snapshot(directory)
+        charts.extend(name for name in entries if name != left_charts_file)
+    return charts
@@ -0,0 +1,257 @@
+import os
+import time
+import uuid
+import pyodbc
+from config import (
+    sql_bulk_staging,
+    bulk_insert_strategy,
+    bulk_multirow_max_rows,
+    bulk_batch_size,
+)
+
+# SQL Server accepts at most 1000 row constructors per VALUES clause and
+# 2100 parameters per statement
+MAX_VALUES_ROWS = 1000
+MAX_STATEMENT_PARAMS = 2100
+
+BULK_STRATEGIES = ("executemany", "multirow", "staged_file")
+
+
+def choose_bulk_strategy(row_count):
+    """
+    Picks a bulk insert strategy based on the number of rows to load.
+
+    Small loads go through multi-row VALUES statements (no setup cost), larger
+    loads through a batched fast_executemany. The staged file strategy is
+    never picked automatically, since BULK INSERT needs the SQL Server service
+    to read the client's filesystem; it has to be set in bulk_insert_strategy.
+
+    Parameters
+    ----------
+    row_count : int
+        The number of rows to be inserted.
+
+    Returns
+    -------
+    str
+        One of 'multirow', 'executemany' or 'staged_file'.
+    """
+    if bulk_insert_strategy in BULK_STRATEGIES:
+        return bulk_insert_strategy
+    if row_count <= bulk_multirow_max_rows:
+        return "multirow"
+    return "executemany"
+
+
+def build_insert_parts(columns, sql_defaults=None):
+    """
+    Builds the column list and single-row VALUES template for an INSERT.
+
+    Parameters
+    ----------
+    columns : list
+        The names of the columns that receive bound parameters.
+    sql_defaults : dict, optional
+        A mapping of extra column names to SQL expressions evaluated on the
+        server, e.g. {"insert_datetime": "GETUTCDATE()"}.
+
+    Returns
+    -------
+    tuple
+        The comma-separated column list and the row template, e.g.
+        ('chart_name, insert_datetime', '(?, GETUTCDATE())').
+    """
+    sql_defaults = sql_defaults or {}
+    all_columns = list(columns) + list(sql_defaults.keys())
+    row_values = ["?"] * len(columns) + list(sql_defaults.values())
+    return ", ".join(all_columns), f"({', '.join(row_values)})"
+
+
+def bulk_insert_executemany(cursor, table, columns, rows, sql_defaults=None):
+    """
+    Inserts rows with batched executemany calls, enabling fast_executemany
+    when the cursor supports it (pyodbc) so each batch is sent as one
+    parameter array.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    table : str
+        The schema qualified name of the target table.
+    columns : list
+        The names of the columns that receive bound parameters.
+    rows : list
+        A list of tuples, one per row, in the order of columns.
+    sql_defaults : dict, optional
+        Extra columns filled by server-side SQL expressions.
+
+    Returns
+    -------
+    None
+    """
+    column_list, row_template = build_insert_parts(columns, sql_defaults)
+    insert_query = f"INSERT INTO {table} ({column_list}) VALUES {row_template}"
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True
+    for i in range(0, len(rows), bulk_batch_size):
+        cursor.executemany(insert_query, rows[i : i + bulk_batch_size])
+
+
+def bulk_insert_multirow(cursor, table, columns, rows, sql_defaults=None):
+    """
+    Inserts rows using multi-row VALUES statements, as many rows per
+    statement as SQL Server's row constructor and parameter limits allow.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    table : str
+        The schema qualified name of the target table.
+    columns : list
+        The names of the columns that receive bound parameters.
+    rows : list
+        A list of tuples, one per row, in the order of columns.
+    sql_defaults : dict, optional
+        Extra columns filled by server-side SQL expressions.
+
+    Returns
+    -------
+    None
+    """
+    column_list, row_template = build_insert_parts(columns, sql_defaults)
+    chunk_size = min(MAX_VALUES_ROWS, (MAX_STATEMENT_PARAMS - 1) // len(columns))
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i : i + chunk_size]
+        placeholders = ",".join(row_template for _ in chunk)
+        insert_query = f"INSERT INTO {table} ({column_list}) VALUES {placeholders}"
+        cursor.execute(insert_query, [value for row in chunk for value in row])
+
+
+def bulk_insert_staged_file(cursor, table, columns, rows, sql_defaults=None):
+    """
+    Inserts rows by writing them to a tab-delimited file in the bulk staging
+    location, loading it into a temporary table with BULK INSERT and moving
+    the rows into the target table with a single INSERT ... SELECT.
+
+    The staging location must be readable by the SQL Server service, and the
+    values must not contain tabs or newlines. If the staged load fails (e.g.
+    a remote server that cannot open the file), the rows are inserted with
+    bulk_insert_executemany instead.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    table : str
+        The schema qualified name of the target table.
+    columns : list
+        The names of the columns that receive bound parameters.
+    rows : list
+        A list of tuples, one per row, in the order of columns.
+    sql_defaults : dict, optional
+        Extra columns filled by server-side SQL expressions.
+
+    Returns
+    -------
+    str
+        The strategy the rows were actually loaded with, 'staged_file' or
+        'executemany' after a fallback.
+    """
+    sql_defaults = sql_defaults or {}
+    column_list = ", ".join(columns)
+    staged_file = os.path.join(sql_bulk_staging, f"bulk_{uuid.uuid4().hex}.tsv")
+
+    with open(staged_file, "w", encoding="utf-8", newline="\n") as f:
+        for row in rows:
+            f.write("\t".join("" if value is None else str(value) for value in row))
+            f.write("\n")
+
+    try:
+        cursor.execute(
+            "IF OBJECT_ID('tempdb..#BulkStage') IS NOT NULL DROP TABLE #BulkStage"
+        )
+        # Copy the column types of the target table into the stage table
+        cursor.execute(f"SELECT TOP 0 {column_list} INTO #BulkStage FROM {table}")
+        staged_file_sql = staged_file.replace("'", "''")
+        try:
+            cursor.execute(
+                f"""
+                BULK INSERT #BulkStage FROM '{staged_file_sql}'
+                WITH (FIELDTERMINATOR = '\\t', ROWTERMINATOR = '0x0a', CODEPAGE = '65001', TABLOCK)
+            """
+            )
+        except pyodbc.Error as e:
+            print(f"Staged BULK INSERT failed, falling back to executemany: {e}")
+            cursor.execute("DROP TABLE #BulkStage")
+            bulk_insert_executemany(cursor, table, columns, rows, sql_defaults)
+            return "executemany"
+        target_columns, _ = build_insert_parts(columns, sql_defaults)
+        select_list = ", ".join(list(columns) + list(sql_defaults.values()))
+        cursor.execute(
+            f"INSERT INTO {table} ({target_columns}) SELECT {select_list} FROM #BulkStage"
+        )
+        cursor.execute("DROP TABLE #BulkStage")
+    finally:
+        os.remove(staged_file)
+    return "staged_file"
+
+
+def bulk_insert(cursor, table, columns, rows, sql_defaults=None, strategy=None):
+    """
+    Inserts rows into a table with the given or automatically chosen bulk
+    strategy and reports the achieved throughput.
+
+    The caller owns the transaction; nothing is committed here.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object connected to a SQL Server database.
+    table : str
+        The schema qualified name of the target table.
+    columns : list
+        The names of the columns that receive bound parameters.
+    rows : list
+        A list of tuples, one per row, in the order of columns.
+    sql_defaults : dict, optional
+        Extra columns filled by server-side SQL expressions.
+    strategy : str, optional
+        One of 'executemany', 'multirow' or 'staged_file'. If not provided,
+        the strategy is picked by choose_bulk_strategy.
+
+    Returns
+    -------
+    dict
+        A dictionary with the "Strategy" used (after any fallback), the number
+        of "Rows", the elapsed "Seconds" and the resulting "RowsPerSec".
+    """
+    if strategy is None:
+        strategy = choose_bulk_strategy(len(rows))
+    if strategy not in BULK_STRATEGIES:
+        raise ValueError(f"Unknown bulk insert strategy: {strategy}")
+
+    start = time.perf_counter()
+    if rows:
+        if strategy == "executemany":
+            bulk_insert_executemany(cursor, table, columns, rows, sql_defaults)
+        elif strategy == "multirow":
+            bulk_insert_multirow(cursor, table, columns, rows, sql_defaults)
+        else:
+            strategy = bulk_insert_staged_file(
+                cursor, table, columns, rows, sql_defaults
+            )
+    elapsed = time.perf_counter() - start
+
+    stats = {
+        "Strategy": strategy,
+        "Rows": len(rows),
+        "Seconds": round(elapsed, 3),
+        "RowsPerSec": round(len(rows) / elapsed) if elapsed > 0 else 0,
+    }
+    print(
+        f"Inserted {stats['Rows']} rows into {table} using {strategy} "
+        f"({stats['RowsPerSec']} rows/sec)"
+    )
+    return stats
@@ -1,5 +1,369 @@
+import re
+import threading
+import time
+from datetime import datetime
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
 import pyodbc
-from config import conn_str
+from config import (
+    conn_str,
+    sql_pool_size,
+    sql_pool_checkout_timeout,
+    sql_pool_health_check_seconds,
+    sql_slow_query_seconds,
+    sql_slow_query_log,
+)
+
+# Aggregated timings of the statements run through instrumented cursors,
+# keyed by statement fingerprint
+_statement_stats = {}
+_statement_stats_lock = threading.Lock()
+_slow_query_log_lock = threading.Lock()
+
+
+def sql_fingerprint(statement):
+    """
+    Returns the fingerprint of a SQL statement: its text with literals replaced
+    by '?', multi-row VALUES lists collapsed and whitespace normalized, so runs
+    of the same statement with different values share one fingerprint.
+
+    Parameters
+    ----------
+    statement : str
+        The SQL statement.
+
+    Returns
+    -------
+    str
+        The fingerprint.
+    """
+    fingerprint = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    fingerprint = re.sub(r"\b\d+(?:\.\d+)?\b", "?", fingerprint)
+    fingerprint = re.sub(r"\s+", " ", fingerprint).strip()
+    # INSERT ... VALUES (?, ?), (?, ?), ... batches of any size
+    return re.sub(r"(\([?, ]*\))(?:\s*,\s*\([?, ]*\))+", r"\1, ...", fingerprint)
+
+
+def record_statement(statement, param_count, rowcount, seconds):
+    """
+    Adds one statement run to the aggregated statement stats, and writes it to
+    the slow-query log if it took longer than sql_slow_query_seconds.
+
+    Parameters
+    ----------
+    statement : str
+        The SQL statement.
+    param_count : int
+        The number of bound parameters, across all rows for executemany.
+    rowcount : int
+        The row count reported by the cursor, -1 if unknown. pyodbc reports -1
+        for SELECT statements, so their rows are counted as 0.
+    seconds : float
+        The time the statement took.
+
+    Returns
+    -------
+    None
+    """
+    fingerprint = sql_fingerprint(statement)
+    with _statement_stats_lock:
+        stats = _statement_stats.setdefault(
+            fingerprint,
+            {"Calls": 0, "TotalSeconds": 0.0, "MaxSeconds": 0.0, "Rows": 0},
+        )
+        stats["Calls"] += 1
+        stats["TotalSeconds"] += seconds
+        stats["MaxSeconds"] = max(stats["MaxSeconds"], seconds)
+        stats["Rows"] += max(rowcount, 0)
+
+    if seconds >= sql_slow_query_seconds:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        line = (
+            f"{timestamp}\t{seconds:.3f}s\tparams={param_count}\t"
+            f"rows={rowcount}\t{fingerprint}\n"
+        )
+        try:
+            with _slow_query_log_lock, open(sql_slow_query_log, "a") as f:
+                f.write(line)
+        except OSError as e:
+            # The statement itself succeeded, never fail it over the log
+            print(f"Failed to write the slow-query log: {e}")
+
+
+def get_sql_statement_stats():
+    """
+    Returns the aggregated statement stats, slowest total first.
+
+    Returns
+    -------
+    list
+        One dictionary per statement fingerprint with its "Fingerprint", number
+        of "Calls", "TotalSeconds", "MaxSeconds", "AvgSeconds" and total "Rows"
+        affected. Rows returned by SELECT statements are not counted.
+    """
+    with _statement_stats_lock:
+        stats = [
+            {"Fingerprint": fingerprint, **values}
+            for fingerprint, values in _statement_stats.items()
+        ]
+    for entry in stats:
+        entry["AvgSeconds"] = entry["TotalSeconds"] / entry["Calls"]
+    return sorted(stats, key=lambda entry: entry["TotalSeconds"], reverse=True)
+
+
+def print_sql_statement_stats(top=20):
+    """
+    Prints the statements that took the most total time.
+
+    Parameters
+    ----------
+    top : int, optional
+        The number of statements to print. Defaults to 20.
+
+    Returns
+    -------
+    None
+    """
+    for entry in get_sql_statement_stats()[:top]:
+        print(
+            f"{entry['TotalSeconds']:.3f}s total, {entry['Calls']} calls, "
+            f"avg {entry['AvgSeconds']:.3f}s, max {entry['MaxSeconds']:.3f}s, "
+            f"{entry['Rows']} rows: {entry['Fingerprint'][:200]}"
+        )
+
+
+class InstrumentedCursor:
+    """
+    A pyodbc cursor wrapper timing every execute and executemany call.
+
+    Each call is added to the aggregated statement stats under the statement
+    fingerprint, with its parameter count and row count, and slow calls go to
+    the slow-query log. Every other attribute, including settings such as
+    fast_executemany, is read from and written to the wrapped cursor, and the
+    with statement behaves as it does on the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        object.__setattr__(self, "_cursor", cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+    def execute(self, statement, *params):
+        # pyodbc takes the parameters either spread or as one sequence
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            param_count = len(params[0])
+        else:
+            param_count = len(params)
+        start = time.perf_counter()
+        self._cursor.execute(statement, *params)
+        seconds = time.perf_counter() - start
+        record_statement(statement, param_count, self._cursor.rowcount, seconds)
+        return self
+
+    def executemany(self, statement, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        param_count = sum(len(params) for params in seq_of_params)
+        start = time.perf_counter()
+        self._cursor.executemany(statement, seq_of_params)
+        seconds = time.perf_counter() - start
+        record_statement(statement, param_count, self._cursor.rowcount, seconds)
+
+
+class InstrumentedConnection:
+    """
+    A pyodbc connection wrapper handing out InstrumentedCursor objects. Every
+    other attribute is read from and written to the wrapped connection, and
+    the with statement behaves as it does on the wrapped connection.
+    """
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._conn.__exit__(*exc_info)
+
+    def cursor(self):
+        return InstrumentedCursor(self._conn.cursor())
+
+
+class SQLConnectionPool:
+    """
+    A thread-safe pool of reusable pyodbc connections, wrapped in
+    InstrumentedConnection so every statement is timed.
+
+    Connections are checked out with the connection context manager and go
+    back to the pool when the block exits, after rolling back anything left
+    uncommitted. A connection that sat idle longer than the health check
+    interval is pinged before reuse and replaced if the ping fails. Nested
+    checkouts on the same thread reuse the connection already held by that
+    thread instead of opening another one, so they share its transaction: a
+    commit or rollback in a nested block also commits or rolls back the work
+    of the enclosing blocks.
+    """
+
+    def __init__(
+        self, connection_string, max_size, checkout_timeout, health_check_seconds
+    ):
+        """
+        Initialize a SQLConnectionPool object.
+
+        Parameters
+        ----------
+        connection_string : str
+            The ODBC connection string used to open new connections.
+        max_size : int
+            The maximum number of connections checked out at the same time.
+        checkout_timeout : float
+            Seconds to wait for a free connection before raising TimeoutError.
+        health_check_seconds : float
+            Idle time after which a connection is pinged before being reused.
+        """
+        self.connection_string = connection_string
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_seconds = health_check_seconds
+        # Idle connections with the time they were returned, most recent first
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+
+    def _is_healthy(self, conn):
+        try:
+            # Ping on the raw connection, so pings stay out of the statement stats
+            cursor = conn._conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except pyodbc.Error:
+            pass
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError(
+                f"No SQL connection free after {self.checkout_timeout} seconds"
+            )
+        try:
+            while True:
+                try:
+                    conn, returned_at = self._idle.get_nowait()
+                except Empty:
+                    conn = pyodbc.connect(self.connection_string)
+                    return InstrumentedConnection(conn)
+                idle_for = time.monotonic() - returned_at
+                if idle_for < self.health_check_seconds or self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn):
+        try:
+            # Never hand out a connection with an open transaction
+            conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except pyodbc.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """
+        Checks out a connection for the duration of a with block.
+
+        Yields
+        ------
+        InstrumentedConnection
+            A pooled pyodbc connection, wrapped to time its statements. Commit
+            explicitly; uncommitted work is rolled back when the outermost
+            block on this thread exits.
+
+        Notes
+        -----
+        A block nested in another one on the same thread gets the same
+        connection, and its commit also commits the outer block's work so
+        far. Code that must stay atomic should not call functions checking
+        out their own connection (e.g. execute_stored_procedure) midway.
+        """
+        held = getattr(self._local, "connection", None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.connection = conn
+        try:
+            yield conn
+        finally:
+            self._local.connection = None
+            self._release(conn)
+
+    def close_all(self):
+        """
+        Closes all idle connections in the pool.
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(conn)
+
+
+# Shared pool used by every SQL touchpoint in the project
+sql_pool = SQLConnectionPool(
+    conn_str, sql_pool_size, sql_pool_checkout_timeout, sql_pool_health_check_seconds
+)
+
+
+def get_connection():
+    """
+    Checks out a connection from the shared SQL connection pool.
+
+    Returns
+    -------
+    contextlib._GeneratorContextManager
+        A context manager yielding a pyodbc.Connection, e.g.
+        `with get_connection() as conn: ...`. Nested calls on one thread share
+        the connection and its transaction, see SQLConnectionPool.connection.
+    """
+    return sql_pool.connection()
 
 
 def fetch_query(cursor, schema, table_name):
@@ -26,6 +390,28 @@ def fetch_query(cursor, schema, table_name):
     return [row[0] for row in cursor.fetchall()]
 
 
+def fetch_first_result_set(cursor):
+    """
+    Fetches the rows of the first result set produced by the last statement,
+    skipping the row count messages that come before it.
+
+    Parameters
+    ----------
+    cursor : pyodbc.Cursor
+        A cursor object that just executed a statement.
+
+    Returns
+    -------
+    list or None
+        The rows of the first result set, None if there is no result set. An
+        empty result set gives an empty list.
+    """
+    while cursor.description is None:
+        if not cursor.nextset():
+            return None
+    return cursor.fetchall()
+
+
 def execute_stored_procedure(procedure_name, *params):
     """
     Executes a stored procedure with the given parameters.
@@ -39,27 +425,21 @@ def execute_stored_procedure(procedure_name, *params):
 
     Returns
     -------
-    None
+    list or None
+        The rows of the first result set returned by the procedure, None if it
+        returns no result set.
     """
 
-    conn = pyodbc.connect(conn_str)
-    cursor = conn.cursor()
-
-    # Construct the EXEC query
+    # Bind the parameters so SQL Server can reuse the cached plan
     exec_query = f"EXEC {procedure_name}"
-
-    # If there are parameters, append them to the query
     if params:
-        # Join parameters as comma-separated values
-        param_list = ", ".join(
-            [f"'{param}'" if isinstance(param, str) else str(param) for param in params]
-        )
-        exec_query += f" {param_list}"
-
-    # Execute the stored procedure
-    cursor.execute(exec_query)
-    conn.commit()
+        exec_query += " " + ", ".join("?" for _ in params)
 
-    # Close the cursor and connection
-    cursor.close()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        # Execute the stored procedure
+        cursor.execute(exec_query, *params)
+        rows = fetch_first_result_set(cursor)
+        conn.commit()
+        cursor.close()
+    return rows
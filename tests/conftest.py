@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import threading
+import importlib.util
+import pytest
+from urllib.parse import urlsplit, parse_qsl
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+# Run against the sample config when no config.py has been set up
+if not os.path.exists(os.path.join(SRC, "config", "config.py")):
+    spec = importlib.util.spec_from_file_location(
+        "config.config", os.path.join(SRC, "config", "config_sample.py")
+    )
+    sample_config = importlib.util.module_from_spec(spec)
+    sys.modules["config.config"] = sample_config
+    spec.loader.exec_module(sample_config)
+
+
+class FakeSlackHandler(BaseHTTPRequestHandler):
+    """Records each request and answers with the server's respond function."""
+
+    def do_GET(self):
+        self.reply(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.reply(json.loads(self.rfile.read(length) or b"null"))
+
+    def reply(self, body):
+        url = urlsplit(self.path)
+        request = {
+            "method": self.command,
+            "path": url.path,
+            "params": dict(parse_qsl(url.query)),
+            "json": body,
+        }
+        with self.server.lock:
+            self.server.requests.append(request)
+        status, headers, payload = self.server.respond(request)
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except ConnectionError:
+            # The client timed out waiting for the answer
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def slack_server():
+    """
+    A local HTTP server standing in for Slack. Set its respond attribute to a
+    function taking the request dict and returning (status, headers, body).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSlackHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.respond = lambda request: (200, {}, {"ok": True})
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
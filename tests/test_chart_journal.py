@@ -0,0 +1,71 @@
+import pytest
+from utils import chart_journal
+from automation import recon_report_update
+from dataprep.charts import charts_incrementor
+from dataprep.charts.charts_queue import append_charts
+
+
+@pytest.fixture(autouse=True)
+def journal_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(chart_journal, "chart_journal_file", str(tmp_path / "j.txt"))
+    monkeypatch.setattr(
+        chart_journal, "chart_journal_state_file", str(tmp_path / "j.json")
+    )
+
+
+@pytest.fixture
+def csv_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(recon_report_update, "csv_location", str(tmp_path))
+    monkeypatch.setattr(recon_report_update, "active_vendor_list", ["Raven"])
+    (tmp_path / "Raven").mkdir()
+    path = tmp_path / "Raven" / "Raven_charts_reconciliation.csv"
+    path.write_text("chartname\nc1\nc2")
+    return path
+
+
+def test_compaction_keeps_unapplied_entries():
+    chart_journal.append_chart_journal("windows", "Raven", ["a", "b"])
+    offset = chart_journal.chart_journal_size()
+    chart_journal.save_chart_journal_state(offset, [0, 0], {})
+    chart_journal.append_chart_journal("sql", "Raven", ["c"])
+
+    chart_journal.compact_chart_journal()
+
+    assert chart_journal.load_chart_journal_state()["Offset"] == 0
+    changes, rescan, _ = chart_journal.read_chart_journal(0)
+    assert changes["windows"] == [] and changes["sql"] == ["c"] and not rescan
+
+
+def test_appended_csv_charts_are_a_delta(csv_file):
+    saved = recon_report_update.fingerprint_csv_files()
+    append_charts(str(csv_file), ["c3", "c4"])
+    charts, csv_files = recon_report_update.read_csv_chart_changes(saved)
+    assert charts == ["c3", "c4"]
+    assert recon_report_update.read_csv_chart_changes(csv_files)[0] == []
+
+
+@pytest.mark.parametrize(
+    "contents", ["chartname\nc1\nxx", "chartname\nc1", "chartname\nc1\nc2x"]
+)
+def test_edited_csv_needs_a_rescan(csv_file, contents):
+    saved = recon_report_update.fingerprint_csv_files()
+    csv_file.write_text(contents)
+    assert recon_report_update.read_csv_chart_changes(saved) is None
+
+
+@pytest.mark.parametrize(
+    "moved, rescan, charts",
+    # No result set is an older procedure, an empty one moved nothing
+    [(None, True, []), ([], False, []), ([("c1",), ("c2",)], False, ["c1", "c2"])],
+)
+def test_sql_increment_results(monkeypatch, moved, rescan, charts):
+    monkeypatch.setattr(
+        charts_incrementor,
+        "execute_stored_procedure",
+        lambda name, vendor, batch_size: moved,
+    )
+    charts_incrementor.increment_sql_charts({"Raven": 5, "Gryff": 0})
+
+    changes, journal_rescan, _ = chart_journal.read_chart_journal(0)
+    assert journal_rescan == rescan
+    assert changes["sql"] == charts
@@ -0,0 +1,82 @@
+import os
+import pytest
+from dataprep.charts import charts_queue
+
+
+@pytest.fixture(autouse=True)
+def cursor_location(monkeypatch, tmp_path):
+    monkeypatch.setattr(charts_queue, "resource_loc", str(tmp_path))
+    # Never compact unless a test asks for it
+    monkeypatch.setattr(charts_queue, "left_charts_compaction_ratio", 1.0)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    path = tmp_path / "Raven_left_charts.txt"
+    path.write_text("c1\nc2\nc3\nc4\nc5")
+    return str(path)
+
+
+def test_pop_across_calls(queue):
+    assert charts_queue.pop_left_charts(queue, 2) == ["c1", "c2"]
+    assert charts_queue.pop_left_charts(queue, 2) == ["c3", "c4"]
+    assert charts_queue.count_left_charts(queue) == 1
+    assert charts_queue.pop_left_charts(queue, 2) == ["c5"]
+    assert charts_queue.pop_left_charts(queue, 2) == []
+    # The file still holds the charts taken until it is compacted
+    assert open(queue).read() == "c1\nc2\nc3\nc4\nc5"
+
+
+def test_stale_cursor_after_rewrite(queue):
+    charts_queue.pop_left_charts(queue, 3)
+    with open(queue, "w") as f:
+        f.write("n1\nn2")
+    assert charts_queue.pop_left_charts(queue, 5) == ["n1", "n2"]
+
+
+def test_stale_cursor_skips_the_header(tmp_path):
+    path = tmp_path / "Raven_leftcharts.csv"
+    path.write_text("chartname\nc1\nc2\nc3")
+    charts_queue.pop_left_charts(str(path), 2, has_header=True)
+    path.write_text("chartname\nn1")
+    assert charts_queue.pop_left_charts(str(path), 5, has_header=True) == ["n1"]
+
+
+def test_compaction_keeps_the_header(monkeypatch, tmp_path):
+    monkeypatch.setattr(charts_queue, "left_charts_compaction_ratio", 0)
+    path = tmp_path / "Raven_leftcharts.csv"
+    path.write_text("chartname\nc1\nc2\nc3\nc4")
+
+    assert charts_queue.pop_left_charts(str(path), 2, has_header=True) == [
+        "c1",
+        "c2",
+    ]
+    assert path.read_text() == "chartname\nc3\nc4"
+    assert not os.path.exists(f"{path}.tmp")
+    assert charts_queue.count_left_charts(str(path), has_header=True) == 2
+    assert charts_queue.pop_left_charts(str(path), 5, has_header=True) == [
+        "c3",
+        "c4",
+    ]
+    assert path.read_text() == "chartname\n"
+
+
+def test_compaction_past_the_ratio(monkeypatch, queue):
+    monkeypatch.setattr(charts_queue, "left_charts_compaction_ratio", 0.5)
+    charts_queue.pop_left_charts(queue, 2)
+    assert open(queue).read() == "c1\nc2\nc3\nc4\nc5"
+    charts_queue.pop_left_charts(queue, 1)
+    assert open(queue).read() == "c4\nc5"
+    assert charts_queue.count_left_charts(queue) == 2
+    assert charts_queue.pop_left_charts(queue, 5) == ["c4", "c5"]
+
+
+@pytest.mark.parametrize(
+    "contents, expected",
+    [("", "c6\nc7"), ("c1", "c1\nc6\nc7"), ("c1\n", "c1\nc6\nc7")],
+)
+def test_append_charts(tmp_path, contents, expected):
+    path = tmp_path / "charts.txt"
+    path.write_text(contents)
+    charts_queue.append_charts(str(path), ["c6", "c7"])
+    assert path.read_text() == expected
@@ -0,0 +1,29 @@
+import os
+import ast
+import config
+
+CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "config"
+)
+
+
+def assigned_names(file_name):
+    with open(os.path.join(CONFIG, file_name)) as f:
+        tree = ast.parse(f.read())
+    return {
+        target.id
+        for node in tree.body
+        if isinstance(node, ast.Assign)
+        for target in node.targets
+        if isinstance(target, ast.Name)
+    }
+
+
+def test_sample_does_not_repeat_the_defaults():
+    # Tuning variables are only defined in defaults.py, config.py overrides them
+    assert not assigned_names("config_sample.py") & assigned_names("defaults.py")
+
+
+def test_every_default_is_exposed():
+    for name in assigned_names("defaults.py"):
+        assert hasattr(config, name)
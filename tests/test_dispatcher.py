@@ -0,0 +1,46 @@
+import os
+import threading
+from automation import automation_utils
+from automation.dispatcher import ReportDispatcher
+from automation.report_logging import stop_report_logging
+
+
+def test_rejected_file_can_be_ingested_again(monkeypatch, tmp_path):
+    monkeypatch.setattr(automation_utils, "rrl_log", str(tmp_path))
+    dispatcher = ReportDispatcher(workers=1, max_pending=1, overflow="reject")
+    handler = automation_utils.NewFileHandler(
+        "recon_report_load", r".*_daily_report_.*", dispatcher
+    )
+    release = threading.Event()
+    processed = []
+
+    def process_new_file(file_name):
+        release.wait()
+        processed.append(file_name)
+        handler.forget(file_name)
+
+    handler.process_new_file = process_new_file
+    first = tmp_path / "Raven_daily_report_20240101.txt"
+    second = tmp_path / "Raven_daily_report_20240102.txt"
+    first.write_text("1")
+    second.write_text("2")
+
+    handler.file_ready(str(first))
+    # The dispatcher is full, the second file is rejected and forgotten
+    handler.file_ready(str(second))
+    assert second.name not in handler.ingested
+    assert dispatcher.queue_depth()["Pending"] == 1
+
+    release.set()
+    dispatcher.shutdown()
+    stop_report_logging()
+    logs = [name for name in os.listdir(tmp_path) if name.endswith(".log")]
+    assert len(logs) == 1
+    assert "Rejected by the dispatcher" in (tmp_path / logs[0]).read_text()
+
+    # A later event for the unchanged file ingests it
+    dispatcher = ReportDispatcher(workers=1, max_pending=1, overflow="reject")
+    handler.dispatcher = dispatcher
+    handler.file_ready(str(second))
+    dispatcher.shutdown()
+    assert processed == [first.name, second.name]
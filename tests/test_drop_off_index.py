@@ -0,0 +1,40 @@
+import os
+import pytest
+from utils import drop_off_index
+
+
+@pytest.fixture
+def directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(drop_off_index, "drop_off_index_loc", str(tmp_path))
+    monkeypatch.setattr(drop_off_index, "charts_drop_off_location", str(tmp_path))
+    monkeypatch.setattr(drop_off_index, "directory_snapshots", {})
+    charts = tmp_path / "Raven"
+    charts.mkdir()
+    (charts / "a.json").touch()
+    return str(charts)
+
+
+def test_recent_change_is_rescanned(directory, monkeypatch):
+    scans = []
+    scan_directory = drop_off_index.scan_directory
+    monkeypatch.setattr(
+        drop_off_index,
+        "scan_directory",
+        lambda path: scans.append(path) or scan_directory(path),
+    )
+    drop_off_index.get_directory_snapshot(directory)
+    # A file added within the same mtime tick leaves the mtime unchanged
+    mtime_ns = os.stat(directory).st_mtime_ns
+    open(os.path.join(directory, "b.json"), "w").close()
+    os.utime(directory, ns=(mtime_ns, mtime_ns))
+
+    assert drop_off_index.get_directory_snapshot(directory) == {"a.json", "b.json"}
+    assert len(scans) == 2
+
+
+def test_settled_snapshot_is_reused(directory, monkeypatch):
+    old_ns = os.stat(directory).st_mtime_ns - 10 * 10**9
+    os.utime(directory, ns=(old_ns, old_ns))
+    assert drop_off_index.get_directory_snapshot(directory) == {"a.json"}
+    monkeypatch.setattr(drop_off_index, "scan_directory", None)
+    assert drop_off_index.get_directory_snapshot(directory) == {"a.json"}
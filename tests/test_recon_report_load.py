@@ -0,0 +1,65 @@
+import re
+import datetime
+import pytest
+from automation.recon_report_load import parse_report_file, to_sql_server_format
+from dataprep.reports import reports_generator
+
+
+def regex_parse_report_file(file_path):
+    """The original parser, reading the whole report and searching it."""
+    with open(file_path, "r") as file:
+        data = file.read()
+    first = re.search(r"First Chart Delivered at:\s+(\d+T\d+Z)", data).group(1)
+    last = re.search(r"Last Chart Delivered at:\s+(\d+T\d+Z)", data).group(1)
+    chartlist_with_dupes = re.findall(r"\d+T\d+Z_\w+\.json", data)
+    return {
+        "FileCount": int(re.search(r"Charts Delivered:\s+(\d+)", data).group(1)),
+        "FirstDelivery": to_sql_server_format(first),
+        "LastDelivery": to_sql_server_format(last),
+        "ChartListWithDupes": chartlist_with_dupes,
+    }
+
+
+@pytest.fixture
+def report_file(monkeypatch, tmp_path):
+    def write(engine, seed):
+        monkeypatch.setattr(reports_generator, "report_generator_engine", engine)
+        reports_generator.generate_member_list(100, 200)
+        report_date = datetime.date(2024, 1, 2)
+        rng = reports_generator.create_task_rng(seed, report_date.toordinal())
+        content, _ = reports_generator.create_report_content(report_date, "Raven", rng)
+        path = tmp_path / "Raven_daily_report_20240102.txt"
+        path.write_text(content)
+        return str(path)
+
+    return write
+
+
+@pytest.mark.parametrize("engine", ["python", "vectorized"])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_streaming_parser_matches_the_regex_parser(report_file, engine, seed):
+    path = report_file(engine, seed)
+    expected = regex_parse_report_file(path)
+    parsed = parse_report_file(path)
+
+    for field in ("FileCount", "FirstDelivery", "LastDelivery"):
+        assert parsed[field] == expected[field]
+    charts = expected["ChartListWithDupes"]
+    assert set(parsed["ChartList"]) == set(charts)
+    assert parsed["UniqueCount"] == len(set(charts))
+    assert parsed["ChartCountWithDupes"] == len(charts)
+    assert parsed["ReportFileDate"] == "2024-01-02"
+    assert parsed["Vendor"] == "Raven"
+
+
+@pytest.mark.parametrize(
+    "header", ["Charts Delivered:", "First Chart Delivered at:", "Last Chart"]
+)
+def test_missing_header_field_raises(report_file, header):
+    path = report_file("vectorized", 1)
+    with open(path) as f:
+        lines = [line for line in f if not line.startswith(header)]
+    with open(path, "w") as f:
+        f.writelines(lines)
+    with pytest.raises(ValueError, match="not found in report"):
+        parse_report_file(path)
@@ -0,0 +1,63 @@
+import os
+import re
+from automation.recon_report_update import (
+    active_vendors_query,
+    five_pass_update,
+    single_pass_update,
+)
+from config import active_vendor_list
+
+PROCEDURE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "sql_scripts",
+    "procedures",
+    "create_sp_update_chart_lookup_indicator.sql",
+)
+
+
+class FakeCursor:
+    """Records the statements executed on it."""
+
+    def __init__(self):
+        self.statements = []
+        self.fast_executemany = False
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def executemany(self, query, rows):
+        self.statements.append(query)
+
+
+def normalize(sql):
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").lower()
+
+
+def test_active_vendors_query_matches_the_procedure():
+    with open(PROCEDURE, encoding="utf-16") as f:
+        procedure = normalize(f.read())
+    assert normalize(active_vendors_query) in procedure
+    assert "'select chartname from [' + @vendorname + '].chartlookup union '" in (
+        procedure
+    )
+
+
+def test_both_engines_stage_the_active_vendors_of_the_database():
+    five_pass = FakeCursor()
+    five_pass_update(five_pass, ["a.json"], ["b.json"])
+    assert "EXEC common.sp_update_chart_lookup_indicator" in five_pass.statements
+
+    single_pass = FakeCursor()
+    single_pass_update(single_pass, ["a.json"], ["b.json"])
+    batch = "\n".join(single_pass.statements)
+    assert normalize(active_vendors_query) in normalize(batch)
+    assert "'SELECT chartname FROM [' + vendor + '].chartlookup UNION '" in batch
+    # Not the Python vendor list, which can differ from the database
+    for vendor in active_vendor_list:
+        assert f"[{vendor}].chartlookup" not in batch
+
+
+def test_explicit_lookup_charts_skip_the_vendor_tables():
+    cursor = FakeCursor()
+    single_pass_update(cursor, [], [], lookup_charts=["c.json"])
+    assert "vendor_active_status" not in "\n".join(cursor.statements)
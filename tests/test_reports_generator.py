@@ -0,0 +1,135 @@
+import os
+import re
+import datetime
+import multiprocessing
+from concurrent.futures import Future
+import numpy as np
+import pytest
+from dataprep.reports import reports_generator
+
+
+class InlineExecutor:
+    """Runs submitted tasks right away, counting the unconsumed results."""
+
+    def __init__(self):
+        self.outstanding = 0
+        self.max_outstanding = 0
+
+    def submit(self, function, *args):
+        self.outstanding += 1
+        self.max_outstanding = max(self.max_outstanding, self.outstanding)
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+
+def test_report_days_are_submitted_in_a_bounded_window(monkeypatch):
+    executor = InlineExecutor()
+    monkeypatch.setattr(
+        reports_generator,
+        "generate_report_file",
+        lambda vendor, report_date, seed: [report_date],
+    )
+    start = datetime.date(2024, 1, 1)
+    dates = [start + datetime.timedelta(days=i) for i in range(20)]
+
+    days = []
+    for charts in reports_generator.iter_report_days("Raven", dates, 1, executor, 4):
+        executor.outstanding -= 1
+        days.extend(charts)
+    assert days == dates
+    assert executor.max_outstanding == 4
+
+
+CHART_NAME = re.compile(r"^\d{8}T\d{6}Z_MBR\d{5}_\w+\.json$")
+
+
+def test_chart_timestamps_match_strftime():
+    rng = np.random.default_rng(7)
+    start = np.datetime64("2024-02-28T00:00:00", "s")
+    offsets = rng.integers(0, 3 * 86400, 1000).astype("timedelta64[s]")
+    edges = np.array(
+        ["2024-02-28T00:00:00", "2024-02-29T23:59:59", "2024-03-01T12:00:00"],
+        dtype="datetime64[s]",
+    )
+    timestamps = np.concatenate([start + offsets, edges])
+
+    formatted = reports_generator.format_chart_timestamps(timestamps)
+    expected = [
+        timestamp.astype(datetime.datetime).strftime("%Y%m%dT%H%M%SZ").encode()
+        for timestamp in timestamps
+    ]
+    assert formatted.tolist() == expected
+
+
+def test_vectorized_chart_names():
+    reports_generator.generate_member_list(100, 200)
+    start = datetime.datetime(2024, 1, 1, 6)
+    end = datetime.datetime(2024, 1, 2, 18)
+    rng = np.random.default_rng(3)
+    charts, timestamps = reports_generator.create_chartlist_vectorized(
+        start, end, 500, "Raven", rng
+    )
+
+    assert len(charts) == 500
+    health_systems = reports_generator.health_systems_list["Raven"]
+    for chart, timestamp in zip(charts, timestamps):
+        assert CHART_NAME.match(chart)
+        chart_datetime = timestamp.astype(datetime.datetime)
+        assert start <= chart_datetime <= end
+        assert chart.startswith(chart_datetime.strftime("%Y%m%dT%H%M%SZ_"))
+        assert chart.split("_", 2)[2][: -len(".json")] in health_systems
+
+
+def test_duplicates_are_drawn_from_the_original_charts():
+    charts = [f"c{i}" for i in range(10)]
+    with_duplicates = 0
+    for seed in range(50):
+        rng = np.random.default_rng(seed)
+        # Many duplicates for few charts, so most draws resolve through others
+        result = reports_generator.create_duplicate_charts_vectorized(
+            charts.copy(), 1000, rng
+        )
+        assert result[: len(charts)] == charts
+        assert set(result[len(charts) :]) <= set(charts)
+        with_duplicates += len(result) > len(charts)
+    assert with_duplicates
+
+
+def read_reports(report_base):
+    files = {}
+    for vendor in sorted(os.listdir(report_base)):
+        vendor_dir = os.path.join(report_base, vendor)
+        for name in sorted(os.listdir(vendor_dir)):
+            with open(os.path.join(vendor_dir, name), "rb") as f:
+                files[f"{vendor}/{name}"] = f.read()
+    return files
+
+
+# The workers see the patched module globals only when forked
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="needs fork workers"
+)
+def test_same_seed_gives_identical_output_for_any_worker_count(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        reports_generator, "date_range_start", datetime.date(2024, 1, 1)
+    )
+    monkeypatch.setattr(reports_generator, "date_range_end", datetime.date(2024, 1, 4))
+    monkeypatch.setattr(reports_generator, "active_vendor_list", ["Raven", "Gryff"])
+    monkeypatch.setattr(
+        reports_generator, "report_seed_file", str(tmp_path / "report_seed.json")
+    )
+
+    outputs = []
+    for workers in (1, 2):
+        report_base = tmp_path / f"reports_{workers}"
+        report_base.mkdir()
+        monkeypatch.setattr(reports_generator, "report_base", str(report_base))
+        reports_generator.generate_all_vendor_reports(
+            workers=workers, seed=1234, incremental=False
+        )
+        outputs.append(read_reports(str(report_base)))
+
+    assert "Raven/Raven_chartlist.txt" in outputs[0]
+    assert len(outputs[0]) == 2 * (4 + 1)
+    assert outputs[0] == outputs[1]
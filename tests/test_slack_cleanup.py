@@ -0,0 +1,83 @@
+import socket
+import threading
+import pytest
+from automation import slack_messages
+
+
+@pytest.fixture(autouse=True)
+def fast_slack(monkeypatch, slack_server):
+    monkeypatch.setattr(slack_messages, "slack_api_base", slack_server.url)
+    monkeypatch.setattr(slack_messages, "slack_backoff_seconds", 0)
+    monkeypatch.setattr(slack_messages, "slack_history_page_size", 4)
+    monkeypatch.setattr(slack_messages, "user_auth_token", "xoxp-test")
+
+
+class FakeChannel:
+    """A channel of messages, rate limiting the first call of each method."""
+
+    def __init__(self, count):
+        self.messages = [str(ts) for ts in range(count)]
+        self.lock = threading.Lock()
+        self.rate_limited = set()
+
+    def __call__(self, request):
+        method = request["path"].strip("/")
+        with self.lock:
+            if method not in self.rate_limited:
+                self.rate_limited.add(method)
+                return 429, {"Retry-After": "0.2"}, {"ok": False}
+            if method == "conversations.history":
+                start = int(request["params"].get("cursor") or 0)
+                limit = int(request["params"]["limit"])
+                page = self.messages[start : start + limit]
+                more = start + limit < len(self.messages)
+                cursor = str(start + limit) if more else ""
+                body = {
+                    "ok": True,
+                    "messages": [{"ts": ts} for ts in page],
+                    "response_metadata": {"next_cursor": cursor},
+                }
+                return 200, {}, body
+            self.messages.remove(request["json"]["ts"])
+            return 200, {}, {"ok": True}
+
+
+def test_pages_through_the_whole_channel(slack_server):
+    slack_server.respond = FakeChannel(10)
+    messages = slack_messages.get_all_slack_messages("xoxp-test", "C1")
+    assert [message["ts"] for message in messages] == [str(ts) for ts in range(10)]
+    history = [r for r in slack_server.requests if r["method"] == "GET"]
+    # One rate-limited call, then 3 pages of at most 4 messages
+    assert len(history) == 4
+
+
+def test_delete_all_messages_waits_out_rate_limits(slack_server, capsys):
+    channel = FakeChannel(25)
+    slack_server.respond = channel
+    slack_messages.delete_all_messages("C1", workers=4)
+    assert channel.messages == []
+    assert "Deleted 25/25 messages" in capsys.readouterr().out
+
+
+def test_paging_failure_is_reported(slack_server, capsys):
+    channel = FakeChannel(10)
+    channel.rate_limited = {"conversations.history"}
+
+    def respond(request):
+        if request["params"].get("cursor"):
+            return 500, {}, {"ok": False}
+        return channel(request)
+
+    slack_server.respond = respond
+    messages = slack_messages.get_all_slack_messages("xoxp-test", "C1")
+    assert len(messages) == 4
+    assert "Stopped paging after 4 messages" in capsys.readouterr().out
+
+
+def test_unreachable_slack_counts_as_not_deleted(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    monkeypatch.setattr(slack_messages, "slack_api_base", f"http://127.0.0.1:{port}")
+    monkeypatch.setattr(slack_messages, "slack_max_retries", 1)
+    assert not slack_messages.delete_slack_message("xoxp-test", "C1", "1")
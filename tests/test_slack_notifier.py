@@ -0,0 +1,109 @@
+import time
+import threading
+import pytest
+from email.utils import formatdate
+from automation import slack_messages
+from automation.slack_messages import SlackNotifier, post_slack_payload
+
+
+@pytest.fixture(autouse=True)
+def fast_slack(monkeypatch, slack_server):
+    monkeypatch.setattr(slack_messages, "slack_backoff_seconds", 0)
+    monkeypatch.setattr(slack_messages, "slack_timeout_seconds", 2)
+    monkeypatch.setattr(slack_messages, "recon_report_load_webhook", slack_server.url)
+
+
+def message(filename, status="Success", processname="recon_report_load"):
+    return {
+        "processname": processname,
+        "filename": filename,
+        "timestamp": "",
+        "status": status,
+        "logfile_loc": f"{filename}.log",
+        "exception": None,
+    }
+
+
+def test_post_retries_rate_limits_and_server_errors(slack_server):
+    responses = [(429, {"Retry-After": "0"}, {}), (503, {}, {}), (200, {}, {})]
+    slack_server.respond = lambda request: responses.pop(0)
+    assert post_slack_payload(slack_server.url, {"text": "hi"})
+    assert len(slack_server.requests) == 3
+
+
+def test_post_gives_up_on_client_errors(slack_server):
+    slack_server.respond = lambda request: (400, {}, {})
+    assert not post_slack_payload(slack_server.url, {"text": "hi"})
+    assert len(slack_server.requests) == 1
+
+
+def test_retry_after_as_http_date():
+    class Response:
+        headers = {"Retry-After": formatdate(time.time() + 30, usegmt=True)}
+
+    assert 25 <= slack_messages.retry_delay(Response(), 0) <= 30
+    Response.headers = {"Retry-After": "soon"}
+    assert slack_messages.retry_delay(Response(), 2) == 0
+
+
+def test_digest_folds_success_messages(slack_server):
+    notifier = SlackNotifier(digest_seconds=0.2)
+    for i in range(3):
+        notifier.notify(message(f"report_{i}.csv"))
+    notifier.notify(message("report_bad.csv", status="Error"))
+    time.sleep(0.5)
+    notifier.stop()
+
+    posts = [str(request["json"]) for request in slack_server.requests]
+    assert len(posts) == 2
+    assert "report_bad.csv" in posts[0]
+    assert "New Files Processed: *`3`*" in posts[1]
+
+
+def test_full_queue_drops_new_messages(slack_server):
+    release = threading.Event()
+
+    def respond(request):
+        release.wait(5)
+        return 200, {}, {}
+
+    slack_server.respond = respond
+    notifier = SlackNotifier(queue_size=1, digest_seconds=0)
+    assert notifier.notify(message("first.csv"))
+    while not slack_server.requests:
+        time.sleep(0.01)
+    assert notifier.notify(message("second.csv"))
+    assert not notifier.notify(message("third.csv"))
+    release.set()
+    notifier.stop()
+    assert len(slack_server.requests) == 2
+
+
+def test_failed_message_does_not_stop_the_notifier(slack_server):
+    notifier = SlackNotifier(digest_seconds=0)
+    notifier.notify(message("unknown.csv", processname="unknown_process"))
+    notifier.notify(message("report.csv"))
+    notifier.stop()
+    assert len(slack_server.requests) == 1
+    assert notifier.thread.is_alive() is False
+
+
+def test_stop_is_bounded_during_an_outage(slack_server, capsys):
+    release = threading.Event()
+
+    def respond(request):
+        release.wait(5)
+        return 500, {}, {}
+
+    slack_server.respond = respond
+    notifier = SlackNotifier(queue_size=2, digest_seconds=0)
+    for i in range(3):
+        notifier.notify(message(f"report_{i}.csv"))
+    start = time.monotonic()
+    notifier.stop(timeout=0.3)
+    elapsed = time.monotonic() - start
+    release.set()
+
+    # One post in flight times out, the rest are dropped without retries
+    assert elapsed < 3
+    assert "dropped" in capsys.readouterr().out
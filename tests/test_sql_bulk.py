@@ -0,0 +1,67 @@
+import sqlite3
+import pytest
+from utils import sql_bulk
+
+
+def test_build_insert_parts_without_defaults():
+    assert sql_bulk.build_insert_parts(["a", "b"]) == ("a, b", "(?, ?)")
+
+
+def test_build_insert_parts_with_sql_defaults():
+    column_list, row_template = sql_bulk.build_insert_parts(
+        ["header_id", "chart_name"], {"insert_datetime": "GETUTCDATE()"}
+    )
+    assert column_list == "header_id, chart_name, insert_datetime"
+    assert row_template == "(?, ?, GETUTCDATE())"
+
+
+@pytest.mark.parametrize(
+    "row_count, expected",
+    [
+        (0, "multirow"),
+        (2000, "multirow"),
+        (2001, "executemany"),
+        (10**7, "executemany"),
+    ],
+)
+def test_auto_strategy_never_picks_staged_file(monkeypatch, row_count, expected):
+    monkeypatch.setattr(sql_bulk, "bulk_insert_strategy", "auto")
+    monkeypatch.setattr(sql_bulk, "bulk_multirow_max_rows", 2000)
+    assert sql_bulk.choose_bulk_strategy(row_count) == expected
+
+
+@pytest.mark.parametrize("strategy", sql_bulk.BULK_STRATEGIES)
+def test_configured_strategy_wins(monkeypatch, strategy):
+    monkeypatch.setattr(sql_bulk, "bulk_insert_strategy", strategy)
+    assert sql_bulk.choose_bulk_strategy(1) == strategy
+
+
+def test_unknown_strategy_raises():
+    with pytest.raises(ValueError):
+        sql_bulk.bulk_insert(None, "t", ["a"], [(1,)], strategy="bogus")
+
+
+@pytest.mark.parametrize("strategy", ["multirow", "executemany"])
+def test_bulk_insert_into_local_database(monkeypatch, strategy):
+    # multirow has to split this load over several statements
+    monkeypatch.setattr(sql_bulk, "bulk_batch_size", 700)
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE detail (header_id INT, chart_name TEXT, loaded TEXT)")
+    rows = [(1, f"chart_{i}") for i in range(2500)]
+
+    stats = sql_bulk.bulk_insert(
+        cursor,
+        "detail",
+        ["header_id", "chart_name"],
+        rows,
+        # Server-side defaults are plain SQL, so use the local database's own
+        sql_defaults={"loaded": "CURRENT_TIMESTAMP"},
+        strategy=strategy,
+    )
+
+    assert stats["Strategy"] == strategy and stats["Rows"] == len(rows)
+    cursor.execute("SELECT header_id, chart_name FROM detail ORDER BY rowid")
+    assert cursor.fetchall() == rows
+    cursor.execute("SELECT COUNT(*) FROM detail WHERE loaded IS NOT NULL")
+    assert cursor.fetchone()[0] == len(rows)
@@ -0,0 +1,30 @@
+import time
+from automation.trigger_coalescer import TriggerCoalescer
+
+
+def slow_run(runs):
+    def run(triggers):
+        time.sleep(0.2)
+        runs.append(list(triggers))
+
+    return run
+
+
+def test_burst_collapses_into_one_run():
+    runs = []
+    coalescer = TriggerCoalescer(slow_run(runs), debounce_seconds=0.1)
+    for name in ("t1", "t2", "t3"):
+        coalescer.trigger(name)
+    time.sleep(0.5)
+    assert runs == [["t1", "t2", "t3"]]
+
+
+def test_shutdown_waits_for_a_run_started_by_the_timer():
+    runs = []
+    coalescer = TriggerCoalescer(slow_run(runs), debounce_seconds=0.01)
+    coalescer.trigger("t1")
+    time.sleep(0.05)
+    coalescer.trigger("t2")
+    coalescer.shutdown()
+    assert runs == [["t1"], ["t2"]]
+    assert not coalescer.running and not coalescer.triggers